@@ -5,7 +5,10 @@ Creates and configures the Flask application instance.
 from flask import Flask, jsonify
 from flask_cors import CORS
 from models import db
-from config import get_config
+from config import get_config, get_engine_options, get_replica_binds
+from db_routing import init_replica_routing
+from db_metrics import init_query_metrics
+from rate_limit import init_rate_limits
 import os
 
 
@@ -29,14 +32,22 @@ def create_app(config_name=None):
     
     config_class = get_config(config_name)
     app.config.from_object(config_class)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], config_name
+    )
+    app.config['SQLALCHEMY_BINDS'] = get_replica_binds(app.config['SQLALCHEMY_REPLICA_URI'], config_name)
     
     # Initialize extensions
     db.init_app(app)
+    init_replica_routing(app)
+    init_query_metrics(app)
+    init_rate_limits(app)
     CORS(app, resources={
         r"/api/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "X-Primary-Until"],
+            "expose_headers": ["X-Next-Cursor", "X-Primary-Until"]
         }
     })
     
@@ -46,9 +57,14 @@ def create_app(config_name=None):
     # Register error handlers
     register_error_handlers(app)
     
-    # Create database tables and seed initial data
-    with app.app_context():
-        initialize_database(app)
+    # Create database tables and seed initial data.
+    # Outside of tests this is a one-off `flask bootstrap` (see bootstrap.py),
+    # so creating an app does no DB work.
+    from bootstrap import register_bootstrap_command
+    register_bootstrap_command(app)
+    if app.config.get('TESTING') or os.environ.get('AUTO_BOOTSTRAP', 'false').lower() == 'true':
+        with app.app_context():
+            initialize_database(app)
     
     # Health check route
     @app.route('/api/health', methods=['GET'])
@@ -92,6 +108,7 @@ def register_blueprints(app):
     except ImportError:
         # If auth_routes doesn't exist yet, register inline
         from flask import Blueprint
+        from password_hashing import HashingBusy, busy_response
         auth_bp = Blueprint('auth', __name__)
         
         @auth_bp.route('/register', methods=['POST'])
@@ -109,7 +126,10 @@ def register_blueprints(app):
                 email=data.get('email'),
                 role=UserRole.USER
             )
-            new_user.set_password(data.get('password'))
+            try:
+                new_user.set_password(data.get('password'))
+            except HashingBusy:
+                return busy_response()
             db.session.add(new_user)
             db.session.commit()
             return jsonify({'message': 'Registered'}), 201
@@ -123,8 +143,11 @@ def register_blueprints(app):
             
             data = request.json
             user = User.query.filter_by(email=data.get('email')).first()
-            if not user or not user.check_password(data.get('password')):
-                return jsonify({'message': 'Invalid credentials'}), 401
+            try:
+                if not user or not user.check_password(data.get('password')):
+                    return jsonify({'message': 'Invalid credentials'}), 401
+            except HashingBusy:
+                return busy_response()
             
             token = jwt.encode({
                 'user_id': user.id,
@@ -173,6 +196,9 @@ def register_blueprints(app):
     from mock_payment import mock_payment_bp
     app.register_blueprint(mock_payment_bp, url_prefix='/api')
 
+    from db_metrics import metrics_bp
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
 
 
 def register_error_handlers(app):
@@ -1,52 +1,32 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from models import db, Course, Module, Lesson, Quiz, Question, Option, UserLessonProgress, UserCourseProgress, UserXP, UserBadge, Badge, UserQuizAttempt, UserQuizAnswer
 from middleware import token_required
+from db_routing import use_primary
+from course_catalog import get_catalog, catalog_lookup, resolve_lang
+from lesson_render import get_rendered_lesson
+from course_progress import record_lesson_completed, record_quiz_passed, get_my_learning
+from academy_search import search_lessons
+from sqlalchemy import case, func, insert
+from xp import award_xp, get_xp_leaderboard, get_user_rank, level_for
 import datetime
 
 academy_bp = Blueprint('academy', __name__)
 
-# Helper to award XP
-def award_xp(user_id, amount):
-    user_xp = UserXP.query.get(user_id)
-    if not user_xp:
-        user_xp = UserXP(user_id=user_id, total_xp=0, level_title="Novice")
-        db.session.add(user_xp)
-    
-    user_xp.total_xp += amount
-    
-    if user_xp.total_xp >= 5000:
-        user_xp.level_title = "Elite Trader"
-    elif user_xp.total_xp >= 2000:
-        user_xp.level_title = "Gold Pro"
-    elif user_xp.total_xp >= 500:
-        user_xp.level_title = "Silver Student"
-        
-    db.session.commit()
-    return user_xp
-
 # GET /api/academy/courses - List all courses
 @academy_bp.route('/courses', methods=['GET'])
 @token_required
 def get_courses(current_user):
-    courses = Course.query.all()
-    return jsonify([{
-        'id': c.id,
-        'title': c.title,
-        'description': c.description,
-        'category': c.category.value,
-        'level': c.level.value,
-        'thumbnail_url': c.thumbnail_url,
-        'duration': f"{c.duration_minutes} min",
-        'xp_reward': c.xp_reward,
-        'is_premium': c.is_premium
-    } for c in courses]), 200
+    catalog = get_catalog(resolve_lang())
+    return jsonify([c.to_summary_dict() for c in catalog.courses]), 200
 
 # GET /api/academy/course/<id> - Get course details with modules
+# Structure comes from the in-memory catalog (course_catalog.py); only the
+# user's lesson and quiz progress is queried, one set-based query each.
 @academy_bp.route('/course/<int:course_id>', methods=['GET'])
 @token_required
 def get_course_details(current_user, course_id):
     print(f"📡 API Request: GET /course/{course_id}")
-    course = Course.query.get(course_id)
+    course = catalog_lookup('courses_by_id', course_id, resolve_lang())
     
     if not course:
         print(f"❌ Course {course_id} NOT FOUND in DB.")
@@ -54,57 +34,58 @@ def get_course_details(current_user, course_id):
     
     print(f"✅ Found Course: {course.title} (ID: {course.id})")
     
-    modules_data = []
-    for module in sorted(course.modules, key=lambda m: m.order_index):
-        lessons_data = []
-        for lesson in sorted(module.lessons, key=lambda l: l.order_index):
-            lp = UserLessonProgress.query.filter_by(user_id=current_user.id, lesson_id=lesson.id).first()
-            lessons_data.append({
-                'id': lesson.id,
-                'title': lesson.title,
-                'type': lesson.lesson_type.value if lesson.lesson_type else 'TEXT',
-                'duration': 10,
-                'is_completed': lp.is_completed if lp else False
-            })
-        
-        # Check for module quiz
-        module_quiz = Quiz.query.filter_by(module_id=module.id).first()
-        quiz_completed = False
-        if module_quiz:
-            qa = UserQuizAttempt.query.filter_by(user_id=current_user.id, quiz_id=module_quiz.id, passed=True).first()
-            quiz_completed = bool(qa)
-        
-        modules_data.append({
-            'id': module.id,
-            'title': module.title,
-            'lessons': lessons_data,
-            'quiz_id': module_quiz.id if module_quiz else None,
-            'is_quiz_completed': quiz_completed
-        })
+    lesson_ids = [l.id for m in course.modules for l in m.lessons]
+    quiz_ids = [m.quiz_id for m in course.modules if m.quiz_id]
+    
+    completed_lessons = set()
+    if lesson_ids:
+        completed_lessons = {row.lesson_id for row in db.session.query(UserLessonProgress.lesson_id).filter(
+            UserLessonProgress.user_id == current_user.id,
+            UserLessonProgress.lesson_id.in_(lesson_ids),
+            UserLessonProgress.is_completed.is_(True)
+        )}
+    passed_quizzes = set()
+    if quiz_ids:
+        passed_quizzes = {row.quiz_id for row in db.session.query(UserQuizAttempt.quiz_id).filter(
+            UserQuizAttempt.user_id == current_user.id,
+            UserQuizAttempt.quiz_id.in_(quiz_ids),
+            UserQuizAttempt.passed.is_(True)
+        ).distinct()}
     
-    # Check for final exam (quiz with module_id = NULL and course_id = X)
-    final_exam = Quiz.query.filter_by(course_id=course_id, module_id=None).first()
-    has_final_exam = bool(final_exam)
-    final_exam_id = final_exam.id if final_exam else None
+    modules_data = [{
+        'id': module.id,
+        'title': module.title,
+        'lessons': [{
+            'id': lesson.id,
+            'title': lesson.title,
+            'type': lesson.lesson_type,
+            'duration': 10,
+            'is_completed': lesson.id in completed_lessons
+        } for lesson in module.lessons],
+        'quiz_id': module.quiz_id,
+        'is_quiz_completed': module.quiz_id in passed_quizzes
+    } for module in course.modules]
     
     return jsonify({
         'id': course.id,
         'title': course.title,
         'description': course.description,
-        'category': course.category.value,
-        'level': course.level.value,
+        'category': course.category,
+        'level': course.level,
         'thumbnail_url': course.thumbnail_url,
         'duration': f"{course.duration_minutes} min",
         'modules': modules_data,
-        'has_final_exam': has_final_exam,
-        'final_exam_id': final_exam_id
+        'has_final_exam': bool(course.final_exam_id),
+        'final_exam_id': course.final_exam_id
     }), 200
 
 # GET /api/academy/lesson/<id> - Get lesson content
 @academy_bp.route('/lesson/<int:lesson_id>', methods=['GET'])
 @token_required
+@use_primary  # Reads then inserts the access row: a lagging replica would duplicate it
 def get_lesson(current_user, lesson_id):
-    lesson = Lesson.query.get(lesson_id)
+    lang = resolve_lang()
+    lesson = catalog_lookup('lessons_by_id', lesson_id, lang)
     
     if not lesson:
         return jsonify({'message': 'Lesson not found'}), 404
@@ -116,16 +97,29 @@ def get_lesson(current_user, lesson_id):
         db.session.add(lp)
     
     lp.last_accessed = datetime.datetime.utcnow()
-    db.session.commit()
     
-    return jsonify({
-        'id': lesson.id,
-        'title': lesson.title,
-        'content': lesson.content,
-        'type': lesson.lesson_type.value if lesson.lesson_type else 'TEXT',
-        'video_url': lesson.video_url,
-        'duration_minutes': 10
-    }), 200
+    # Unchanged lesson: 304, the client keeps its copy
+    etag = f"{lesson.etag}-{lang or 'base'}"
+    if etag in request.if_none_match:
+        db.session.commit()
+        response = make_response('', 304)
+    else:
+        # Rendered once per content hash and language, stored in lesson_renders
+        content_html = get_rendered_lesson(lesson.id, lang, lesson.content_type, lesson.content, lesson.content_hash)
+        db.session.commit()
+        response = jsonify({
+            'id': lesson.id,
+            'title': lesson.title,
+            'content': content_html,
+            'content_type': 'html',
+            'type': lesson.lesson_type,
+            'video_url': lesson.video_url,
+            'duration_minutes': 10
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'  # Always revalidate, reuse on 304
+    response.vary.add('Accept-Language')
+    return response
 
 # POST /api/academy/lessons/<id>/complete - Mark lesson complete
 @academy_bp.route('/lessons/<int:lesson_id>/complete', methods=['POST'])
@@ -141,7 +135,9 @@ def complete_lesson(current_user, lesson_id):
     if not lp.is_completed:
         lp.is_completed = True
         lp.completed_at = datetime.datetime.utcnow()
+        db.session.flush()
         award_xp(current_user.id, 25)
+        record_lesson_completed(current_user.id, lesson.id)
     
     db.session.commit()
     
@@ -155,116 +151,107 @@ def complete_lesson(current_user, lesson_id):
 @academy_bp.route('/course/<int:course_id>/final-exam', methods=['GET'])
 @token_required
 def get_final_exam(current_user, course_id):
-    quiz = Quiz.query.filter_by(course_id=course_id, module_id=None).first()
+    lang = resolve_lang()
+    course = catalog_lookup('courses_by_id', course_id, lang)
+    quiz = get_catalog(lang).quizzes_by_id.get(course.final_exam_id) if course and course.final_exam_id else None
     
     if not quiz:
         return jsonify({'error': 'Final exam not found'}), 404
     
-    questions_data = []
-    for question in sorted(quiz.questions, key=lambda q: q.order_index):
-        options_data = [{'id': o.id, 'text': o.text} for o in question.options]
-        
-        questions_data.append({
-            'id': question.id,
-            'text': question.text,
-            'options': options_data
-        })
-    
-    return jsonify({
-        'id': quiz.id,
-        'title': quiz.title,
-        'min_pass_score': quiz.min_pass_score,
-        'questions': questions_data
-    }), 200
+    return jsonify(quiz.to_public_dict()), 200
 
 # GET /api/academy/modules/<id>/quiz - Get module quiz
 @academy_bp.route('/modules/<int:module_id>/quiz', methods=['GET'])
 @token_required
 def get_module_quiz(current_user, module_id):
-    quiz = Quiz.query.filter_by(module_id=module_id).first()
+    lang = resolve_lang()
+    quiz_id = catalog_lookup('module_quiz_ids', module_id, lang)
+    quiz = get_catalog(lang).quizzes_by_id.get(quiz_id) if quiz_id else None
     
     if not quiz:
         return jsonify({'error': 'Quiz not found'}), 404
     
-    questions_data = []
-    for question in sorted(quiz.questions, key=lambda q: q.order_index):
-        options_data = [{'id': o.id, 'text': o.text} for o in question.options]
-        
-        questions_data.append({
-            'id': question.id,
-            'text': question.text,
-            'options': options_data
-        })
-    
-    return jsonify({
-        'id': quiz.id,
-        'title': quiz.title,
-        'min_pass_score': quiz.min_pass_score,
-        'questions': questions_data
-    }), 200
+    return jsonify(quiz.to_public_dict()), 200
 
 # POST /api/academy/quiz/submit - Submit quiz answers
+# Graded against the catalog's precompiled answer key; the attempt, all its
+# answers (one bulk INSERT) and the XP award are written in one transaction.
 @academy_bp.route('/quiz/submit', methods=['POST'])
 @token_required
 def submit_quiz(current_user):
-    data = request.json
-    quiz_id = data.get('quiz_id')
-    user_answers = data.get('answers', {})
+    data = request.json or {}
+    user_answers = data.get('answers') or {}
+    try:
+        quiz_id = int(data.get('quiz_id'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'quiz_id is required'}), 400
     
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = catalog_lookup('quizzes_by_id', quiz_id, resolve_lang())
+    if not quiz:
+        return jsonify({'message': 'Quiz not found'}), 404
     
     score = 0
     total_questions = len(quiz.questions)
     results = []
+    answer_rows = []
     
     for question in quiz.questions:
-        selected_option_id = user_answers.get(str(question.id)) or user_answers.get(question.id)
-        correct_option = next((o for o in question.options if o.is_correct), None)
+        selected = user_answers.get(str(question.id)) or user_answers.get(question.id)
+        try:
+            selected_option_id = int(selected) if selected else None
+        except (TypeError, ValueError):
+            selected_option_id = None
+        correct_option_id = quiz.answer_key.get(question.id)
         
-        is_correct = False
-        if selected_option_id and correct_option and int(selected_option_id) == correct_option.id:
+        is_correct = selected_option_id is not None and selected_option_id == correct_option_id
+        if is_correct:
             score += 1
-            is_correct = True
         
         results.append({
             'question_id': question.id,
             'is_correct': is_correct,
-            'correct_option_id': correct_option.id if correct_option else None,
+            'correct_option_id': correct_option_id,
             'explanation': question.explanation
         })
+        answer_rows.append({
+            'question_id': question.id,
+            'selected_option_id': selected_option_id,
+            'is_correct': is_correct
+        })
     
     percentage = (score / total_questions) * 100 if total_questions > 0 else 0
     passed = percentage >= quiz.min_pass_score
     
-    # Save attempt
-    attempt_count = UserQuizAttempt.query.filter_by(user_id=current_user.id, quiz_id=quiz.id).count()
-    attempt = UserQuizAttempt(
-        user_id=current_user.id,
-        quiz_id=quiz.id,
-        score=percentage,
-        passed=passed,
-        attempt_number=attempt_count + 1
-    )
-    db.session.add(attempt)
-    db.session.flush()
-    
-    # Save answers
-    for res in results:
-        q_id = res['question_id']
-        selected_opt_id = user_answers.get(str(q_id)) or user_answers.get(q_id)
-        
-        answer_record = UserQuizAnswer(
-            attempt_id=attempt.id,
-            question_id=q_id,
-            selected_option_id=int(selected_opt_id) if selected_opt_id else None,
-            is_correct=res['is_correct']
+    try:
+        last_attempt, passed_before = db.session.query(
+            func.max(UserQuizAttempt.attempt_number),
+            func.max(case((UserQuizAttempt.passed.is_(True), 1), else_=0))
+        ).filter_by(user_id=current_user.id, quiz_id=quiz.id).one()
+        attempt = UserQuizAttempt(
+            user_id=current_user.id,
+            quiz_id=quiz.id,
+            score=percentage,
+            passed=passed,
+            attempt_number=(last_attempt or 0) + 1
         )
-        db.session.add(answer_record)
-    
-    if passed:
-        award_xp(current_user.id, 100)
-    
-    db.session.commit()
+        db.session.add(attempt)
+        db.session.flush()
+        
+        if answer_rows:
+            for row in answer_rows:
+                row['attempt_id'] = attempt.id
+            db.session.execute(insert(UserQuizAnswer), answer_rows)
+        
+        if passed:
+            award_xp(current_user.id, 100)
+            if not passed_before:
+                record_quiz_passed(current_user.id, quiz.id)
+        
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Quiz submission failed: {e}")
+        return jsonify({'message': 'Could not save quiz attempt', 'error': str(e)}), 500
     
     return jsonify({
         'passed': passed,
@@ -274,3 +261,30 @@ def submit_quiz(current_user):
         'results': results,
         'message': '🎉 Congratulations! You passed!' if passed else 'You need at least 70% to pass. Try again!'
     }), 200
+
+# GET /api/academy/xp/leaderboard - Top learners by XP, plus the caller's rank
+@academy_bp.route('/xp/leaderboard', methods=['GET'])
+@token_required
+def xp_leaderboard(current_user):
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    xp_total, rank = get_user_rank(current_user.id)
+    return jsonify({
+        'leaderboard': get_xp_leaderboard(limit),
+        'me': {'xp': xp_total, 'level': level_for(xp_total), 'rank': rank}
+    }), 200
+
+# GET /api/academy/my-learning - Courses in progress with their rollups
+@academy_bp.route('/my-learning', methods=['GET'])
+@token_required
+def my_learning(current_user):
+    return jsonify(get_my_learning(current_user.id, get_catalog(resolve_lang()))), 200
+
+# GET /api/academy/search?q=... - Ranked lesson hits with highlighted snippets
+@academy_bp.route('/search', methods=['GET'])
+@token_required
+def search_academy(current_user):
+    q = (request.args.get('q') or '').strip()
+    if len(q) < 2:
+        return jsonify({'query': q, 'results': []}), 200
+    limit = max(1, min(request.args.get('limit', 20, type=int), 50))
+    return jsonify({'query': q, 'results': search_lessons(q, resolve_lang(), limit)}), 200
@@ -0,0 +1,201 @@
+"""
+Academy full-text search.
+
+Lesson titles and bodies are indexed per language in a SQLite FTS5 sidecar
+file (ACADEMY_SEARCH_INDEX, default instance/academy_search.db), shared by
+every worker on the host, so searching never scans lessons in the main
+database.
+
+The index follows the academy catalog (course_catalog.py): when the catalog
+version moves, the next search syncs the index. Only lessons whose content
+hash changed are re-indexed, and deleted lessons are removed. One worker
+syncs while the others wait on the sidecar's write lock. Results are ranked
+with BM25 (titles weigh more than bodies) and come with highlighted
+snippets.
+
+    python academy_search.py --rebuild
+    python academy_search.py --query "gestion du risque" --lang fr
+"""
+import argparse
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+from course_catalog import DEFAULT_LANGUAGES, get_catalog
+
+DEFAULT_LIMIT = 20
+SNIPPET_TOKENS = 16
+TITLE_WEIGHT, BODY_WEIGHT = 8.0, 1.0
+MARK_OPEN, MARK_CLOSE = '\x02', '\x03'  # Replaced by <mark> after escaping the snippet
+
+SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lessons_fts USING fts5("
+    "title, body, lesson_id UNINDEXED, lang UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TABLE IF NOT EXISTS indexed_lessons (lesson_id INTEGER, lang TEXT, content_hash TEXT, "
+    "fts_rowid INTEGER, PRIMARY KEY (lesson_id, lang))",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+_local = threading.local()
+_SCRIPT = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r'<[^>]+>')
+_MARKDOWN = re.compile(r'\]\((?:[^()]|\([^()]*\))*\)|[!#*_`>\[\]]+')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _setting(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _index_path():
+    path = _setting('ACADEMY_SEARCH_INDEX', None)
+    if not path:
+        path = os.path.join(current_app.instance_path, 'academy_search.db')
+    return path
+
+
+def _connect():
+    path = _index_path()
+    conn = getattr(_local, 'conns', {}).get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        _local.conns = {**getattr(_local, 'conns', {}), path: conn}
+    return conn
+
+
+def plain_text(content):
+    """Lesson body without HTML tags or markdown markers."""
+    text = html.unescape(_TAG.sub(' ', _SCRIPT.sub(' ', content or '')))
+    return re.sub(r'\s+', ' ', _MARKDOWN.sub(' ', text)).strip()
+
+
+def _languages():
+    return [''] + list(_setting('ACADEMY_LANGUAGES', DEFAULT_LANGUAGES))
+
+
+def sync_index(force=False):
+    """Bring the index up to date with the catalog. Returns (indexed, removed)."""
+    conn = _connect()
+    version = str(get_catalog().version)
+    if not force and _meta(conn, 'catalog_version') == version:
+        return 0, 0
+
+    conn.execute("BEGIN IMMEDIATE")  # One worker syncs; the others wait here, then see the new version
+    try:
+        if not force and _meta(conn, 'catalog_version') == version:
+            conn.execute("COMMIT")
+            return 0, 0
+        if force:
+            conn.execute("DELETE FROM lessons_fts")
+            conn.execute("DELETE FROM indexed_lessons")
+        stored = {(row[0], row[1]): (row[2], row[3]) for row in conn.execute(
+            "SELECT lesson_id, lang, content_hash, fts_rowid FROM indexed_lessons")}
+        seen, indexed = set(), 0
+        for lang in _languages():
+            catalog = get_catalog(lang or None)
+            for lesson in catalog.lessons_by_id.values():
+                key = (lesson.id, lang)
+                seen.add(key)
+                digest = f"{lesson.content_hash}:{lesson.etag}"
+                if key in stored:
+                    if stored[key][0] == digest:
+                        continue
+                    conn.execute("DELETE FROM lessons_fts WHERE rowid = ?", (stored[key][1],))
+                rowid = conn.execute("INSERT INTO lessons_fts (title, body, lesson_id, lang) VALUES (?, ?, ?, ?)",
+                                     (lesson.title, plain_text(lesson.content), lesson.id, lang)).lastrowid
+                conn.execute("INSERT OR REPLACE INTO indexed_lessons (lesson_id, lang, content_hash, fts_rowid) "
+                             "VALUES (?, ?, ?, ?)", (lesson.id, lang, digest, rowid))
+                indexed += 1
+        removed = [key for key in stored if key not in seen]
+        for key in removed:
+            conn.execute("DELETE FROM lessons_fts WHERE rowid = ?", (stored[key][1],))
+            conn.execute("DELETE FROM indexed_lessons WHERE lesson_id = ? AND lang = ?", key)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('catalog_version', ?)", (version,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if indexed or removed:
+        print(f"🔎 Academy search index synced: {indexed} lesson(s) indexed, {len(removed)} removed")
+    return indexed, len(removed)
+
+
+def _meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _match_query(text):
+    """User text -> safe FTS5 query: every word required, the last one as a prefix."""
+    words = _WORD.findall(text or '')[:12]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return ' '.join(terms)
+
+
+def _snippet_html(snippet):
+    return html.escape(snippet).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+
+def search_lessons(text, lang=None, limit=DEFAULT_LIMIT):
+    """Ranked lesson hits: [{lesson_id, course_id, module_id, title, course_title, snippet, score}]."""
+    query = _match_query(text)
+    if query is None:
+        return []
+    sync_index()
+    rows = _connect().execute(
+        f"SELECT lesson_id, title, snippet(lessons_fts, 1, ?, ?, '…', {SNIPPET_TOKENS}), "
+        f"bm25(lessons_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank "
+        "FROM lessons_fts WHERE lessons_fts MATCH ? AND lang = ? ORDER BY rank LIMIT ?",
+        (MARK_OPEN, MARK_CLOSE, query, lang or '', limit)
+    ).fetchall()
+
+    catalog = get_catalog(lang)
+    hits = []
+    for lesson_id, title, snippet, rank in rows:
+        lesson = catalog.lessons_by_id.get(lesson_id)
+        module = catalog.modules_by_id.get(lesson.module_id) if lesson else None
+        course = catalog.courses_by_id.get(module.course_id) if module else None
+        hits.append({
+            'lesson_id': lesson_id,
+            'module_id': module.id if module else None,
+            'course_id': course.id if course else None,
+            'course_title': course.title if course else None,
+            'title': title,
+            'snippet': _snippet_html(snippet),
+            'score': round(-rank, 3)
+        })
+    return hits
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Academy search index tools')
+    parser.add_argument('--rebuild', action='store_true', help='Re-index every lesson')
+    parser.add_argument('--query', help='Run a search')
+    parser.add_argument('--lang', default=None)
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        if args.rebuild:
+            start = time.perf_counter()
+            indexed, removed = sync_index(force=True)
+            print(f"✅ Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms: {indexed} indexed, {removed} removed")
+        if args.query:
+            start = time.perf_counter()
+            hits = search_lessons(args.query, args.lang)
+            print(f"🔎 {len(hits)} hit(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+            for hit in hits:
+                print(f"   [{hit['score']:.2f}] {hit['title']} ({hit['course_title']}): {hit['snippet']}")
@@ -0,0 +1,61 @@
+"""
+Migration: add composite indexes for the hot query shapes.
+
+    trades              (account_id, status, created_at)  -> open positions
+    trades              (account_id, status, closed_at)   -> trade history
+    accounts            (user_id, status)                 -> active account lookup
+    leaderboard         (period, is_visible, ranking)     -> leaderboard pages
+    user_lesson_progress(user_id, lesson_id)              -> academy progress
+    performance_snapshots(account_id, created_at)         -> equity sparklines
+    user_xp             (total_xp)                        -> XP leaderboard
+    post_likes          (post_id, user_id)                -> like toggle
+    comments            (post_id, created_at)             -> post comments
+    posts               (created_at)                      -> community feed pages
+    floor_messages      (floor_id, created_at)            -> floor message pages
+
+The indexes are declared in models.py (so db.create_all() builds them on new
+databases); this script creates the ones missing on an existing database.
+Safe to run several times.
+
+Usage: python add_composite_indexes.py
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect
+
+from app import app
+from models import db, Trade, Account, Leaderboard, UserLessonProgress, PerformanceSnapshot, UserXP, PostLike, Comment, Post, FloorMessage
+
+INDEXED_MODELS = [Trade, Account, Leaderboard, UserLessonProgress, PerformanceSnapshot, UserXP, PostLike, Comment, Post, FloorMessage]
+
+
+def add_composite_indexes():
+    with app.app_context():
+        inspector = inspect(db.engine)
+        created = 0
+
+        for model in INDEXED_MODELS:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                print(f"[SKIP] Table '{table.name}' does not exist yet")
+                continue
+
+            existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    print(f"[OK] {index.name} already exists")
+                    continue
+
+                columns = ', '.join(c.name for c in index.columns)
+                print(f"[+] Creating {index.name} ON {table.name} ({columns})...")
+                index.create(bind=db.engine)
+                created += 1
+
+        print(f"\n[OK] Migration complete! {created} index(es) created.")
+
+
+if __name__ == '__main__':
+    add_composite_indexes()
@@ -264,7 +264,9 @@ def sync_leaderboard_endpoint():
              return jsonify({'message': 'Unauthorized'}), 403
              
         from models import Leaderboard
+        from equity_curves import get_sparklines
         from datetime import datetime, timedelta
+        import json
         
         # 1. Clear current Leaderboard for clean sync
         db.session.query(Leaderboard).delete()
@@ -288,6 +290,7 @@ def sync_leaderboard_endpoint():
             
             candidates.append({
                 'user_id': acc.user_id,
+                'account_id': acc.id,
                 'username': acc.user.username,
                 'profit': profit,
                 'roi': roi,
@@ -299,9 +302,11 @@ def sync_leaderboard_endpoint():
             
         candidates.sort(key=lambda x: x['profit'], reverse=True)
         
+        sparklines = get_sparklines([c['account_id'] for c in candidates[:50]], 'ALL_TIME')
         for i, c in enumerate(candidates[:50]): # Keep Top 50
             entry = Leaderboard(
                 user_id=c['user_id'],
+                account_id=c['account_id'],
                 username=c['username'],
                 country=c['country'], # Default MA
                 avatar_url=c['avatar'],
@@ -311,6 +316,7 @@ def sync_leaderboard_endpoint():
                 funded_amount=c['funded'],
                 ranking=i + 1,
                 period='ALL_TIME',
+                equity_curve=json.dumps(sparklines.get(c['account_id'], [])),
                 is_visible=True
             )
             db.session.add(entry)
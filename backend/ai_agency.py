@@ -1,17 +1,21 @@
 from flask import Blueprint, request, jsonify
-import google.generativeai as genai
 import os
-import yfinance as yf
 from models import db, MarketSignal, RiskAlert, Account, Trade, TradeStatus, User
 from middleware import token_required
 from datetime import datetime
 
 ai_agency_bp = Blueprint('ai_agency', __name__)
 
+def _yf():
+    """yfinance pulls in pandas and numpy: import it on first use, not at worker boot."""
+    import yfinance
+    return yfinance
+
 def get_gemini_model():
     api_key = os.environ.get('GEMINI_API_KEY')
     if not api_key:
         return None
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
     return genai.GenerativeModel('gemini-1.5-flash')
 
@@ -27,7 +31,7 @@ def get_ai_signals(current_user):
         model = get_gemini_model()
         if model:
             try:
-                ticker = yf.Ticker(asset)
+                ticker = _yf().Ticker(asset)
                 hist = ticker.history(period="5d", interval="1h")
                 price = ticker.info.get('regularMarketPrice', hist['Close'].iloc[-1])
                 
@@ -83,7 +87,7 @@ def get_trade_plan(current_user):
         return jsonify({'message': 'AI service unavailable'}), 503
         
     try:
-        ticker = yf.Ticker(asset)
+        ticker = _yf().Ticker(asset)
         info = ticker.info
         
         prompt = f"""
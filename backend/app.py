@@ -2,6 +2,10 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from models import db, User, UserRole, ChallengeStatus, Account, Trade, TradeType, TradeStatus, Course, Module, Lesson, Quiz, Question, Option, CourseCategory, CourseLevel, Badge, UserBadge, UserXP, UserLessonProgress, UserCourseProgress, Leaderboard, PerformanceSnapshot, AdminActionLog
 from engine import evaluate_challenge_rules
+from config import get_engine_options, get_replica_binds
+from db_routing import init_replica_routing
+from db_metrics import init_query_metrics
+from rate_limit import init_rate_limits
 import jwt
 import datetime
 from functools import wraps
@@ -14,7 +18,7 @@ load_dotenv() # Fallback to .env
 
 app = Flask(__name__)
 # Enable CORS for all domains (Production ready for Vercel/Anywhere)
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=['X-Next-Cursor', 'X-Primary-Until'])
 
 @app.route('/')
 def home():
@@ -32,94 +36,33 @@ if db_url and db_url.startswith('mysql://'):
 
 app.config['SQLALCHEMY_DATABASE_URI'] = db_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool size, overflow, timeout, pre-ping and recycle per FLASK_ENV (see config.py)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(db_url)
+# Optional read replica: GET endpoints read from it (see db_routing.py)
+app.config['SQLALCHEMY_BINDS'] = get_replica_binds(os.getenv('DATABASE_REPLICA_URL'))
+app.config['REPLICA_STICKY_SECONDS'] = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_secret_key')
+app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+app.config['RATE_LIMIT_STORAGE'] = os.getenv('RATE_LIMIT_STORAGE')
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+app.config['POST_IMAGE_DIR'] = os.getenv('POST_IMAGE_DIR')
+app.config['POST_IMAGE_WORKERS'] = int(os.getenv('POST_IMAGE_WORKERS', 2))
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
 
 db.init_app(app)
-
-# Create tables if they don't exist
-with app.app_context():
-    # AUTO-SEEDING: Always check if DB is empty and seed if necessary
-    # (Removes reliance on RUN_DB_INIT for basic functionality)
-    if True: # Always check
-    
-        try:
-            db_uri = app.config['SQLALCHEMY_DATABASE_URI']
-            masked_uri = db_uri.split('@')[-1] if '@' in db_uri else 'local'
-            print(f"✅ Database tables initialized. Connected to: ...@{masked_uri}")
-            
-            # 1. Seed Users if empty
-            if User.query.count() == 0:
-                print("🌱 Seeding initial users...")
-                admin = User(full_name="Admin TradeSense", email="malekfatimzahra@gmail.com", username="admin", role=UserRole.ADMIN)
-                admin.set_password("admin123")
-                db.session.add(admin)
-                db.session.commit()
-                print("✅ Initial users complete.")
-                
-            # 2. Seed Plans if empty
-            from models import ChallengePlan
-            if ChallengePlan.query.count() == 0:
-                print("🌱 Seeding plans...")
-                plans = [
-                    { 'id': 'starter', 'name': 'Starter Challenge', 'capital': 5000, 'profit_target': 500, 'max_drawdown': 500, 'daily_loss_limit': 250, 'price': 200, 'currency': 'MAD' },
-                    { 'id': 'pro', 'name': 'Professional Pro', 'capital': 25000, 'profit_target': 2500, 'max_drawdown': 2500, 'daily_loss_limit': 1250, 'price': 500, 'currency': 'MAD' },
-                    { 'id': 'elite', 'name': 'Elite Institutional', 'capital': 100000, 'profit_target': 10000, 'max_drawdown': 10000, 'daily_loss_limit': 5000, 'price': 1000, 'currency': 'MAD' },
-                ]
-                for p in plans:
-                    db.session.add(ChallengePlan(**p, is_active=True))
-                db.session.commit()
-                print("✅ Plans seeded.")
-                
-            # 3. Seed Courses if empty
-            from models import Course, CourseCategory, CourseLevel
-            if Course.query.count() == 0:
-                print("🌱 Seeding academy...")
-                courses = [
-                    {
-                        "title": "Introduction au Trading",
-                        "category": CourseCategory.TECHNICAL,
-                        "level": CourseLevel.BEGINNER,
-                        "description": "Apprenez les bases du trading Forex et CFD. Maîtrisez les concepts de base du marché.",
-                        "thumbnail_url": "https://img.freepik.com/free-vector/gradient-stock-market-concept_23-2149166910.jpg"
-                    },
-                    {
-                        "title": "Analyse Technique Avancée",
-                        "category": CourseCategory.TECHNICAL,
-                        "level": CourseLevel.INTERMEDIATE,
-                        "description": "Maîtrisez les indicateurs techniques et patterns graphiques pour prédire les mouvements.",
-                        "thumbnail_url": "https://img.freepik.com/free-vector/trading-concept-with-tablet_23-2148564070.jpg"
-                    }
-                ]
-                for c_data in courses:
-                    course = Course(**c_data, lang="fr", duration_minutes=120, xp_reward=1000)
-                    db.session.add(course)
-                db.session.commit()
-                print("✅ Academy seeded.")
-                
-            # 4. Seed Leaderboard (Accounts) if only 1 user or few accounts
-            from models import Account, ChallengeStatus
-            import random
-            if Account.query.count() <= 1:
-                print("🌱 Seeding leaderboard...")
-                names = [("Othman Chakir", "ochakir"), ("Imane Benjelloun", "ibenjelloun"), ("Mehdi Lazrak", "mlazrak"), ("Khadija Tazi", "ktazi")]
-                for full_name, username in names:
-                    temp_user = User(full_name=full_name, email=f"{username}@demo.com", username=username, role=UserRole.USER)
-                    temp_user.set_password("demo123")
-                    db.session.add(temp_user)
-                    db.session.flush()
-                    st_balance = random.choice([5000, 25000, 100000])
-                    equity = st_balance * (1 + random.uniform(-0.05, 0.15))
-                    acc = Account(user_id=temp_user.id, plan_name=random.choice(['Starter', 'Pro', 'Elite']), initial_balance=st_balance, current_balance=equity, equity=equity, daily_starting_equity=st_balance, status=ChallengeStatus.ACTIVE)
-                    db.session.add(acc)
-                db.session.commit()
-                print("✅ Leaderboard seeded.")
-
-            print("✅ Full Seeding logic complete.")
-
-        except Exception as e:
-            print(f"❌ Error initializing tables: {e}")
-    else:
-        print("ℹ️ Automated DB migration/seeding skipped (RUN_DB_INIT not set).")
+init_replica_routing(app)
+init_query_metrics(app)
+# 429s for clients hammering the AI, market history, login and sync endpoints
+init_rate_limits(app)
+
+# Tables and default data are created by the bootstrap command, not on import,
+# so workers and cold starts do no DB work before their first request:
+#   python bootstrap.py   (or: flask --app app bootstrap)
+from bootstrap import register_bootstrap_command, run_bootstrap
+register_bootstrap_command(app)
+if os.getenv('AUTO_BOOTSTRAP', 'false').lower() == 'true':
+    run_bootstrap(app)  # Opt-in for single-process dev setups
 
 from payments import payments_bp
 from challenges import challenges_bp
@@ -156,6 +99,9 @@ app.register_blueprint(unified_payment_bp, url_prefix='/api/unified-payment')
 from user_routes import user_bp
 app.register_blueprint(user_bp, url_prefix='/api/users')
 
+from db_metrics import metrics_bp
+app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
 # --- Middleware ---
 from middleware import token_required
 
@@ -320,7 +266,8 @@ def close_trade(current_user):
     })
 
 # --- Module D: Leaderboard ---
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from equity_curves import get_sparkline, get_sparklines
 
 @app.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard():
@@ -361,6 +308,7 @@ def get_leaderboard():
          .order_by(db.desc('total_profit'))\
          .limit(10).all()
 
+        sparklines = get_sparklines([row.account_id for row in results], period)
         leaderboard = []
         for rank, row in enumerate(results, 1):
             profit = row.total_profit if row.total_profit is not None else (row.equity - row.initial_balance)
@@ -380,7 +328,7 @@ def get_leaderboard():
                 'avatar': f"https://ui-avatars.com/api/?name={row.full_name}&background=random",
                 'country': 'MA',
                 'badges': [],
-                'sparkline': []
+                'sparkline': sparklines.get(row.account_id, [])
             })
             
         return jsonify(leaderboard)
@@ -542,25 +490,28 @@ def debug_seed_leaderboard():
                 db.session.commit()
             
             # Create Account if not exists
-            account = Account(user_id=user.id, plan_name=trader_data['plan'], initial_balance=trader_data['initial'], current_balance=trader_data['equity'], equity=trader_data['equity'], status=trader_data['status'], created_at=datetime.datetime.utcnow() - datetime.timedelta(days=random.randint(30, 90)))
+            days_active = random.randint(30, 90)
+            account = Account(user_id=user.id, plan_name=trader_data['plan'], initial_balance=trader_data['initial'], current_balance=trader_data['equity'], equity=trader_data['equity'], status=trader_data['status'], created_at=datetime.datetime.utcnow() - datetime.timedelta(days=days_active))
             db.session.add(account)
             db.session.commit()
 
-            # Create Leaderboard Entry (ALL_TIME)
-            snapshots_json = [] # Simplified for inline
-            steps = 20
+            # Demo equity history: one daily snapshot, written in a single bulk insert
+            now = datetime.datetime.utcnow()
             current_eq = trader_data['initial']
-            step_val = (trader_data['equity'] - current_eq) / steps
-            for d in range(steps):
-                current_eq += step_val + (random.uniform(-step_val * 0.5, step_val * 1.5) * 0.2)
-                snapshots_json.append(current_eq)
-            snapshots_json.append(trader_data['equity'])
-
+            step_val = (trader_data['equity'] - current_eq) / days_active
+            history = []
+            for d in range(days_active, -1, -1):
+                taken_at = now - datetime.timedelta(days=d)
+                current_eq = trader_data['equity'] if d == 0 else current_eq + step_val + random.uniform(-step_val, step_val)
+                history.append({'account_id': account.id, 'period': 'ALL_TIME', 'date': taken_at.date(), 'equity': round(current_eq, 2), 'profit': round(current_eq - trader_data['initial'], 2), 'created_at': taken_at})
+            db.session.execute(insert(PerformanceSnapshot), history)
+
+            # Create Leaderboard Entry (ALL_TIME), sparkline downsampled from the snapshots
             lb_entry = Leaderboard(
                 user_id=user.id, account_id=account.id, username=user.username, country=trader_data['country'],
                 profit=trader_data['equity'] - trader_data['initial'], roi=trader_data['roi'], win_rate=trader_data['win_rate'],
                 funded_amount=trader_data['initial'], consistency_score=trader_data['consistency'], risk_score=trader_data['risk_score'],
-                ranking=i + 1, period='ALL_TIME', badges=json.dumps(trader_data['badges']), equity_curve=json.dumps(snapshots_json)
+                ranking=i + 1, period='ALL_TIME', badges=json.dumps(trader_data['badges']), equity_curve=json.dumps(get_sparkline(account.id, 'ALL_TIME'))
             )
             db.session.add(lb_entry)
             db.session.commit()
@@ -590,156 +541,16 @@ def debug_seed_academy():
         return jsonify({'error': str(e), 'traceback': error_details}), 500
 
 def seed_academy():
+    """Seed the core academy (badges + 3 courses) from fixtures/academy_core.json."""
+    from fixture_loader import load_fixture_file
+
     print("Seeding FULL Academy Content...")
-    
-    # Badges
-    badges_data = [
-        {"name": "Technical Titan", "desc": "Mastered technical analysis", "icon": "fa-chart-line", "cat": "TECHNICAL"},
-        {"name": "Risk Guardian", "desc": "Completed risk management", "icon": "fa-shield-halved", "cat": "RISK"},
-        {"name": "Psychology Master", "desc": "Mental discipline achieved", "icon": "fa-brain", "cat": "PSYCHOLOGY"}
-    ]
-    for bd in badges_data:
-        if not Badge.query.filter_by(name=bd["name"]).first():
-            db.session.add(Badge(name=bd["name"], description=bd["desc"], icon_name=bd["icon"], category=bd["cat"], xp_bonus=500))
-    db.session.commit()
-    
-    # =========== COURSE 1: INSTITUTIONAL TRADING ===========
-    if not Course.query.filter_by(title="Institutional Trading Mastery").first():
-        c1 = Course(title="Institutional Trading Mastery", description="Master Order Blocks, Liquidity, Market Structure like the pros.", category=CourseCategory.TECHNICAL, level=CourseLevel.INTERMEDIATE, thumbnail_url="https://images.unsplash.com/photo-1611974765270-ca12586343bb?w=800", duration_minutes=180, xp_reward=1500, is_premium=False)
-        db.session.add(c1)
-        db.session.commit()
-        
-        # Module 1: Market Structure
-        m1 = Module(course_id=c1.id, title="Market Structure Fundamentals", order=1)
-        db.session.add(m1)
-        db.session.commit()
-        
-        lessons_m1 = [
-            {"title": "Introduction to Market Structure", "content": "## What is Market Structure?\nMarket structure is the backbone of price action. It defines trend direction using swing highs and lows.\n\n### Why It Matters\nInstitutions trade based on structure breaks. Retail traders who ignore this lose.\n\n### Core Concepts\n- **Uptrend**: Higher Highs (HH) + Higher Lows (HL)\n- **Downtrend**: Lower Lows (LL) + Lower Highs (LH)\n- **Range**: Equal highs and lows\n\n**Key Insight**: Structure determines bias. Always trade WITH the structure, never against it.", "order": 1},
-            {"title": "Break of Structure (BOS)", "content": "## BOS Explained\nA Break of Structure confirms trend continuation.\n\n### In an Uptrend\nPrice breaks the previous swing high → Bullish BOS.\n\n### In a Downtrend\nPrice breaks the previous swing low → Bearish BOS.\n\n### Trading the BOS\n1. Wait for the break\n2. Look for pullback to order block\n3. Enter on confirmation\n\n**Example**: BTC breaks $45k high. Pullback to $44k order block = long entry.", "order": 2},
-            {"title": "Change of Character (ChoCH)", "content": "## ChoCH: The Reversal Signal\nChange of Character signals a potential trend reversal.\n\n### How to Spot It\n- In uptrend: Price breaks the last HL (higher low)\n- In downtrend: Price breaks the last LH (lower high)\n\n### What to Do\nChoCH is NOT an entry—it's a WARNING. Wait for confirmation:\n- New structure formation\n- Order block in new direction\n- Volume spike\n\n**Pro Tip**: Most retail traders enter too early on ChoCH and get stopped out. Be patient.", "order": 3}
-        ]
-        
-        for les_data in lessons_m1:
-            les = Lesson(module_id=m1.id, title=les_data["title"], content=les_data["content"], order=les_data["order"])
-            db.session.add(les)
-            db.session.commit()
-            
-            quiz = Quiz(lesson_id=les.id, title=f"{les_data['title']} Quiz", min_pass_score=70)
-            db.session.add(quiz)
-            db.session.commit()
-            
-            if "Introduction" in les_data["title"]:
-                q1 = Question(quiz_id=quiz.id, text="What defines an uptrend?", explanation="Higher Highs and Higher Lows.")
-                db.session.add(q1)
-                db.session.commit()
-                db.session.add(Option(question_id=q1.id, text="HH + HL", is_correct=True))
-                db.session.add(Option(question_id=q1.id, text="LL + LH", is_correct=False))
-                db.session.add(Option(question_id=q1.id, text="Equal highs/lows", is_correct=False))
-            elif "BOS" in les_data["title"]:
-                q2 = Question(quiz_id=quiz.id, text="What does BOS confirm?", explanation="Trend continuation.")
-                db.session.add(q2)
-                db.session.commit()
-                db.session.add(Option(question_id=q2.id, text="Trend continuation", is_correct=True))
-                db.session.add(Option(question_id=q2.id, text="Trend reversal", is_correct=False))
-            else:
-                q3 = Question(quiz_id=quiz.id, text="ChoCH signals what?", explanation="Potential reversal warning.")
-                db.session.add(q3)
-                db.session.commit()
-                db.session.add(Option(question_id=q3.id, text="Reversal warning", is_correct=True))
-                db.session.add(Option(question_id=q3.id, text="Buy signal", is_correct=False))
-            db.session.commit()
-        
-        # Module 2: Order Blocks
-        m2 = Module(course_id=c1.id, title="Order Blocks & Fair Value Gaps", order=2)
-        db.session.add(m2)
-        db.session.commit()
-        
-        lessons_m2 = [
-            {"title": "What Are Order Blocks?", "content": "## Order Blocks Defined\nAn Order Block (OB) is the last opposing candle before a strong move.\n\n### Why They Work\nInstitutions place massive orders in these zones. When price returns, they defend it.\n\n### Bullish OB\nLast **down** candle before a bullish rally.\n\n### Bearish OB\nLast **up** candle before a bearish drop.\n\n**Visual**: Think of OB as institutional support/resistance on steroids.", "order": 1},
-            {"title": "Identifying Valid Order Blocks", "content": "## Valid vs Invalid OBs\nNot all order blocks are equal. Here's how to filter:\n\n### Valid OB Criteria\n1. **Engulfment**: OB candle must be engulfed by the breakout candle\n2. **Unmitigated**: Price hasn't returned to it yet\n3. **Close to current price**: Ideally within 5-10% range\n4. **Volume spike**: Confirmation of institutional activity\n\n### Invalid OBs\n- Already tested (mitigated)\n- Tiny candle with no volume\n- Too far from current price\n\n**Pro Tip**: Draw a box from OB open to close. Entry is when price re-enters that box.", "order": 2},
-            {"title": "Fair Value Gaps (FVG)", "content": "## FVG: The Imbalance\nA Fair Value Gap is an imbalance between buyers and sellers, leaving a 'gap' on the chart.\n\n### How to Spot FVG\nThree consecutive candles where:\n- Candle 1 high < Candle 3 low (Bullish FVG)\n- Candle 1 low > Candle 3 high (Bearish FVG)\n\n### Trading FVGs\nPrice tends to 'fill' FVGs before continuing the trend.\n\n**Setup**:\n1. Identify FVG\n2. Wait for price to return to the gap\n3. Enter when price reacts (rejection candle)\n\n**Example**: EUR/USD rallies leaving FVG at 1.0850-1.0870. Price pulls back, fills at 1.0860, then resumes rally.", "order": 3}
-        ]
-        
-        for les_data in lessons_m2:
-            les = Lesson(module_id=m2.id, title=les_data["title"], content=les_data["content"], order=les_data["order"])
-            db.session.add(les)
-            db.session.commit()
-            quiz = Quiz(lesson_id=les.id, title=f"{les_data['title']} Quiz", min_pass_score=75)
-            db.session.add(quiz)
-            db.session.commit()
-            q = Question(quiz_id=quiz.id, text=f"What is the main concept of {les_data['title']}?", explanation="Review the lesson for details.")
-            db.session.add(q)
-            db.session.commit()
-            db.session.add(Option(question_id=q.id, text="Covered in lesson", is_correct=True))
-            db.session.add(Option(question_id=q.id, text="Not mentioned", is_correct=False))
-            db.session.commit()
-    
-    # =========== COURSE 2: PSYCHOLOGY ===========
-    if not Course.query.filter_by(title="Iron Mindset: Trading Psychology").first():
-        c2 = Course(title="Iron Mindset: Trading Psychology", description="Conquer fear, greed, and emotional trading.", category=CourseCategory.PSYCHOLOGY, level=CourseLevel.ADVANCED, thumbnail_url="https://images.unsplash.com/photo-1549633033-9a446772f533?w=800", duration_minutes=120, xp_reward=1000, is_premium=True)
-        db.session.add(c2)
-        db.session.commit()
-        
-        m1 = Module(course_id=c2.id, title="Emotional Mastery", order=1)
-        db.session.add(m1)
-        db.session.commit()
-        
-        psych_lessons = [
-            {"title": "The Emotional Cycle", "content": "## Trading is 80% Psychology\n\n### The Cycle\n1. **Optimism**: New trade, full of hope\n2. **Excitement**: Position moves in your favor\n3. **Thrill**: Profit peaks, you feel invincible\n4. **Euphoria**: Top of the market, maximum risk\n5. **Anxiety**: Price reverses\n6. **Denial**: 'It will come back'\n7. **Fear**: Losses mount\n8. **Desperation**: Holding losing positions\n9. **Panic**: Capitulation, exit at worst price\n10. **Despondency**: Swear off trading\n\n**Solution**: Recognize this cycle. Exit at Thrill, never hold to Panic."},
-            {"title": "Handling FOMO", "content": "## FOMO Kills Accounts\nFear Of Missing Out makes you chase price and enter at the worst time.\n\n### Why It Happens\n- Social media brags\n- Seeing others profit\n- Lack of patience\n\n### The Fix\n1. **Have a plan**: Only trade YOUR setups\n2. **Journal misses**: Track trades you skipped. You'll see most weren't worth it\n3. **Abundance mindset**: The market always provides another opportunity\n\n**Mantra**: 'If I missed it, it wasn't my trade.'"},
-            {"title": "Overcoming Revenge Trading", "content": "## Revenge Trading: The Account Killer\nAfter a loss, the urge to 'win it back' is overwhelming. This is how you blow up.\n\n### The Trap\n- Take a loss → Feel angry → Enter random trade → Bigger loss → Repeat\n\n### Prevention\n1. **Hard stop**: After 2 losses, STOP for the day\n2. **Walk away**: Physical distance from charts\n3. **Review**: Journal what happened, learn\n4. **Reset**: Come back tomorrow with clear head\n\n**Truth**: One good trade can't fix bad trading. Fix the process, not the result."}
-        ]
-        
-        for les_data in psych_lessons:
-            les = Lesson(module_id=m1.id, title=les_data["title"], content=les_data["content"], order=len([l for l in psych_lessons if psych_lessons.index(l) <= psych_lessons.index(les_data)]))
-            db.session.add(les)
-            db.session.commit()
-            quiz = Quiz(lesson_id=les.id, title=f"Psychology: {les_data['title']}", min_pass_score=80)
-            db.session.add(quiz)
-            db.session.commit()
-            q = Question(quiz_id=quiz.id, text="What's the best response to a losing trade?", explanation="Stop, review, and reset.")
-            db.session.add(q)
-            db.session.commit()
-            db.session.add(Option(question_id=q.id, text="Stop and review", is_correct=True))
-            db.session.add(Option(question_id=q.id, text="Revenge trade immediately", is_correct=False))
-            db.session.commit()
-    
-    # == COURSE 3: RISK ==
-    if not Course.query.filter_by(title="Risk Management Mastery").first():
-        c3 = Course(title="Risk Management Mastery", description="Survival first, profits second.", category=CourseCategory.RISK, level=CourseLevel.BEGINNER, thumbnail_url="https://images.unsplash.com/photo-1639322537228-ad71c4295843?w=800", duration_minutes=90, xp_reward=800, is_premium=False)
-        db.session.add(c3)
-        db.session.commit()
-        m = Module(course_id=c3.id, title="Risk Fundamentals", order=1)
-        db.session.add(m)
-        db.session.commit()
-        
-        risk_lessons = [
-            {"title": "The 1% Rule", "content": "## Never Risk More Than 1-2%\n\n### The Math\n$10,000 account, 1% risk = $100 max loss per trade.\n\n### Why?\n- 10 losses in a row = only 10% drawdown\n- At 10% risk per trade, 3 losses = -27% (nearly impossible to recover)\n\n**Truth**: Risk management is more important than entry strategy."},
-            {"title": "Position Sizing Formula", "content": "## Calculate Lot Size\n\n**Formula**:\nLot Size = (Account Size × Risk %) / (Stop Loss in pips × Pip Value)\n\n**Example**:\n- Account: $5,000\n- Risk: 1% ($50)\n- Stop Loss: 50 pips\n- Pip Value: $10/lot\n\nLot Size = $50 / (50 × $10) = 0.1 lots\n\n**Never** guess your position size."},
-            {"title": "Risk-Reward Ratios", "content": "## Minimum 1:2 RR\n\nIf you risk $100, aim for $200+ profit.\n\n### Why 1:2?\nWith 40% win rate and 1:2 RR, you're profitable.\n\n**Calculation**:\n10 trades, 4 wins, 6 losses:\n- Wins: 4 × $200 = $800\n- Losses: 6 × $100 = -$600\n- Net: +$200\n\n**Rule**: Never take trades below 1:1.5 RR."}
-        ]
-        
-        for i, ld in enumerate(risk_lessons):
-            les = Lesson(module_id=m.id, title=ld["title"], content=ld["content"], order=i+1)
-            db.session.add(les)
-            db.session.commit()
-            quiz = Quiz(lesson_id=les.id, title=f"Risk: {ld['title']}", min_pass_score=100)
-            db.session.add(quiz)
-            db.session.commit()
-            q = Question(quiz_id=quiz.id, text="What's the max recommended risk per trade?", explanation="1-2% to survive drawdowns.")
-            db.session.add(q)
-            db.session.commit()
-            db.session.add(Option(question_id=q.id, text="1-2%", is_correct=True))
-            db.session.add(Option(question_id=q.id, text="10%", is_correct=False))
-            db.session.commit()
-    
-    print("✅ Full Academy Content Seeded Successfully!")
+    counts = load_fixture_file('academy_core.json')
+    print(f"✅ Full Academy Content Seeded Successfully! {counts}")
 
 if __name__ == '__main__':
+    run_bootstrap(app)
     with app.app_context():
-        print("Creating database tables...")
-        db.create_all()
         # Seed mock users if not exist
         if not User.query.filter_by(email='karim@trade.ma').first():
             user = User(full_name='Karim Trader', email='karim@trade.ma', role=UserRole.USER, username='karimtrader')
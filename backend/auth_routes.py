@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify, current_app
 from models import db, User, UserRole, Account, ChallengeStatus
-from werkzeug.security import generate_password_hash
+from password_hashing import HashingBusy, busy_response
 import jwt
 import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
+def _auth_busy():
+    """Password hashing pool saturated (login storm): tell the client to retry shortly."""
+    return busy_response('Too many sign-ins right now, please retry in a moment.')
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.json
@@ -72,6 +76,9 @@ def register():
             'account': default_account.to_dict()
         }), 201
 
+    except HashingBusy:
+        db.session.rollback()
+        return _auth_busy()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Registration failed', 'error': str(e)}), 500
@@ -84,8 +91,16 @@ def login():
 
     user = User.query.filter_by(email=data.get('email')).first()
     
-    if not user or not user.check_password(data.get('password')):
-        return jsonify({'message': 'Invalid email or password'}), 401
+    try:
+        if not user or not user.check_password(data.get('password')):
+            return jsonify({'message': 'Invalid email or password'}), 401
+
+        # Work factor changed since this hash was made: upgrade it while we have the password
+        if user.password_needs_rehash():
+            user.set_password(data.get('password'))
+            db.session.commit()
+    except HashingBusy:
+        return _auth_busy()
 
     token = jwt.encode({
         'user_id': user.id,
@@ -0,0 +1,148 @@
+"""
+Login throughput benchmark.
+
+Serves the app on a local threaded server, then runs a login storm
+(--concurrency clients posting /api/auth/login in a loop) while a probe
+client polls a trading endpoint. Reports login throughput, 503s from the
+hashing pool, and the probe latency before and during the storm, first
+with hashing effectively unbounded (one hashing thread per login, as when
+hashes ran on the request thread) and then with the configured pool.
+
+Needs a throwaway database; rate limiting is switched off for the run.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmark_login.py
+    python benchmark_login.py --concurrency 32 --duration 10 --hash-workers 2
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+
+from werkzeug.serving import make_server  # noqa: E402
+
+BENCH_EMAIL = 'login_bench@tradesense.local'
+BENCH_PASSWORD = 'bench-password-123'
+
+
+def _call(url, body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json', **(headers or {})})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            status = resp.status
+            resp.read()
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def probe(url, headers, stop, latencies):
+    while not stop.is_set():
+        status, elapsed = _call(url, headers=headers)
+        if status == 200:
+            latencies.append(elapsed)
+        time.sleep(0.02)
+
+
+def login_storm(url, stop, results):
+    while not stop.is_set():
+        status, elapsed = _call(url, {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+        results.append((status, elapsed))
+
+
+def run_phase(base, token, concurrency, duration):
+    headers = {'Authorization': f'Bearer {token}'}
+    probe_url = f'{base}/api/trading/active'
+
+    idle, stop = [], threading.Event()
+    t = threading.Thread(target=probe, args=(probe_url, headers, stop, idle))
+    t.start()
+    time.sleep(min(2.0, duration / 2))
+    stop.set()
+    t.join()
+
+    loaded, logins, stop = [], [], threading.Event()
+    threads = [threading.Thread(target=login_storm, args=(f'{base}/api/auth/login', stop, logins)) for _ in range(concurrency)]
+    threads.append(threading.Thread(target=probe, args=(probe_url, headers, stop, loaded)))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    ok = [e for s, e in logins if s == 200]
+    return {
+        'logins_per_s': len(ok) / duration,
+        'login_p95_ms': _percentile(ok, 0.95) * 1000,
+        'busy_503': sum(1 for s, _ in logins if s == 503),
+        'probe_idle_p50_ms': statistics.median(idle) * 1000 if idle else 0.0,
+        'probe_storm_p50_ms': statistics.median(loaded) * 1000 if loaded else 0.0,
+        'probe_storm_p95_ms': _percentile(loaded, 0.95) * 1000,
+        'probe_requests': len(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Login storm vs trading endpoint latency')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--duration', type=float, default=8.0, help='Seconds of login storm per phase')
+    parser.add_argument('--hash-workers', type=int, default=2, help='Hashing pool size for the bounded phase')
+    args = parser.parse_args()
+
+    import password_hashing
+    from app import app
+    from models import db, User, UserRole
+
+    with app.app_context():
+        db.create_all()
+        user = User.query.filter_by(email=BENCH_EMAIL).first()
+        if user is None:
+            user = User(full_name='Login Bench', username='login_bench', email=BENCH_EMAIL, role=UserRole.USER)
+            db.session.add(user)
+        user.set_password(BENCH_PASSWORD)
+        db.session.commit()
+        token = f'mock_jwt_token_{user.id}'
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No per-request access log
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    print(f"⏱️  Login storm: {args.concurrency} clients x {args.duration:.0f}s, "
+          f"method {app.config.get('PASSWORD_HASH_METHOD')}, {os.cpu_count()} CPU(s)")
+
+    phases = [('unbounded', args.concurrency, 10 ** 6), ('bounded', args.hash_workers, app.config.get('PASSWORD_HASH_MAX_PENDING', 32))]
+    try:
+        for name, workers, pending in phases:
+            password_hashing.shutdown()
+            app.config['PASSWORD_HASH_WORKERS'] = workers
+            app.config['PASSWORD_HASH_MAX_PENDING'] = pending
+            r = run_phase(base, token, args.concurrency, args.duration)
+            print(f"\n📊 {name} ({workers} hashing threads)")
+            print(f"   logins: {r['logins_per_s']:.1f}/s, p95 {r['login_p95_ms']:.0f} ms, 503s {r['busy_503']}")
+            print(f"   /api/trading/active: idle p50 {r['probe_idle_p50_ms']:.1f} ms | "
+                  f"during storm p50 {r['probe_storm_p50_ms']:.1f} ms, p95 {r['probe_storm_p95_ms']:.1f} ms "
+                  f"({r['probe_requests']} requests)")
+    finally:
+        server.shutdown()
+        password_hashing.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Startup-time benchmark.
+
+Measures what a fresh gunicorn worker or serverless cold start pays: the
+import of app.py and the first request, each run in a new interpreter.
+Exits with status 1 when the median total is above the target.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --path /api/challenges/plans --target 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+client = app_module.app.test_client()
+response = client.get(sys.argv[1])
+done = time.perf_counter()
+heavy = sorted(m for m in ('yfinance', 'pandas', 'numpy', 'bs4', 'google.generativeai', 'paypalrestsdk') if m in sys.modules)
+print(json.dumps({'import_s': imported - start, 'first_request_s': done - imported,
+                  'status': response.status_code, 'heavy_modules': heavy}))
+'''
+
+
+def measure_once(path):
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD, path],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=BACKEND_DIR),
+    )
+    lines = [l for l in result.stdout.splitlines() if l.startswith('{')]
+    if result.returncode != 0 or not lines:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"❌ Startup run failed (exit {result.returncode})")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure app import + first request in fresh interpreters')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/health', help='URL of the first request')
+    parser.add_argument('--target', type=float, default=1.0, help='Target for the median total, in seconds')
+    args = parser.parse_args()
+
+    print(f"⏱️  Startup benchmark: {args.runs} cold runs, first request GET {args.path}")
+    runs = []
+    for i in range(args.runs):
+        r = measure_once(args.path)
+        runs.append(r)
+        print(f"   run {i + 1}: import {r['import_s'] * 1000:.0f} ms + first request "
+              f"{r['first_request_s'] * 1000:.0f} ms (HTTP {r['status']})")
+
+    import_med = statistics.median(r['import_s'] for r in runs)
+    request_med = statistics.median(r['first_request_s'] for r in runs)
+    total_med = statistics.median(r['import_s'] + r['first_request_s'] for r in runs)
+
+    print(f"\n📊 median import {import_med * 1000:.0f} ms | first request {request_med * 1000:.0f} ms | "
+          f"total {total_med * 1000:.0f} ms (target {args.target * 1000:.0f} ms)")
+    if runs[-1]['heavy_modules']:
+        print(f"   Heavy modules loaded at startup: {', '.join(runs[-1]['heavy_modules'])}")
+
+    if total_med > args.target:
+        print("❌ Over target")
+        return 1
+    print("✅ Within target")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+TRADESENSE AI - DATABASE BOOTSTRAP
+==================================
+Creates missing tables and seeds the default data (admin user, challenge
+plans, starter courses, demo leaderboard accounts) once per deployment,
+instead of on every import of app.py.
+
+Concurrent runs are serialized with a database-level lock (GET_LOCK on
+MySQL, pg_advisory_lock on PostgreSQL, a lock file next to the database on
+SQLite), so several workers or release jobs starting together seed once.
+Every step checks before writing, so re-running is harmless.
+
+Usage:
+    python bootstrap.py
+    flask --app app bootstrap
+"""
+
+import os
+import random
+import time
+import zlib
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from models import (
+    db, User, UserRole, Account, ChallengeStatus, ChallengePlan,
+    Course, CourseCategory, CourseLevel
+)
+
+LOCK_NAME = 'tradesense_bootstrap'
+DEFAULT_LOCK_TIMEOUT = 300  # seconds
+
+
+@contextmanager
+def bootstrap_lock(engine, timeout=DEFAULT_LOCK_TIMEOUT):
+    """Hold a database-wide lock for the duration of the block."""
+    dialect = engine.dialect.name
+
+    if dialect == 'mysql':
+        with engine.connect() as conn:
+            acquired = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"),
+                                    {'name': LOCK_NAME, 'timeout': timeout}).scalar()
+            if acquired != 1:
+                raise TimeoutError(f"Could not acquire {LOCK_NAME} within {timeout}s")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': LOCK_NAME})
+
+    elif dialect == 'postgresql':
+        key = zlib.crc32(LOCK_NAME.encode())
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': key})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': key})
+                conn.commit()
+
+    elif dialect == 'sqlite' and engine.url.database and engine.url.database != ':memory:':
+        try:
+            import fcntl
+        except ImportError:  # Windows dev machines: single process anyway
+            yield
+            return
+        with open(engine.url.database + '.bootstrap.lock', 'w') as lock_file:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Could not acquire {LOCK_NAME} within {timeout}s")
+                    time.sleep(0.2)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    else:
+        yield
+
+
+def seed_defaults():
+    """Seed the default rows when their tables are empty."""
+    # 1. Seed Users if empty
+    if User.query.count() == 0:
+        print("🌱 Seeding initial users...")
+        admin = User(full_name="Admin TradeSense", email="malekfatimzahra@gmail.com", username="admin", role=UserRole.ADMIN)
+        admin.set_password("admin123")
+        db.session.add(admin)
+        db.session.commit()
+        print("✅ Initial users complete.")
+
+    # 2. Seed Plans if empty
+    if ChallengePlan.query.count() == 0:
+        print("🌱 Seeding plans...")
+        plans = [
+            { 'id': 'starter', 'name': 'Starter Challenge', 'capital': 5000, 'profit_target': 500, 'max_drawdown': 500, 'daily_loss_limit': 250, 'price': 200, 'currency': 'MAD' },
+            { 'id': 'pro', 'name': 'Professional Pro', 'capital': 25000, 'profit_target': 2500, 'max_drawdown': 2500, 'daily_loss_limit': 1250, 'price': 500, 'currency': 'MAD' },
+            { 'id': 'elite', 'name': 'Elite Institutional', 'capital': 100000, 'profit_target': 10000, 'max_drawdown': 10000, 'daily_loss_limit': 5000, 'price': 1000, 'currency': 'MAD' },
+        ]
+        for p in plans:
+            db.session.add(ChallengePlan(**p, is_active=True))
+        db.session.commit()
+        print("✅ Plans seeded.")
+
+    # 3. Seed Courses if empty
+    if Course.query.count() == 0:
+        print("🌱 Seeding academy...")
+        courses = [
+            {
+                "title": "Introduction au Trading",
+                "category": CourseCategory.TECHNICAL,
+                "level": CourseLevel.BEGINNER,
+                "description": "Apprenez les bases du trading Forex et CFD. Maîtrisez les concepts de base du marché.",
+                "thumbnail_url": "https://img.freepik.com/free-vector/gradient-stock-market-concept_23-2149166910.jpg"
+            },
+            {
+                "title": "Analyse Technique Avancée",
+                "category": CourseCategory.TECHNICAL,
+                "level": CourseLevel.INTERMEDIATE,
+                "description": "Maîtrisez les indicateurs techniques et patterns graphiques pour prédire les mouvements.",
+                "thumbnail_url": "https://img.freepik.com/free-vector/trading-concept-with-tablet_23-2148564070.jpg"
+            }
+        ]
+        for c_data in courses:
+            course = Course(**c_data, lang="fr", duration_minutes=120, xp_reward=1000)
+            db.session.add(course)
+        db.session.commit()
+        print("✅ Academy seeded.")
+
+    # 4. Seed XP level thresholds if empty
+    from xp import seed_levels
+    seed_levels()
+
+    # 5. Seed Leaderboard (Accounts) if only 1 user or few accounts
+    if Account.query.count() <= 1:
+        print("🌱 Seeding leaderboard...")
+        names = [("Othman Chakir", "ochakir"), ("Imane Benjelloun", "ibenjelloun"), ("Mehdi Lazrak", "mlazrak"), ("Khadija Tazi", "ktazi")]
+        for full_name, username in names:
+            temp_user = User(full_name=full_name, email=f"{username}@demo.com", username=username, role=UserRole.USER)
+            temp_user.set_password("demo123")
+            db.session.add(temp_user)
+            db.session.flush()
+            st_balance = random.choice([5000, 25000, 100000])
+            equity = st_balance * (1 + random.uniform(-0.05, 0.15))
+            acc = Account(user_id=temp_user.id, plan_name=random.choice(['Starter', 'Pro', 'Elite']), initial_balance=st_balance, current_balance=equity, equity=equity, daily_starting_equity=st_balance, status=ChallengeStatus.ACTIVE)
+            db.session.add(acc)
+        db.session.commit()
+        print("✅ Leaderboard seeded.")
+
+
+def run_bootstrap(app, timeout=DEFAULT_LOCK_TIMEOUT):
+    """Create tables and seed defaults under the bootstrap lock."""
+    with app.app_context():
+        db_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        masked_uri = db_uri.split('@')[-1] if '@' in db_uri else 'local'
+        print(f"🔒 Bootstrapping database ...@{masked_uri}")
+
+        start = time.perf_counter()
+        with bootstrap_lock(db.engine, timeout):
+            db.create_all()
+            print("✅ Database tables initialized.")
+            seed_defaults()
+        print(f"✅ Bootstrap complete in {time.perf_counter() - start:.1f}s")
+
+
+def register_bootstrap_command(app):
+    """Add `flask bootstrap` to the app's CLI."""
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Create tables and seed default data (safe to re-run)."""
+        run_bootstrap(app)
+
+
+if __name__ == '__main__':
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app import app
+    run_bootstrap(app)
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, Account, ChallengeStatus, Trade, TradeStatus
 from middleware import token_required
+from trade_archive import account_trades
 from sqlalchemy import desc
 
 
@@ -139,7 +140,7 @@ def get_challenge_by_id(current_user, challenge_id):
             }), 404
         
         # Get trades for this challenge
-        trades = Trade.query.filter_by(account_id=account.id).all()
+        trades = account_trades(account.id)
         
         return jsonify({
             'ok': True,
@@ -0,0 +1,82 @@
+"""
+Import-time budget check for app.py (python -X importtime).
+
+Fails (exit 1) when importing the app takes longer than the budget, or
+when any of the heavy libraries that must only load on first use
+(yfinance, pandas, numpy, bs4, google.generativeai, paypalrestsdk) is
+imported at startup. Also prints the slowest direct imports and the peak
+RSS of the importing process.
+
+Usage:
+    python check_import_budget.py
+    python check_import_budget.py --budget 0.8 --top 15
+"""
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must never be imported while app.py loads
+LAZY_MODULES = ['yfinance', 'pandas', 'numpy', 'bs4', 'google.generativeai', 'paypalrestsdk']
+
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile_import(module='app'):
+    """[(name, self_us, cumulative_us, depth)] from -X importtime, plus peak RSS in MB."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=BACKEND_DIR),
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"❌ import {module} failed")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            entries.append((m.group(4), int(m.group(1)), int(m.group(2)), depth))
+    rss_mb = max(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss, before) / 1024  # KB on Linux
+    return entries, rss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import-time budget of app.py')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--budget', type=float, default=1.0, help='Seconds')
+    parser.add_argument('--top', type=int, default=10, help='Slowest direct imports to list')
+    args = parser.parse_args()
+
+    entries, rss_mb = profile_import(args.module)
+    total_us = next((cum for name, _, cum, depth in entries if name == args.module and depth == 0), 0)
+    loaded = {name for name, _, _, _ in entries}
+
+    print(f"⏱️  import {args.module}: {total_us / 1e6:.3f}s (budget {args.budget:.3f}s), peak RSS {rss_mb:.0f} MB")
+    direct = sorted((e for e in entries if e[3] == 1), key=lambda e: e[2], reverse=True)[:args.top]
+    for name, _, cum, _ in direct:
+        print(f"   {cum / 1000:8.1f} ms  {name}")
+
+    problems = []
+    if total_us / 1e6 > args.budget:
+        problems.append(f"import took {total_us / 1e6:.3f}s")
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        problems.append(f"heavy modules imported at startup: {', '.join(eager)}")
+
+    if problems:
+        for p in problems:
+            print(f"❌ {p}")
+        return 1
+    print("✅ Import budget OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
 from models import db, TradingFloor, FloorMessage, MessageType, TradingFloorType, User, UserRole, Account, ChallengeStatus, TradeStatus, Post, Comment, PostLike
 from middleware import token_required
+from equity_curves import get_sparklines
+from post_counters import add_comment, toggle_like
+import post_images
+from pagination import InvalidCursor, keyset_page, page_args, with_cursor
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
-import google.generativeai as genai
 import os
 
 community_bp = Blueprint('community', __name__)
@@ -14,6 +19,7 @@ def get_ai_response(prompt, context_messages=[]):
         return "Error: AI Service not configured (Missing API Key)"
         
     try:
+        import google.generativeai as genai  # Heavy: only loaded when the AI assistant is used
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel('gemini-1.5-flash')
         
@@ -67,8 +73,34 @@ def get_community_posts():
     # For now, public read is fine, but to know "isLiked" we need user.
     # We'll assume simplest first: just list. Frontend can handle "isLiked" via separate call or we check token if present.
     
-    posts = Post.query.order_by(Post.created_at.desc()).limit(50).all()
-    return jsonify([p.to_dict() for p in posts])
+    # Counters are columns and authors come in the same query: one SELECT per page.
+    # Older pages: ?cursor=<X-Next-Cursor> (keyset on created_at, id; see pagination.py)
+    try:
+        limit, cursor = page_args(default=50)
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
+    posts, next_page = keyset_page(Post.query.options(joinedload(Post.author)), Post.created_at, Post.id, limit, cursor)
+    return with_cursor(jsonify([p.to_dict() for p in posts]), next_page)
+
+
+@community_bp.route('/floors/<int:floor_id>/messages', methods=['GET'])
+def get_floor_messages(floor_id):
+    """Top-level messages of a trading floor, newest first, paged with ?cursor="""
+    try:
+        limit, cursor = page_args()
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
+    query = FloorMessage.query.options(joinedload(FloorMessage.sender).selectinload(User.accounts))\
+                              .filter(FloorMessage.floor_id == floor_id, FloorMessage.parent_id.is_(None))
+    messages, next_page = keyset_page(query, FloorMessage.created_at, FloorMessage.id, limit, cursor)
+
+    # Reply counts for the whole page in one grouped query
+    replies = {}
+    if messages:
+        replies = dict(db.session.query(FloorMessage.parent_id, func.count(FloorMessage.id))
+                       .filter(FloorMessage.parent_id.in_([m.id for m in messages]))
+                       .group_by(FloorMessage.parent_id).all())
+    return with_cursor(jsonify([m.to_dict(replies_count=replies.get(m.id, 0)) for m in messages]), next_page)
 
 @community_bp.route('/posts', methods=['POST'])
 @token_required
@@ -83,19 +115,10 @@ def create_community_post(current_user):
         
     image_url = None
     if image and image.filename:
-        # Save image
-        import uuid, os
-        from werkzeug.utils import secure_filename
-        
-        ext = image.filename.rsplit('.', 1)[1].lower()
-        if ext in ['png', 'jpg', 'jpeg', 'gif', 'webp']:
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            upload_folder = os.path.join(current_app.root_path, 'uploads', 'posts')
-            os.makedirs(upload_folder, exist_ok=True)
-            image.save(os.path.join(upload_folder, filename))
-            # image_url = f"/api/community/uploads/posts/{filename}" # If routed via API
-            # Or simplified:
-            image_url = f"/uploads/posts/{filename}"
+        # Streamed to disk and deduplicated by content hash; web sizes are made in the background
+        digest = post_images.store_upload(image.stream)
+        if digest:
+            image_url = post_images.variant_url(digest)
 
     new_post = Post(
         user_id=current_user.id,
@@ -109,15 +132,43 @@ def create_community_post(current_user):
     return jsonify(new_post.to_dict()), 201
 
 # Serve uploads
-from flask import send_from_directory
+from flask import send_file, send_from_directory
+
+def _immutable(response):
+    # Content-addressed URLs never change meaning: let browsers and CDNs keep them
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 @community_bp.route('/uploads/posts/<filename>')
 def serve_post_image(filename):
-    return send_from_directory(os.path.join(current_app.root_path, 'uploads', 'posts'), filename)
+    # Uploads from before the image pipeline (<uuid>.<ext>)
+    return _immutable(send_from_directory(post_images.image_dir(), filename, max_age=post_images.CACHE_SECONDS))
+
+@community_bp.route('/uploads/posts/<digest>/<variant>')
+def serve_post_image_variant(digest, variant):
+    if not post_images.DIGEST.match(digest) or variant not in post_images.VARIANTS:
+        return jsonify({'message': 'Not found'}), 404
+    path = post_images.find_file(digest, variant)
+    if path:
+        return _immutable(send_file(path, max_age=post_images.CACHE_SECONDS))
+    # Not resized yet: serve the original without caching it under this URL
+    original = post_images.find_file(digest, 'original')
+    if not original:
+        return jsonify({'message': 'Not found'}), 404
+    post_images.schedule(digest)
+    return send_file(original, max_age=0)
 
 @community_bp.route('/posts/<int:post_id>/comments', methods=['GET'])
 def get_post_comments(post_id):
-    comments = Comment.query.filter_by(post_id=post_id).order_by(Comment.created_at.asc()).all()
-    return jsonify([c.to_dict() for c in comments])
+    # Oldest first; later pages with ?cursor=<X-Next-Cursor>
+    try:
+        limit, cursor = page_args(default=50)
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
+    query = Comment.query.options(joinedload(Comment.author)).filter_by(post_id=post_id)
+    comments, next_page = keyset_page(query, Comment.created_at, Comment.id, limit, cursor, descending=False)
+    return with_cursor(jsonify([c.to_dict() for c in comments]), next_page)
 
 @community_bp.route('/posts/<int:post_id>/comments', methods=['POST'])
 @token_required
@@ -131,12 +182,7 @@ def create_post_comment(current_user, post_id):
     # Check post exists
     post = Post.query.get_or_404(post_id)
     
-    new_comment = Comment(
-        post_id=post.id,
-        user_id=current_user.id,
-        content=content
-    )
-    db.session.add(new_comment)
+    new_comment = add_comment(current_user.id, post.id, content)
     db.session.commit()
     
     return jsonify(new_comment.to_dict()), 201
@@ -146,16 +192,9 @@ def create_post_comment(current_user, post_id):
 def like_post(current_user, post_id):
     post = Post.query.get_or_404(post_id)
     
-    existing = PostLike.query.filter_by(user_id=current_user.id, post_id=post_id).first()
-    if existing:
-        db.session.delete(existing) # Unlike
-        db.session.commit()
-        return jsonify({'liked': False, 'count': len(post.likes)})
-    else:
-        new_like = PostLike(user_id=current_user.id, post_id=post_id)
-        db.session.add(new_like)
-        db.session.commit()
-        return jsonify({'liked': True, 'count': len(post.likes)})
+    liked, count = toggle_like(current_user.id, post.id)
+    db.session.commit()
+    return jsonify({'liked': liked, 'count': count})
 
 # Keep AI endpoint for other features if needed
 @community_bp.route('/ai/ask', methods=['POST'])
@@ -241,12 +280,15 @@ def get_leaderboard():
                 'winRate': round(win_rate, 1),
                 'status': acc.status.value,
                 'fundedCapital': acc.initial_balance,
-                'avatar': f"https://ui-avatars.com/api/?name={acc.user.full_name}&background=random"
+                'avatar': f"https://ui-avatars.com/api/?name={acc.user.full_name}&background=random",
+                'account_id': acc.id
             })
         
     leaderboard_data.sort(key=lambda x: x['profit'], reverse=True)
     top_10 = leaderboard_data[:10]
+    sparklines = get_sparklines([entry['account_id'] for entry in top_10], period)
     for i, entry in enumerate(top_10):
         entry['rank'] = i + 1
+        entry['sparkline'] = sparklines.get(entry['account_id'], [])
         
     return jsonify(top_10)
@@ -11,6 +11,22 @@ load_dotenv(os.path.join(basedir, '..', '.env.local'))
 load_dotenv()  # Fallback to .env
 
 
+def pool_options(pool_size, max_overflow, pool_timeout, pool_recycle):
+    """
+    SQLAlchemy connection pool settings.
+    Each value can be overridden per deployment with a DB_POOL_* variable.
+    """
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.environ.get('DB_POOL_MAX_OVERFLOW', max_overflow)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', pool_timeout)),
+        # Recycle before the server drops idle connections (MySQL wait_timeout)
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', pool_recycle)),
+        # Test each connection on checkout so stale ones are replaced transparently
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+
+
 class Config:
     """Base configuration class with common settings."""
     
@@ -20,10 +36,31 @@ class Config:
     # SQLAlchemy settings
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False  # Set to True for SQL query debugging
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800)
+
+    # Optional read replica for GET traffic (see db_routing.py)
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))  # Read-your-writes window
+
+    # Per-request SQL metrics (see db_metrics.py)
+    SQL_METRICS_HEADER = False  # X-DB-Queries / X-DB-N-Plus-One response headers
+    SQL_N_PLUS_ONE_THRESHOLD = 5  # Same statement this many times in one request = N+1
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
     JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours in seconds
+    AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))  # token_required user cache, seconds
+
+    # Password hashing (see password_hashing.py); changing the method re-hashes on next login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # Hashing threads per process
+    PASSWORD_HASH_MAX_PENDING = 32  # Queued hashes before login answers 503
+
+    # Rate limiting (see rate_limit.py for the default rules)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE')  # Shared SQLite file, or 'memory'; default instance/rate_limits.db
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 1))  # Proxies appending to X-Forwarded-For
+    RATE_LIMITS = {}  # Per endpoint/blueprint overrides, e.g. {'auth.login': {'ip': '5/minute'}}
     
     # CORS settings
     CORS_HEADERS = 'Content-Type'
@@ -33,7 +70,29 @@ class Config:
     
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    
+    POST_IMAGE_DIR = os.environ.get('POST_IMAGE_DIR')  # Community images; default backend/uploads/posts
+    POST_IMAGE_WORKERS = int(os.environ.get('POST_IMAGE_WORKERS', 2))  # Resizing threads per process (see post_images.py)
+    POST_IMAGE_MAX_PENDING = 64  # Queued images before new ones wait for their first view
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'  # Behind nginx/apache with X-Sendfile
+
+    # Equity curves (see equity_curves.py)
+    EQUITY_SNAPSHOT_INTERVAL_MINUTES = int(os.environ.get('EQUITY_SNAPSHOT_INTERVAL_MINUTES', 60))
+    SPARKLINE_POINTS = 30  # Fixed sparkline size sent to the UI
+    SPARKLINE_CACHE_TTL = 300  # Seconds a downsampled curve stays cached
+
+    # Academy catalog cache (see course_catalog.py)
+    ACADEMY_LANGUAGES = ('en', 'fr', 'ar')  # Languages served from *Translation tables
+    CATALOG_VERSION_CHECK_SECONDS = 5  # How often each worker re-reads the content version stamp
+    ACADEMY_SEARCH_INDEX = os.environ.get('ACADEMY_SEARCH_INDEX')  # FTS5 sidecar file; default instance/academy_search.db
+
+    # XP (see xp.py)
+    XP_LEVELS_CACHE_TTL = 300  # Seconds the level thresholds stay cached
+    XP_LEADERBOARD_CACHE_TTL = 30
+
+    # Trade archive (see trade_archive.py)
+    TRADE_ARCHIVE_AFTER_DAYS = int(os.environ.get('TRADE_ARCHIVE_AFTER_DAYS', 90))
+    TRADE_ARCHIVE_BATCH_SIZE = 1000
+
     # PayPal Configuration (from environment)
     PAYPAL_CLIENT_ID = os.environ.get('PAYPAL_CLIENT_ID')
     PAYPAL_CLIENT_SECRET = os.environ.get('PAYPAL_CLIENT_SECRET')
@@ -67,6 +126,8 @@ class DevelopmentConfig(Config):
     # SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
     
     SQLALCHEMY_ECHO = True  # Log all SQL queries in development
+    SQL_METRICS_HEADER = True
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(pool_size=5, max_overflow=5, pool_timeout=30, pool_recycle=1800)
 
 
 class TestingConfig(Config):
@@ -77,6 +138,10 @@ class TestingConfig(Config):
     
     # Use SQLite for testing (faster, isolated)
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_REPLICA_URI = None
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # In-memory SQLite uses a single-connection pool
+    RATE_LIMIT_STORAGE = 'memory'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # Fast hashes for tests
     
     # Disable CSRF for testing
     WTF_CSRF_ENABLED = False
@@ -95,13 +160,6 @@ class ProductionConfig(Config):
     DB_PORT = os.environ.get('DB_PORT', '3306')
     DB_NAME = os.environ.get('DB_NAME', 'tradesense')
     
-    # Validate required environment variables
-    if not DB_USER or not DB_PASSWORD:
-        raise ValueError(
-            "Production requires DB_USER and DB_PASSWORD environment variables. "
-            "Please set them in your .env file or environment."
-        )
-    
     SQLALCHEMY_DATABASE_URI = (
         f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
         "?charset=utf8mb4"
@@ -109,10 +167,8 @@ class ProductionConfig(Config):
     
     # Production-specific settings
     SQLALCHEMY_ECHO = False
-    SQLALCHEMY_POOL_SIZE = 10
-    SQLALCHEMY_POOL_RECYCLE = 3600  # Recycle connections after 1 hour
-    SQLALCHEMY_POOL_TIMEOUT = 30
-    SQLALCHEMY_MAX_OVERFLOW = 20
+    # Managed MySQL closes idle connections after a few minutes: recycle well before that
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(pool_size=10, max_overflow=20, pool_timeout=30, pool_recycle=280)
     
     # Security headers
     SESSION_COOKIE_SECURE = True
@@ -143,4 +199,47 @@ def get_config(env=None):
     if env is None:
         env = os.environ.get('FLASK_ENV', 'development')
     
-    return config.get(env, config['default'])
+    config_class = config.get(env, config['default'])
+
+    # Validate required environment variables
+    if config_class is ProductionConfig and (not config_class.DB_USER or not config_class.DB_PASSWORD):
+        raise ValueError(
+            "Production requires DB_USER and DB_PASSWORD environment variables. "
+            "Please set them in your .env file or environment."
+        )
+
+    return config_class
+
+
+def get_engine_options(db_uri, env=None):
+    """
+    Engine options for the given database URI and environment.
+
+    Server databases get the environment's pool settings on a MeteredQueuePool
+    (see db_metrics.py); SQLite keeps SQLAlchemy's defaults.
+    """
+    if not db_uri or db_uri.startswith('sqlite'):
+        return {}
+
+    if env is None:
+        env = os.environ.get('FLASK_ENV', 'development')
+    config_class = config.get(env, config['default'])
+
+    from db_metrics import MeteredQueuePool
+    options = dict(config_class.SQLALCHEMY_ENGINE_OPTIONS)
+    options['poolclass'] = MeteredQueuePool
+    return options
+
+
+def get_replica_binds(replica_uri, env=None):
+    """
+    SQLALCHEMY_BINDS entry for the read replica, or {} when none is configured.
+    The replica gets the same pool settings as the primary.
+    """
+    if not replica_uri:
+        return {}
+    if replica_uri.startswith('mysql://'):
+        replica_uri = replica_uri.replace('mysql://', 'mysql+pymysql://', 1)
+
+    from db_routing import REPLICA_BIND
+    return {REPLICA_BIND: dict(get_engine_options(replica_uri, env), url=replica_uri)}
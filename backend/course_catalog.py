@@ -0,0 +1,388 @@
+"""
+In-memory academy catalog.
+
+Courses, modules, lessons, quizzes, questions and options (plus their
+*Translation rows) change rarely but were read from the DB on every academy
+request. get_catalog(lang) returns an immutable snapshot of the whole tree
+in one language, with each field falling back to the base text when no
+translation exists. Read endpoints answer content fields from it without
+touching the DB; per-user progress is still queried.
+
+Freshness: the 'academy' row of content_versions is bumped in the same
+transaction as any ORM write to a content model: unit-of-work flushes
+(_bump_on_flush) and bulk insert(Model)/update/delete statements
+(_bump_on_bulk_dml). Each worker re-reads the stamp at most every
+CATALOG_VERSION_CHECK_SECONDS (immediately after its own content commits)
+and, when it moved, builds new snapshots and swaps them in whole, so a
+request never sees a half-updated tree. Raw SQL writes must call
+bump_catalog_version(), or run:
+
+    python course_catalog.py --bump
+"""
+import argparse
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from types import MappingProxyType
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from lesson_render import content_hash
+from models import (
+    db, ContentVersion, Course, Module, Lesson, Quiz, Question, Option,
+    CourseTranslation, ModuleTranslation, LessonTranslation, QuizTranslation,
+    QuestionTranslation, OptionTranslation
+)
+
+CATALOG_NAME = 'academy'
+DEFAULT_LANGUAGES = ('en', 'fr', 'ar')
+DEFAULT_CHECK_SECONDS = 5
+
+CONTENT_MODELS = (
+    Course, Module, Lesson, Quiz, Question, Option,
+    CourseTranslation, ModuleTranslation, LessonTranslation, QuizTranslation,
+    QuestionTranslation, OptionTranslation,
+)
+
+
+@dataclass(frozen=True)
+class CatalogOption:
+    id: int
+    text: str
+    is_correct: bool
+
+
+@dataclass(frozen=True)
+class CatalogQuestion:
+    id: int
+    text: str
+    explanation: str
+    order_index: int
+    options: tuple
+
+
+@dataclass(frozen=True)
+class CatalogQuiz:
+    id: int
+    module_id: int
+    course_id: int
+    lesson_id: int
+    title: str
+    min_pass_score: int
+    questions: tuple
+    answer_key: MappingProxyType  # question id -> correct option id (None when the question has none)
+
+    def to_public_dict(self):
+        """Quiz as sent to students (no correct answers)."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'min_pass_score': self.min_pass_score,
+            'questions': [{
+                'id': q.id,
+                'text': q.text,
+                'options': [{'id': o.id, 'text': o.text} for o in q.options]
+            } for q in self.questions]
+        }
+
+
+@dataclass(frozen=True)
+class CatalogLesson:
+    id: int
+    module_id: int
+    title: str
+    lesson_type: str
+    content_type: str
+    content: str
+    video_url: str
+    order_index: int
+    content_hash: str  # Key of the rendered HTML (lesson_render.py)
+    etag: str  # Changes with anything get_lesson returns
+    quiz_id: int = None  # Lesson-level quiz
+
+
+@dataclass(frozen=True)
+class CatalogModule:
+    id: int
+    course_id: int
+    title: str
+    order_index: int
+    lessons: tuple
+    quiz_id: int
+
+
+@dataclass(frozen=True)
+class CatalogCourse:
+    id: int
+    title: str
+    description: str
+    category: str
+    level: str
+    thumbnail_url: str
+    duration_minutes: int
+    xp_reward: int
+    is_premium: bool
+    modules: tuple
+    final_exam_id: int
+
+    def to_summary_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'category': self.category,
+            'level': self.level,
+            'thumbnail_url': self.thumbnail_url,
+            'duration': f"{self.duration_minutes} min",
+            'xp_reward': self.xp_reward,
+            'is_premium': self.is_premium
+        }
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: int
+    lang: str
+    courses: tuple
+    courses_by_id: MappingProxyType
+    modules_by_id: MappingProxyType
+    lessons_by_id: MappingProxyType
+    quizzes_by_id: MappingProxyType
+    module_quiz_ids: MappingProxyType
+
+
+_lock = threading.Lock()
+_state = {'version': None, 'checked_at': 0.0, 'catalogs': {}}
+
+
+def _setting(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+# --- Version stamp ---
+
+def current_version():
+    version = db.session.execute(
+        select(ContentVersion.version).where(ContentVersion.name == CATALOG_NAME)
+    ).scalar()
+    return version or 0
+
+
+def _bump(connection):
+    table = ContentVersion.__table__
+    result = connection.execute(
+        table.update().where(table.c.name == CATALOG_NAME)
+        .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(name=CATALOG_NAME, version=1, updated_at=datetime.utcnow()))
+
+
+def bump_catalog_version():
+    """Mark the catalog stale everywhere (commits). For writes that bypass the ORM."""
+    _bump(db.session.connection())
+    db.session.commit()
+    _state['checked_at'] = 0.0
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_flush(session, flush_context):
+    if session.info.get('catalog_changed'):
+        return  # Already bumped in this transaction
+    if any(isinstance(obj, CONTENT_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        _bump(session.connection())
+        session.info['catalog_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_on_bulk_dml(orm_execute_state):
+    # Bulk insert(Model)/update/delete statements (fixture_loader) skip the flush
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if state.session.info.get('catalog_changed'):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, CONTENT_MODELS):
+        _bump(state.session.connection())
+        state.session.info['catalog_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _recheck_after_commit(session):
+    if session.info.pop('catalog_changed', False):
+        _state['checked_at'] = 0.0  # Our own write: pick it up on the next read
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('catalog_changed', None)
+
+
+# --- Building ---
+
+def _translations(model, key, lang):
+    return {getattr(row, key): row for row in model.query.filter_by(lang=lang)}
+
+
+def _pick(translation, field, base):
+    value = getattr(translation, field, None) if translation is not None else None
+    return value if value else base
+
+
+def build_catalog(lang=None, version=0):
+    """Load the whole academy tree in one language (base text when lang is None)."""
+    tr = {}
+    if lang:
+        tr = {
+            'course': _translations(CourseTranslation, 'course_id', lang),
+            'module': _translations(ModuleTranslation, 'module_id', lang),
+            'lesson': _translations(LessonTranslation, 'lesson_id', lang),
+            'quiz': _translations(QuizTranslation, 'quiz_id', lang),
+            'question': _translations(QuestionTranslation, 'question_id', lang),
+            'option': _translations(OptionTranslation, 'option_id', lang),
+        }
+
+    options_by_question = {}
+    for o in Option.query.order_by(Option.id):
+        t = tr.get('option', {}).get(o.id)
+        options_by_question.setdefault(o.question_id, []).append(
+            CatalogOption(id=o.id, text=_pick(t, 'text', o.text), is_correct=bool(o.is_correct)))
+
+    questions_by_quiz = {}
+    for q in Question.query.order_by(Question.order_index, Question.id):
+        t = tr.get('question', {}).get(q.id)
+        questions_by_quiz.setdefault(q.quiz_id, []).append(CatalogQuestion(
+            id=q.id, text=_pick(t, 'text', q.text), explanation=_pick(t, 'explanation', q.explanation),
+            order_index=q.order_index, options=tuple(options_by_question.get(q.id, ()))))
+
+    quizzes_by_id, module_quiz_ids, final_exam_ids, lesson_quiz_ids = {}, {}, {}, {}
+    for q in Quiz.query.order_by(Quiz.id):
+        t = tr.get('quiz', {}).get(q.id)
+        quizzes_by_id[q.id] = CatalogQuiz(
+            id=q.id, module_id=q.module_id, course_id=q.course_id, lesson_id=q.lesson_id, title=_pick(t, 'title', q.title),
+            min_pass_score=q.min_pass_score, questions=tuple(questions_by_quiz.get(q.id, ())),
+            answer_key=MappingProxyType({
+                question.id: next((o.id for o in question.options if o.is_correct), None)
+                for question in questions_by_quiz.get(q.id, ())
+            }))
+        # First quiz wins, as with Quiz.query.filter_by(...).first()
+        if q.module_id is not None:
+            module_quiz_ids.setdefault(q.module_id, q.id)
+        elif q.lesson_id is not None:
+            lesson_quiz_ids.setdefault(q.lesson_id, q.id)
+        elif q.course_id is not None:
+            final_exam_ids.setdefault(q.course_id, q.id)
+
+    lessons_by_module, lessons_by_id = {}, {}
+    for l in Lesson.query.order_by(Lesson.order_index, Lesson.id):
+        t = tr.get('lesson', {}).get(l.id)
+        title, content = _pick(t, 'title', l.title), _pick(t, 'content', l.content)
+        lesson_type = l.lesson_type.value if l.lesson_type else 'TEXT'
+        digest = content_hash(l.content_type, content)
+        lesson = CatalogLesson(
+            id=l.id, module_id=l.module_id, title=title, lesson_type=lesson_type, content_type=l.content_type,
+            content=content, video_url=l.video_url, order_index=l.order_index, content_hash=digest,
+            quiz_id=lesson_quiz_ids.get(l.id),
+            etag=hashlib.sha1(f"{digest}\0{title}\0{lesson_type}\0{l.video_url}".encode('utf-8')).hexdigest())
+        lessons_by_id[l.id] = lesson
+        lessons_by_module.setdefault(l.module_id, []).append(lesson)
+
+    modules_by_course = {}
+    for m in Module.query.order_by(Module.order_index, Module.id):
+        t = tr.get('module', {}).get(m.id)
+        modules_by_course.setdefault(m.course_id, []).append(CatalogModule(
+            id=m.id, course_id=m.course_id, title=_pick(t, 'title', m.title), order_index=m.order_index,
+            lessons=tuple(lessons_by_module.get(m.id, ())), quiz_id=module_quiz_ids.get(m.id)))
+
+    courses = []
+    for c in Course.query.order_by(Course.id):
+        t = tr.get('course', {}).get(c.id)
+        courses.append(CatalogCourse(
+            id=c.id, title=_pick(t, 'title', c.title), description=_pick(t, 'description', c.description),
+            category=c.category.value, level=c.level.value, thumbnail_url=c.thumbnail_url,
+            duration_minutes=c.duration_minutes, xp_reward=c.xp_reward, is_premium=c.is_premium,
+            modules=tuple(modules_by_course.get(c.id, ())), final_exam_id=final_exam_ids.get(c.id)))
+
+    return Catalog(
+        version=version, lang=lang or '',
+        courses=tuple(courses),
+        courses_by_id=MappingProxyType({c.id: c for c in courses}),
+        modules_by_id=MappingProxyType({m.id: m for c in courses for m in c.modules}),
+        lessons_by_id=MappingProxyType(lessons_by_id),
+        quizzes_by_id=MappingProxyType(quizzes_by_id),
+        module_quiz_ids=MappingProxyType(module_quiz_ids),
+    )
+
+
+# --- Access ---
+
+def resolve_lang(lang=None):
+    """Supported language from ?lang= or Accept-Language, else None (base text)."""
+    supported = _setting('ACADEMY_LANGUAGES', DEFAULT_LANGUAGES)
+    if lang is None and has_request_context():
+        lang = request.args.get('lang') or request.accept_languages.best_match(supported)
+    lang = (lang or '')[:2].lower()
+    return lang if lang in supported else None
+
+
+def get_catalog(lang=None, recheck=False):
+    """Snapshot of the catalog in `lang`, rebuilt when the version stamp moved."""
+    now = time.monotonic()
+    interval = _setting('CATALOG_VERSION_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)
+    if recheck or now - _state['checked_at'] >= interval:
+        version = current_version()
+        with _lock:
+            if version != _state['version']:
+                _state['version'], _state['catalogs'] = version, {}
+            _state['checked_at'] = now
+
+    key = lang or ''
+    catalog = _state['catalogs'].get(key)
+    if catalog is not None and catalog.version == _state['version']:
+        return catalog
+
+    version = _state['version'] or 0
+    catalog = build_catalog(lang, version)
+    with _lock:
+        if _state['version'] == version:
+            _state['catalogs'] = {**_state['catalogs'], key: catalog}  # Swap, never mutate in place
+    return catalog
+
+
+def catalog_lookup(attr, item_id, lang=None):
+    """Catalog entry by id; on a miss re-check the stamp once (content just added by another worker)."""
+    found = getattr(get_catalog(lang), attr).get(item_id)
+    if found is None:
+        found = getattr(get_catalog(lang, recheck=True), attr).get(item_id)
+    return found
+
+
+def clear_catalog():
+    with _lock:
+        _state.update(version=None, checked_at=0.0, catalogs={})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Academy catalog cache tools')
+    parser.add_argument('--bump', action='store_true', help='Invalidate the catalog in every worker')
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        if args.bump:
+            bump_catalog_version()
+            print(f"✅ Catalog version bumped to {current_version()}")
+        for lang in (None,) + tuple(app.config.get('ACADEMY_LANGUAGES', DEFAULT_LANGUAGES)):
+            start = time.perf_counter()
+            catalog = build_catalog(lang, current_version())
+            lessons = sum(len(m.lessons) for c in catalog.courses for m in c.modules)
+            print(f"📚 {lang or 'base'}: {len(catalog.courses)} courses, {lessons} lessons, "
+                  f"{len(catalog.quizzes_by_id)} quizzes built in {(time.perf_counter() - start) * 1000:.0f} ms")
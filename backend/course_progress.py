@@ -0,0 +1,246 @@
+"""
+Per-user, per-course progress rollups (user_course_progress).
+
+record_lesson_completed() and record_quiz_passed() bump the counters with
+one atomic UPDATE in the caller's transaction, and recompute
+progress_percent and is_completed in the same statement. Course totals come
+from the in-memory catalog. A row that does not exist yet is created from a
+recount of the user's lesson and quiz rows, so history from before the
+rollups is not lost.
+
+The "my learning" dashboard reads every rollup of a user in one query.
+
+Existing databases:
+    python course_progress.py --migrate     # add the counter columns + unique index (drops duplicates)
+    python course_progress.py --backfill    # recount every user/course pair
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy import case, func, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+from course_catalog import get_catalog
+from models import db, UserCourseProgress, UserLessonProgress, UserQuizAttempt
+
+UNIQUE_INDEX = 'uq_user_course_progress_user_course'
+OLD_INDEX = 'ix_user_course_progress_user_course'
+
+
+def course_quiz_ids(course):
+    """Every quiz of a catalog course: lesson quizzes, module quizzes and the final exam."""
+    ids = [l.quiz_id for m in course.modules for l in m.lessons if l.quiz_id]
+    ids += [m.quiz_id for m in course.modules if m.quiz_id]
+    return ids + ([course.final_exam_id] if course.final_exam_id else [])
+
+
+def course_totals(course):
+    """(lessons, quizzes) in a catalog course."""
+    return sum(len(m.lessons) for m in course.modules), len(course_quiz_ids(course))
+
+
+def _percent(done, total):
+    return min(100, int(done * 100 / total)) if total else 0
+
+
+def recount(user_id, course):
+    """(completed lessons, passed quizzes) of a user in a catalog course, from the detail rows."""
+    lesson_ids = [l.id for m in course.modules for l in m.lessons]
+    quiz_ids = course_quiz_ids(course)
+    lessons = quizzes = 0
+    if lesson_ids:
+        lessons = db.session.execute(select(func.count(func.distinct(UserLessonProgress.lesson_id))).where(
+            UserLessonProgress.user_id == user_id,
+            UserLessonProgress.lesson_id.in_(lesson_ids),
+            UserLessonProgress.is_completed.is_(True)
+        )).scalar()
+    if quiz_ids:
+        quizzes = db.session.execute(select(func.count(func.distinct(UserQuizAttempt.quiz_id))).where(
+            UserQuizAttempt.user_id == user_id,
+            UserQuizAttempt.quiz_id.in_(quiz_ids),
+            UserQuizAttempt.passed.is_(True)
+        )).scalar()
+    return lessons, quizzes
+
+
+def _increment(user_id, course_id, total, lessons=0, quizzes=0):
+    table = UserCourseProgress.__table__
+    done = table.c.completed_lessons + lessons + table.c.passed_quizzes + quizzes
+    percent = case((done >= total, 100), else_=done * 100 // total) if total else 0
+    # Derived columns first: MySQL evaluates SET left to right and would otherwise see the new counters
+    stmt = table.update().where(
+        table.c.user_id == user_id, table.c.course_id == course_id
+    ).ordered_values(
+        (table.c.progress_percent, percent),
+        (table.c.is_completed, done >= total if total else False),
+        (table.c.completed_lessons, table.c.completed_lessons + lessons),
+        (table.c.passed_quizzes, table.c.passed_quizzes + quizzes),
+        (table.c.last_accessed, datetime.utcnow()),
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def _record(user_id, course_id, lessons=0, quizzes=0):
+    course = get_catalog().courses_by_id.get(course_id)
+    if course is None:
+        return
+    total = sum(course_totals(course))
+    if _increment(user_id, course_id, total, lessons, quizzes):
+        return
+    # First progress in this course: start from the detail rows (already include this completion)
+    done_lessons, done_quizzes = recount(user_id, course)
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserCourseProgress(
+                user_id=user_id, course_id=course_id,
+                completed_lessons=done_lessons, passed_quizzes=done_quizzes,
+                progress_percent=_percent(done_lessons + done_quizzes, total),
+                is_completed=bool(total) and done_lessons + done_quizzes >= total,
+                last_accessed=datetime.utcnow()
+            ))
+    except IntegrityError:
+        _increment(user_id, course_id, total, lessons, quizzes)  # Row created by a concurrent request meanwhile
+
+
+def record_lesson_completed(user_id, lesson_id):
+    """Call once, when a lesson goes from not completed to completed (after flushing it)."""
+    catalog = get_catalog()
+    lesson = catalog.lessons_by_id.get(lesson_id)
+    module = catalog.modules_by_id.get(lesson.module_id) if lesson else None
+    if module is not None:
+        _record(user_id, module.course_id, lessons=1)
+
+
+def record_quiz_passed(user_id, quiz_id):
+    """Call on the first passed attempt of a quiz (after flushing it)."""
+    catalog = get_catalog()
+    quiz = catalog.quizzes_by_id.get(quiz_id)
+    if quiz is None:
+        return
+    course_id = quiz.course_id
+    module_id = quiz.module_id
+    if module_id is None and quiz.lesson_id is not None:
+        lesson = catalog.lessons_by_id.get(quiz.lesson_id)
+        module_id = lesson.module_id if lesson else None
+    if module_id is not None:
+        module = catalog.modules_by_id.get(module_id)
+        course_id = module.course_id if module else course_id
+    if course_id is not None:
+        _record(user_id, course_id, quizzes=1)
+
+
+def get_my_learning(user_id, catalog):
+    """Dashboard rows for every course the user has progress in: one query."""
+    rows = UserCourseProgress.query.filter_by(user_id=user_id).order_by(UserCourseProgress.last_accessed.desc()).all()
+    result, seen = [], set()
+    for row in rows:
+        course = catalog.courses_by_id.get(row.course_id)
+        if course is None or course.id in seen:
+            continue
+        seen.add(course.id)
+        total_lessons, total_quizzes = course_totals(course)
+        result.append({
+            **course.to_summary_dict(),
+            'completed_lessons': row.completed_lessons,
+            'total_lessons': total_lessons,
+            'passed_quizzes': row.passed_quizzes,
+            'total_quizzes': total_quizzes,
+            'progress_percent': row.progress_percent,
+            'is_completed': bool(row.is_completed),
+            'last_accessed': row.last_accessed.isoformat() if row.last_accessed else None
+        })
+    return result
+
+
+def migrate():
+    """Add the rollup columns and the unique (user_id, course_id) index to an existing table."""
+    inspector = inspect(db.engine)
+    table = UserCourseProgress.__table__
+    existing = {c['name'] for c in inspector.get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for column in ('completed_lessons', 'passed_quizzes'):
+            if column in existing:
+                print(f"[OK] {table.name}.{column} already exists")
+            else:
+                print(f"[+] Adding {table.name}.{column}...")
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+    indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+    if UNIQUE_INDEX not in indexes:
+        removed = _remove_duplicates()
+        print(f"[+] Removed {removed} duplicate rollup row(s); run --backfill to recount the kept ones")
+    if OLD_INDEX in indexes:  # Non-unique index of the first version
+        on_table = f" ON {table.name}" if db.engine.dialect.name == 'mysql' else ''
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX {OLD_INDEX}{on_table}"))
+    for index in table.indexes:
+        if index.name not in indexes:
+            print(f"[+] Creating {index.name}...")
+            index.create(bind=db.engine)
+
+
+def _remove_duplicates():
+    """Keep the lowest id of each duplicated (user_id, course_id) pair."""
+    groups = db.session.execute(
+        select(UserCourseProgress.user_id, UserCourseProgress.course_id, func.min(UserCourseProgress.id))
+        .group_by(UserCourseProgress.user_id, UserCourseProgress.course_id)
+        .having(func.count() > 1)
+    ).all()
+    removed = 0
+    for user_id, course_id, keep_id in groups:
+        removed += UserCourseProgress.query.filter(
+            UserCourseProgress.user_id == user_id, UserCourseProgress.course_id == course_id,
+            UserCourseProgress.id != keep_id
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def backfill(batch_size=500):
+    """Create the missing rollups, then recount every rollup from the lesson and quiz rows."""
+    catalog = get_catalog(recheck=True)
+    lesson_course = {l.id: catalog.modules_by_id[l.module_id].course_id
+                     for l in catalog.lessons_by_id.values() if l.module_id in catalog.modules_by_id}
+    started = {(row.user_id, lesson_course[row.lesson_id]) for row in db.session.query(
+        UserLessonProgress.user_id, UserLessonProgress.lesson_id).filter(
+        UserLessonProgress.is_completed.is_(True)).distinct() if row.lesson_id in lesson_course}
+    existing = set(db.session.query(UserCourseProgress.user_id, UserCourseProgress.course_id).all())
+    for user_id, course_id in started - existing:
+        db.session.add(UserCourseProgress(user_id=user_id, course_id=course_id))
+    db.session.commit()
+    print(f"   {len(started - existing)} missing rollups created")
+
+    updated = 0
+    last_id = 0
+    while True:
+        rows = UserCourseProgress.query.filter(UserCourseProgress.id > last_id).order_by(UserCourseProgress.id).limit(batch_size).all()
+        if not rows:
+            break
+        for row in rows:
+            course = catalog.courses_by_id.get(row.course_id)
+            if course is None:
+                continue
+            row.completed_lessons, row.passed_quizzes = recount(row.user_id, course)
+            total = sum(course_totals(course))
+            row.progress_percent = _percent(row.completed_lessons + row.passed_quizzes, total)
+            row.is_completed = bool(total) and row.completed_lessons + row.passed_quizzes >= total
+            updated += 1
+        last_id = rows[-1].id
+        db.session.commit()
+        print(f"   {updated} rollups recounted...")
+    print(f"✅ Backfill complete: {updated} rollups")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Course progress rollups maintenance')
+    parser.add_argument('--migrate', action='store_true', help='Add the rollup columns to an existing database')
+    parser.add_argument('--backfill', action='store_true', help='Recount all rollups from the detail rows')
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        if args.migrate:
+            migrate()
+        if args.backfill:
+            backfill()
+        if not (args.migrate or args.backfill):
+            parser.print_help()
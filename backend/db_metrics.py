@@ -0,0 +1,285 @@
+"""
+Database metrics.
+
+MeteredQueuePool records how long each checkout waits for a pooled
+connection, and the metrics blueprint exposes those numbers together with
+the current pool saturation:
+
+    GET /api/metrics/db-pool        (admin token)
+
+init_query_metrics(app) also counts the SQL statements and DB time of every
+request and flags query shapes that repeat within one request (N+1 lazy
+loads in a loop). In debug, each response carries the numbers:
+
+    X-DB-Queries: 14; time=6.2ms; repeated=1
+    X-DB-N-Plus-One: 10x SELECT modules.id, ... WHERE ? = modules.course_id
+
+and per-endpoint aggregates are always available at:
+
+    GET /api/metrics/queries        (admin token)
+
+For tests, assert_query_budget() fails when a block issues too many queries:
+
+    with assert_query_budget(8):
+        client.get('/api/academy/courses/1')
+
+Numbers are per process (one pool per gunicorn worker).
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Blueprint, g, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from middleware import token_required
+from models import db, UserRole
+
+metrics_bp = Blueprint('metrics', __name__)
+
+_lock = threading.Lock()
+_pool_stats = {
+    'checkouts': 0,
+    'timeouts': 0,
+    'wait_total_ms': 0.0,
+    'wait_max_ms': 0.0,
+}
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that times every checkout (including waits for a free slot)."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            with _lock:
+                _pool_stats['timeouts'] += 1
+            raise
+        waited_ms = (time.perf_counter() - start) * 1000
+        with _lock:
+            _pool_stats['checkouts'] += 1
+            _pool_stats['wait_total_ms'] += waited_ms
+            _pool_stats['wait_max_ms'] = max(_pool_stats['wait_max_ms'], waited_ms)
+        return conn
+
+
+def get_pool_metrics(engine=None):
+    """Snapshot of pool usage and checkout wait times for this process."""
+    engine = engine or db.engine
+    pool = engine.pool
+
+    with _lock:
+        stats = dict(_pool_stats)
+
+    metrics = {
+        'pool_class': type(pool).__name__,
+        'checkouts': stats['checkouts'],
+        'timeouts': stats['timeouts'],
+        'wait_avg_ms': round(stats['wait_total_ms'] / stats['checkouts'], 3) if stats['checkouts'] else 0.0,
+        'wait_max_ms': round(stats['wait_max_ms'], 3),
+    }
+
+    if isinstance(pool, QueuePool):
+        size = pool.size()
+        checked_out = pool.checkedout()
+        capacity = size + max(pool._max_overflow, 0)
+        metrics.update({
+            'size': size,
+            'max_overflow': pool._max_overflow,
+            'checked_out': checked_out,
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'saturation': round(checked_out / capacity, 3) if capacity > 0 else 0.0,
+        })
+    return metrics
+
+
+def reset_pool_metrics():
+    with _lock:
+        _pool_stats.update(checkouts=0, timeouts=0, wait_total_ms=0.0, wait_max_ms=0.0)
+
+
+def admin_required(f):
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if current_user.role not in (UserRole.ADMIN, UserRole.SUPERADMIN):
+            return jsonify({'message': 'Admin access required'}), 403
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+
+@metrics_bp.route('/db-pool', methods=['GET'])
+@token_required
+@admin_required
+def db_pool_metrics(current_user):
+    return jsonify(get_pool_metrics()), 200
+
+
+# --- PER-REQUEST QUERY COUNTING ---
+
+_local = threading.local()  # active assert_query_budget() counters for this thread
+_endpoint_stats = {}
+_listeners_installed = False
+
+
+class QueryLog:
+    """Statements seen during one request or one assert_query_budget() block."""
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+        self.shapes = Counter()
+
+    def add(self, statement, elapsed_ms):
+        self.count += 1
+        self.time_ms += elapsed_ms
+        self.shapes[' '.join(statement.split())] += 1
+
+    def repeated(self, threshold):
+        """[(shape, times)] for statements run at least `threshold` times."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+    for log in getattr(_local, 'logs', ()):
+        log.add(statement, elapsed_ms)
+    if has_app_context():
+        log = g.get('query_log')
+        if log is not None:
+            log.add(statement, elapsed_ms)
+
+
+def _install_listeners():
+    global _listeners_installed
+    if not _listeners_installed:
+        # On the Engine class, so the primary and any replica bind are both counted
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_installed = True
+
+
+def _record_endpoint(endpoint, log, threshold):
+    repeated = log.repeated(threshold)
+    with _lock:
+        stats = _endpoint_stats.setdefault(endpoint, {
+            'requests': 0, 'queries_total': 0, 'queries_max': 0,
+            'db_time_total_ms': 0.0, 'n_plus_one_requests': 0, 'worst_repeat': None,
+        })
+        stats['requests'] += 1
+        stats['queries_total'] += log.count
+        stats['queries_max'] = max(stats['queries_max'], log.count)
+        stats['db_time_total_ms'] += log.time_ms
+        if repeated:
+            stats['n_plus_one_requests'] += 1
+            shape, times = repeated[0]
+            if stats['worst_repeat'] is None or times > stats['worst_repeat']['times']:
+                stats['worst_repeat'] = {'times': times, 'statement': shape[:300]}
+    return repeated
+
+
+def init_query_metrics(app):
+    """Count queries per request. Call after db.init_app(app)."""
+    _install_listeners()
+    threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+
+    @app.before_request
+    def _start_query_log():
+        g.query_log = QueryLog()
+
+    @app.after_request
+    def _finish_query_log(response):
+        log = g.pop('query_log', None)
+        if log is None:
+            return response
+
+        # Unmatched URLs (404 scans, bad ids) share one entry so the table stays bounded
+        repeated = _record_endpoint(request.endpoint or '<unmatched>', log, threshold)
+        if app.config.get('SQL_METRICS_HEADER', app.debug):
+            response.headers['X-DB-Queries'] = f"{log.count}; time={log.time_ms:.1f}ms; repeated={len(repeated)}"
+            if repeated:
+                shape, times = repeated[0]
+                response.headers['X-DB-N-Plus-One'] = f"{times}x {shape[:200]}"
+        return response
+
+
+def get_query_metrics():
+    """Per-endpoint query counts, slowest (most queries per request) first."""
+    with _lock:
+        snapshot = {k: dict(v) for k, v in _endpoint_stats.items()}
+
+    endpoints = []
+    for endpoint, stats in snapshot.items():
+        requests = stats['requests']
+        endpoints.append({
+            'endpoint': endpoint,
+            'requests': requests,
+            'queries_avg': round(stats['queries_total'] / requests, 2),
+            'queries_max': stats['queries_max'],
+            'db_time_avg_ms': round(stats['db_time_total_ms'] / requests, 3),
+            'n_plus_one_requests': stats['n_plus_one_requests'],
+            'worst_repeat': stats['worst_repeat'],
+        })
+    endpoints.sort(key=lambda e: e['queries_avg'], reverse=True)
+    return endpoints
+
+
+def reset_query_metrics():
+    with _lock:
+        _endpoint_stats.clear()
+
+
+@contextmanager
+def count_queries():
+    """Yield a QueryLog that collects every statement run in this thread inside the block."""
+    _install_listeners()
+    log = QueryLog()
+    logs = getattr(_local, 'logs', None)
+    if logs is None:
+        logs = _local.logs = []
+    logs.append(log)
+    try:
+        yield log
+    finally:
+        logs.remove(log)
+
+
+@contextmanager
+def assert_query_budget(max_queries, max_repeats=None):
+    """
+    Fail (AssertionError) if the block runs more than `max_queries` statements,
+    or any single statement more than `max_repeats` times. For pytest:
+
+        def test_course_details_budget(client):
+            with assert_query_budget(8, max_repeats=2):
+                client.get('/api/academy/courses/1')
+    """
+    with count_queries() as log:
+        yield log
+
+    problems = []
+    if log.count > max_queries:
+        problems.append(f"{log.count} queries, budget is {max_queries}")
+    if max_repeats is not None:
+        for shape, times in log.repeated(max_repeats + 1):
+            problems.append(f"{times}x (max {max_repeats}): {shape[:200]}")
+    if problems:
+        raise AssertionError("Query budget exceeded:\n  " + "\n  ".join(problems))
+
+
+@metrics_bp.route('/queries', methods=['GET'])
+@token_required
+@admin_required
+def query_metrics(current_user):
+    return jsonify({'endpoints': get_query_metrics()}), 200
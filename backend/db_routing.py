@@ -0,0 +1,133 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, the replica is registered as the
+'replica' bind and RoutingSession sends SELECTs issued during read-only
+requests (GET/HEAD) to it. Everything else stays on the primary:
+
+- non-GET requests, and blueprints in PRIMARY_ONLY_BLUEPRINTS (trading,
+  payments, admin, auth)
+- views decorated with @use_primary
+- any statement after the request has written (flush, INSERT/UPDATE/DELETE,
+  raw text()), whatever the HTTP method
+- read-your-writes: for REPLICA_STICKY_SECONDS after a request that wrote
+  (including GETs that track access), the same client (same token, or same
+  IP when anonymous) reads from the primary. The deadline is kept per
+  worker and sent back as a cookie (SameSite=None; Secure, so the
+  cross-site frontend sends it with credentialed requests) and as the
+  X-Primary-Until header, which clients may echo on their next request.
+
+GET views that read a row and then insert it when missing must not read
+from the replica at all (the row may be there on the primary only): mark
+them @use_primary.
+
+Without a replica URL nothing changes: there is no 'replica' engine and
+every statement goes to the primary.
+"""
+import hashlib
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'primary_until'
+STICKY_HEADER = 'X-Primary-Until'
+
+# Write traffic and anything that must never see replication lag
+PRIMARY_ONLY_BLUEPRINTS = {
+    'trading', 'trades', 'payments', 'payment', 'unified_payment', 'mock_payment',
+    'paypal_config', 'admin', 'auth', 'metrics',
+}
+
+_lock = threading.Lock()
+_recent_writers = {}  # client key -> monotonic deadline
+
+
+class RoutingSession(Session):
+    """db.session class that can send read-only SELECTs to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+        if bind is not None or not has_request_context():
+            return engine
+
+        if self._flushing or clause is None or not getattr(clause, 'is_select', False):
+            # The request writes (or runs raw SQL): primary from now on, and sticky afterwards
+            g.db_use_replica = False
+            g.db_wrote = True
+            return engine
+
+        if not g.get('db_use_replica'):
+            return engine
+
+        replica = self._db.engines.get(REPLICA_BIND)
+        if replica is None or engine is not self._db.engines.get(None):
+            return engine
+        return replica
+
+
+def use_primary(f):
+    """Keep a GET view on the primary (e.g. it reads data it just wrote)."""
+    f._use_primary = True
+    return f
+
+
+def _client_key():
+    auth = request.headers.get('Authorization')
+    if auth:
+        return hashlib.sha1(auth.encode('utf-8')).hexdigest()
+    return request.remote_addr or 'anonymous'
+
+
+def _is_sticky():
+    for value in (request.headers.get(STICKY_HEADER), request.cookies.get(STICKY_COOKIE)):
+        if value:
+            try:
+                if float(value) > time.time():
+                    return True
+            except ValueError:
+                pass
+    with _lock:
+        deadline = _recent_writers.get(_client_key())
+    return deadline is not None and deadline > time.monotonic()
+
+
+def _remember_write(app, response):
+    window = app.config.get('REPLICA_STICKY_SECONDS', 5)
+    now = time.monotonic()
+    with _lock:
+        if len(_recent_writers) > 10000:
+            for key in [k for k, deadline in _recent_writers.items() if deadline <= now]:
+                del _recent_writers[key]
+        _recent_writers[_client_key()] = now + window
+    deadline = str(time.time() + window)
+    response.headers[STICKY_HEADER] = deadline
+    response.set_cookie(STICKY_COOKIE, deadline, max_age=window, httponly=True, secure=True, samesite='None')
+
+
+def init_replica_routing(app):
+    """Register the request hooks. Call after db.init_app(app)."""
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    @app.before_request
+    def _choose_database():
+        view = app.view_functions.get(request.endpoint)
+        g.db_use_replica = (
+            request.method in ('GET', 'HEAD')
+            and request.blueprint not in PRIMARY_ONLY_BLUEPRINTS
+            and not getattr(view, '_use_primary', False)
+            and not _is_sticky()
+        )
+
+    @app.after_request
+    def _track_writes(response):
+        wrote = g.get('db_wrote') or request.method not in ('GET', 'HEAD', 'OPTIONS')
+        if wrote and response.status_code < 400:
+            _remember_write(app, response)
+        return response
+
+    print(f"📚 Read replica enabled (sticky window {app.config.get('REPLICA_STICKY_SECONDS', 5)}s)")
@@ -5,30 +5,36 @@ This script safely deletes specified users and ALL their related data
 from all tables with proper CASCADE handling, backup, and transaction safety.
 
 FEATURES:
-- Backup before delete (exported to JSON)
-- Transaction-based (rollback on error)
+- Works in chunks of N users, one short transaction per chunk
+- Each chunk is streamed to a gzip NDJSON backup before it is deleted
+- Resumable: completed chunks are recorded in <run dir>/state.json
 - Cascade delete in correct order
 - Verification queries after deletion
 - No orphan rows left
 
-Usage: python delete_users_safe.py [--dry-run] [--backup-only]
+Usage: python delete_users_safe.py [--dry-run] [--backup-only] [--chunk-size N] [--pause S]
+       python delete_users_safe.py --resume backups/purge_20250101_120000
 """
 
 import sys
 import os
+import enum
+import gzip
 import json
-from datetime import datetime
+import time
+from datetime import date, datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app
 from models import (
-    db, User, Account, Trade, Leaderboard, AdminActionLog, PerformanceSnapshot,
+    db, User, Account, Trade, ArchivedTrade, Leaderboard, AdminActionLog, PerformanceSnapshot,
     Transaction, Post, Comment, PostLike, FloorMessage, UserCourseProgress,
-    UserLessonProgress, UserQuizAttempt, UserBadge, UserXP, RiskAlert,
-    UserRole, Challenge
+    UserLessonProgress, UserQuizAttempt, UserQuizAnswer, UserBadge, UserXP, RiskAlert,
+    UserRole, Challenge, UserChallenge, UserPreferences
 )
-from sqlalchemy import text
+from sqlalchemy import select
+from post_counters import posts_touched_by, recount
 
 # ============================================
 # USERS TO DELETE (From Screenshots)
@@ -72,402 +78,199 @@ EMAILS_TO_DELETE = [u[2] for u in ALL_USERS_TO_DELETE]
 USERNAMES_TO_DELETE = [u[1] for u in ALL_USERS_TO_DELETE]
 
 # ============================================
-# BACKUP FUNCTION
+# DELETE PLAN
 # ============================================
 
-def backup_user_data(user_ids, backup_dir="backups"):
-    """Backup all data for specified users to JSON files."""
-    
-    os.makedirs(backup_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = os.path.join(backup_dir, f"users_backup_{timestamp}.json")
-    
-    backup_data = {
-        "deleted_at": timestamp,
-        "user_ids": user_ids,
-        "users": [],
-        "accounts": [],
-        "trades": [],
-        "leaderboard": [],
-        "admin_logs": [],
-        "performance_snapshots": [],
-        "transactions": [],
-        "posts": [],
-        "comments": [],
-        "post_likes": [],
-        "floor_messages": [],
-        "user_course_progress": [],
-        "user_lesson_progress": [],
-        "user_quiz_attempts": [],
-        "user_badges": [],
-        "user_xp": [],
-        "risk_alerts": [],
-        "challenges": [],
-    }
-    
-    # Backup Users
-    users = User.query.filter(User.id.in_(user_ids)).all()
-    for u in users:
-        backup_data["users"].append({
-            "id": u.id,
-            "full_name": u.full_name,
-            "username": u.username,
-            "email": u.email,
-            "role": u.role.value,
-            "created_at": u.created_at.isoformat() if u.created_at else None
-        })
-    
-    # Backup Accounts
-    accounts = Account.query.filter(Account.user_id.in_(user_ids)).all()
-    account_ids = [a.id for a in accounts]
-    for a in accounts:
-        backup_data["accounts"].append({
-            "id": a.id,
-            "user_id": a.user_id,
-            "plan_name": a.plan_name,
-            "initial_balance": a.initial_balance,
-            "equity": a.equity,
-            "status": a.status.value
-        })
-    
-    # Backup Trades
-    trades = Trade.query.filter(Trade.account_id.in_(account_ids)).all()
-    for t in trades:
-        backup_data["trades"].append({
-            "id": t.id,
-            "account_id": t.account_id,
-            "user_id": t.user_id,
-            "symbol": t.symbol,
-            "pnl": t.pnl
-        })
-    
-    # Backup Leaderboard
-    lb_entries = Leaderboard.query.filter(Leaderboard.user_id.in_(user_ids)).all()
-    for lb in lb_entries:
-        backup_data["leaderboard"].append({
-            "id": lb.id,
-            "user_id": lb.user_id,
-            "username": lb.username,
-            "profit": lb.profit
-        })
-    
-    # Backup Admin Logs (as admin or target)
-    admin_logs = AdminActionLog.query.filter(
-        db.or_(
-            AdminActionLog.admin_id.in_(user_ids),
-            AdminActionLog.target_account_id.in_(account_ids)
-        )
-    ).all()
-    for log in admin_logs:
-        backup_data["admin_logs"].append({
-            "id": log.id,
-            "admin_id": log.admin_id,
-            "target_account_id": log.target_account_id,
-            "action": log.action
-        })
-    
-    # Backup Performance Snapshots
-    snapshots = PerformanceSnapshot.query.filter(
-        PerformanceSnapshot.account_id.in_(account_ids)
-    ).all()
-    for s in snapshots:
-        backup_data["performance_snapshots"].append({
-            "id": s.id,
-            "account_id": s.account_id,
-            "profit": s.profit
-        })
-    
-    # Backup Transactions
-    transactions = Transaction.query.filter(Transaction.user_id.in_(user_ids)).all()
-    for t in transactions:
-        backup_data["transactions"].append({
-            "id": t.id,
-            "user_id": t.user_id,
-            "amount": t.amount
-        })
-    
-    # Backup Posts
-    posts = Post.query.filter(Post.user_id.in_(user_ids)).all()
-    post_ids = [p.id for p in posts]
-    for p in posts:
-        backup_data["posts"].append({
-            "id": p.id,
-            "user_id": p.user_id,
-            "content": p.content[:100] if p.content else None
-        })
-    
-    # Backup Comments
-    comments = Comment.query.filter(Comment.user_id.in_(user_ids)).all()
-    for c in comments:
-        backup_data["comments"].append({
-            "id": c.id,
-            "user_id": c.user_id,
-            "post_id": c.post_id
-        })
-    
-    # Backup other tables...
-    try:
-        floor_msgs = FloorMessage.query.filter(FloorMessage.user_id.in_(user_ids)).all()
-        for m in floor_msgs:
-            backup_data["floor_messages"].append({"id": m.id, "user_id": m.user_id})
-    except:
-        pass
-    
-    try:
-        course_progress = UserCourseProgress.query.filter(
-            UserCourseProgress.user_id.in_(user_ids)
-        ).all()
-        for cp in course_progress:
-            backup_data["user_course_progress"].append({"id": cp.id, "user_id": cp.user_id})
-    except:
-        pass
-    
-    try:
-        lesson_progress = UserLessonProgress.query.filter(
-            UserLessonProgress.user_id.in_(user_ids)
-        ).all()
-        for lp in lesson_progress:
-            backup_data["user_lesson_progress"].append({"id": lp.id, "user_id": lp.user_id})
-    except:
-        pass
-    
-    try:
-        quiz_attempts = UserQuizAttempt.query.filter(
-            UserQuizAttempt.user_id.in_(user_ids)
-        ).all()
-        for qa in quiz_attempts:
-            backup_data["user_quiz_attempts"].append({"id": qa.id, "user_id": qa.user_id})
-    except:
-        pass
-    
-    try:
-        user_badges = UserBadge.query.filter(UserBadge.user_id.in_(user_ids)).all()
-        for ub in user_badges:
-            backup_data["user_badges"].append({"id": ub.id, "user_id": ub.user_id})
-    except:
-        pass
-    
-    try:
-        user_xp = UserXP.query.filter(UserXP.user_id.in_(user_ids)).all()
-        for ux in user_xp:
-            backup_data["user_xp"].append({"user_id": ux.user_id, "total_xp": ux.total_xp})
-    except:
-        pass
-    
-    try:
-        risk_alerts = RiskAlert.query.filter(RiskAlert.user_id.in_(user_ids)).all()
-        for ra in risk_alerts:
-            backup_data["risk_alerts"].append({"id": ra.id, "user_id": ra.user_id})
-    except:
-        pass
-    
-    try:
-        challenges = Challenge.query.filter(Challenge.user_id.in_(user_ids)).all()
-        for ch in challenges:
-            backup_data["challenges"].append({"id": ch.id, "user_id": ch.user_id})
-    except:
-        pass
-    
-    # Write backup to file
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(backup_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"✅ Backup saved to: {backup_file}")
-    return backup_file, account_ids
+DEFAULT_CHUNK_SIZE = 50
+STATE_FILE = 'state.json'
+
+
+def _chunk_scope(user_ids):
+    """Ids of the rows owned by one chunk of users."""
+    account_ids = [i for (i,) in db.session.query(Account.id).filter(Account.user_id.in_(user_ids))]
+    post_ids = [i for (i,) in db.session.query(Post.id).filter(Post.user_id.in_(user_ids))]
+    attempt_ids = [i for (i,) in db.session.query(UserQuizAttempt.id).filter(UserQuizAttempt.user_id.in_(user_ids))]
+    # Other users' posts losing likes/comments: their counters are recounted after the delete
+    touched = sorted(set(posts_touched_by(user_ids)) - set(post_ids))
+    return {'users': user_ids, 'accounts': account_ids, 'posts': post_ids, 'attempts': attempt_ids,
+            'touched_posts': touched}
+
+
+# Children first, parents last: (model, filter for a chunk scope)
+DELETE_PLAN = [
+    (Trade, lambda s: db.or_(Trade.account_id.in_(s['accounts']), Trade.user_id.in_(s['users']))),
+    (ArchivedTrade, lambda s: db.or_(ArchivedTrade.account_id.in_(s['accounts']), ArchivedTrade.user_id.in_(s['users']))),
+    (PerformanceSnapshot, lambda s: PerformanceSnapshot.account_id.in_(s['accounts'])),
+    (AdminActionLog, lambda s: db.or_(AdminActionLog.admin_id.in_(s['users']),
+                                      AdminActionLog.target_account_id.in_(s['accounts']))),
+    (Transaction, lambda s: db.or_(Transaction.user_id.in_(s['users']), Transaction.account_id.in_(s['accounts']))),
+    (Leaderboard, lambda s: db.or_(Leaderboard.user_id.in_(s['users']), Leaderboard.account_id.in_(s['accounts']))),
+    (PostLike, lambda s: db.or_(PostLike.user_id.in_(s['users']), PostLike.post_id.in_(s['posts']))),
+    (Comment, lambda s: db.or_(Comment.user_id.in_(s['users']), Comment.post_id.in_(s['posts']))),
+    (Post, lambda s: Post.id.in_(s['posts'])),
+    (FloorMessage, lambda s: FloorMessage.user_id.in_(s['users'])),
+    (UserCourseProgress, lambda s: UserCourseProgress.user_id.in_(s['users'])),
+    (UserLessonProgress, lambda s: UserLessonProgress.user_id.in_(s['users'])),
+    (UserQuizAnswer, lambda s: UserQuizAnswer.attempt_id.in_(s['attempts'])),
+    (UserQuizAttempt, lambda s: UserQuizAttempt.id.in_(s['attempts'])),
+    (UserBadge, lambda s: UserBadge.user_id.in_(s['users'])),
+    (UserXP, lambda s: UserXP.user_id.in_(s['users'])),
+    (RiskAlert, lambda s: RiskAlert.user_id.in_(s['users'])),
+    (Challenge, lambda s: Challenge.user_id.in_(s['users'])),
+    (UserChallenge, lambda s: UserChallenge.user_id.in_(s['users'])),
+    (UserPreferences, lambda s: UserPreferences.user_id.in_(s['users'])),
+    (Account, lambda s: Account.id.in_(s['accounts'])),
+    (User, lambda s: User.id.in_(s['users'])),
+]
+
+
+# ============================================
+# BACKUP (streamed, one file per chunk)
+# ============================================
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    return str(value)
+
+
+def _backup_path(run_dir, index):
+    """Never overwrite an earlier backup of the same chunk (e.g. a retried chunk)."""
+    path = os.path.join(run_dir, f"chunk_{index:05d}.ndjson.gz")
+    attempt = 1
+    while os.path.exists(path):
+        path = os.path.join(run_dir, f"chunk_{index:05d}.{attempt}.ndjson.gz")
+        attempt += 1
+    return path
+
+
+def backup_chunk(scope, path, batch_size=1000):
+    """Stream every row the chunk will delete to a gzip NDJSON file."""
+    counts = {}
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for model, condition in DELETE_PLAN:
+            table = model.__table__
+            result = db.session.execute(
+                select(table).where(condition(scope)).execution_options(yield_per=batch_size)
+            )
+            n = 0
+            for rows in result.partitions():
+                for row in rows:
+                    f.write(json.dumps({'table': table.name, 'row': dict(row._mapping)},
+                                       default=_json_default, ensure_ascii=False))
+                    f.write('\n')
+                n += len(rows)
+            counts[table.name] = n
+    return counts
 
 
 # ============================================
 # DELETE FUNCTION
 # ============================================
 
-def delete_users_cascade(user_ids, dry_run=False):
+def delete_chunk(scope):
+    """Delete one chunk of users in the current transaction. Returns {table: rows}."""
+    counts = {}
+    for model, condition in DELETE_PLAN:
+        counts[model.__tablename__] = model.query.filter(condition(scope)).delete(synchronize_session=False)
+    if scope['touched_posts']:
+        recount(scope['touched_posts'])  # Keep likes_count/comments_count in step with the rows
+    return counts
+
+
+def _load_state(run_dir):
+    path = os.path.join(run_dir, STATE_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def _save_state(run_dir, state):
+    path = os.path.join(run_dir, STATE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def delete_users_chunked(user_ids, run_dir, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False,
+                         backup_only=False, pause=0.0):
     """
-    Delete users and all related data in correct order.
-    
-    Order of deletion (children first, parents last):
-    1. trades (FK: account_id)
-    2. performance_snapshots (FK: account_id)
-    3. admin_actions_log (FK: admin_id, target_account_id)
-    4. transactions (FK: user_id, account_id)
-    5. leaderboard (FK: user_id, account_id)
-    6. post_likes (FK: user_id)
-    7. comments (FK: user_id)
-    8. posts (FK: user_id)
-    9. floor_messages (FK: user_id)
-    10. user_course_progress (FK: user_id)
-    11. user_lesson_progress (FK: user_id)
-    12. user_quiz_attempts (FK: user_id)
-    13. user_badges (FK: user_id)
-    14. user_xp (FK: user_id)
-    15. risk_alerts (FK: user_id)
-    16. challenges (FK: user_id)
-    17. accounts (FK: user_id)
-    18. users (PARENT)
+    Delete users and all related data, `chunk_size` users per transaction.
+
+    Each chunk is backed up to run_dir/chunk_NNNNN.ndjson.gz, deleted and
+    committed before the next one starts, so locks are only held for one
+    short transaction at a time. Completed chunks are recorded in
+    run_dir/state.json; calling again with the same run_dir resumes.
     """
-    
+    os.makedirs(run_dir, exist_ok=True)
+    state = _load_state(run_dir)
+    if state is None:
+        state = {'user_ids': sorted(user_ids), 'chunk_size': chunk_size, 'done': [], 'counts': {}}
+    else:
+        print(f"♻️  Resuming {run_dir}: {len(state['done'])} chunk(s) already done")
+
+    ids = state['user_ids']
+    size = state['chunk_size']
+    chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+    done = set(state['done'])
+    totals = dict(state['counts'])
+
     print("\n" + "="*60)
-    print("🗑️  DELETING USERS AND RELATED DATA")
+    print(f"🗑️  DELETING {len(ids)} USERS IN {len(chunks)} CHUNK(S) OF {size}")
     if dry_run:
         print("   [DRY RUN - NO CHANGES WILL BE MADE]")
+    if backup_only:
+        print("   [BACKUP ONLY - NO ROWS WILL BE DELETED]")
     print("="*60)
-    
-    # Get account IDs first
-    accounts = Account.query.filter(Account.user_id.in_(user_ids)).all()
-    account_ids = [a.id for a in accounts]
-    
-    deletion_counts = {}
-    
-    try:
-        # 1. Delete trades
-        count = Trade.query.filter(Trade.account_id.in_(account_ids)).delete(synchronize_session=False)
-        deletion_counts['trades'] = count
-        print(f"  ✓ trades: {count} rows")
-        
-        # 2. Delete performance_snapshots
-        count = PerformanceSnapshot.query.filter(
-            PerformanceSnapshot.account_id.in_(account_ids)
-        ).delete(synchronize_session=False)
-        deletion_counts['performance_snapshots'] = count
-        print(f"  ✓ performance_snapshots: {count} rows")
-        
-        # 3. Delete admin_actions_log (where user is admin OR target account belongs to user)
-        count = AdminActionLog.query.filter(
-            db.or_(
-                AdminActionLog.admin_id.in_(user_ids),
-                AdminActionLog.target_account_id.in_(account_ids)
-            )
-        ).delete(synchronize_session=False)
-        deletion_counts['admin_actions_log'] = count
-        print(f"  ✓ admin_actions_log: {count} rows")
-        
-        # 4. Delete transactions
-        count = Transaction.query.filter(Transaction.user_id.in_(user_ids)).delete(synchronize_session=False)
-        deletion_counts['transactions'] = count
-        print(f"  ✓ transactions: {count} rows")
-        
-        # 5. Delete leaderboard
-        count = Leaderboard.query.filter(Leaderboard.user_id.in_(user_ids)).delete(synchronize_session=False)
-        deletion_counts['leaderboard'] = count
-        print(f"  ✓ leaderboard: {count} rows")
-        
-        # 6. Delete post_likes
-        try:
-            count = PostLike.query.filter(PostLike.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['post_likes'] = count
-            print(f"  ✓ post_likes: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ post_likes: skipped ({e})")
-        
-        # 7. Delete comments
-        try:
-            count = Comment.query.filter(Comment.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['comments'] = count
-            print(f"  ✓ comments: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ comments: skipped ({e})")
-        
-        # 8. Delete posts
-        try:
-            count = Post.query.filter(Post.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['posts'] = count
-            print(f"  ✓ posts: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ posts: skipped ({e})")
-        
-        # 9. Delete floor_messages
-        try:
-            count = FloorMessage.query.filter(FloorMessage.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['floor_messages'] = count
-            print(f"  ✓ floor_messages: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ floor_messages: skipped ({e})")
-        
-        # 10. Delete user_course_progress
-        try:
-            count = UserCourseProgress.query.filter(
-                UserCourseProgress.user_id.in_(user_ids)
-            ).delete(synchronize_session=False)
-            deletion_counts['user_course_progress'] = count
-            print(f"  ✓ user_course_progress: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ user_course_progress: skipped ({e})")
-        
-        # 11. Delete user_lesson_progress
-        try:
-            count = UserLessonProgress.query.filter(
-                UserLessonProgress.user_id.in_(user_ids)
-            ).delete(synchronize_session=False)
-            deletion_counts['user_lesson_progress'] = count
-            print(f"  ✓ user_lesson_progress: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ user_lesson_progress: skipped ({e})")
-        
-        # 12. Delete user_quiz_attempts
-        try:
-            count = UserQuizAttempt.query.filter(
-                UserQuizAttempt.user_id.in_(user_ids)
-            ).delete(synchronize_session=False)
-            deletion_counts['user_quiz_attempts'] = count
-            print(f"  ✓ user_quiz_attempts: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ user_quiz_attempts: skipped ({e})")
-        
-        # 13. Delete user_badges
-        try:
-            count = UserBadge.query.filter(UserBadge.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['user_badges'] = count
-            print(f"  ✓ user_badges: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ user_badges: skipped ({e})")
-        
-        # 14. Delete user_xp
-        try:
-            count = UserXP.query.filter(UserXP.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['user_xp'] = count
-            print(f"  ✓ user_xp: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ user_xp: skipped ({e})")
-        
-        # 15. Delete risk_alerts
-        try:
-            count = RiskAlert.query.filter(RiskAlert.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['risk_alerts'] = count
-            print(f"  ✓ risk_alerts: {count} rows")
-        except Exception as e:
-            print(f"  ⚠ risk_alerts: skipped ({e})")
-        
-        # 16. Delete challenges
+
+    start = time.perf_counter()
+    processed = 0
+    for index, chunk in enumerate(chunks):
+        if index in done:
+            continue
+        chunk_start = time.perf_counter()
         try:
-            count = Challenge.query.filter(Challenge.user_id.in_(user_ids)).delete(synchronize_session=False)
-            deletion_counts['challenges'] = count
-            print(f"  ✓ challenges: {count} rows")
+            scope = _chunk_scope(chunk)
+            if not dry_run:
+                backup_chunk(scope, _backup_path(run_dir, index))
+            counts = {} if backup_only else delete_chunk(scope)
+            if dry_run or backup_only:
+                db.session.rollback()
+            else:
+                db.session.commit()
         except Exception as e:
-            print(f"  ⚠ challenges: skipped ({e})")
-        
-        # 17. Delete accounts
-        count = Account.query.filter(Account.user_id.in_(user_ids)).delete(synchronize_session=False)
-        deletion_counts['accounts'] = count
-        print(f"  ✓ accounts: {count} rows")
-        
-        # 18. DELETE USERS (PARENT - LAST)
-        count = User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
-        deletion_counts['users'] = count
-        print(f"  ✓ users: {count} rows")
-        
-        if dry_run:
             db.session.rollback()
-            print("\n⚠️  DRY RUN - All changes rolled back")
-        else:
-            db.session.commit()
-            print("\n✅ All deletions committed successfully!")
-        
-        return deletion_counts
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"\n❌ ERROR: {e}")
-        print("🔄 Transaction rolled back - no changes made")
-        raise
+            print(f"\n❌ ERROR in chunk {index + 1}/{len(chunks)}: {e}")
+            print(f"🔄 Chunk rolled back. Re-run with --resume {run_dir} to continue.")
+            raise
+
+        for table, n in counts.items():
+            totals[table] = totals.get(table, 0) + n
+        if not dry_run and not backup_only:
+            state['done'].append(index)
+            state['counts'] = totals
+            _save_state(run_dir, state)
+
+        processed += 1
+        elapsed = time.perf_counter() - start
+        remaining = len(chunks) - len(done) - processed
+        users_done = min((index + 1) * size, len(ids))
+        print(f"  [{index + 1}/{len(chunks)}] {users_done}/{len(ids)} users | "
+              f"{sum(counts.values())} rows in {time.perf_counter() - chunk_start:.2f}s | "
+              f"ETA {elapsed / processed * remaining:.0f}s")
+
+        if pause:
+            time.sleep(pause)  # let production queries through between chunks
+
+    if dry_run:
+        print("\n⚠️  DRY RUN - All changes rolled back")
+    elif not backup_only:
+        print("\n✅ All chunks committed successfully!")
+    return totals
 
 
 # ============================================
@@ -504,19 +307,12 @@ def verify_deletion(user_ids, emails, usernames):
     else:
         print(f"  ✓ accounts: 0 remaining")
     
-    # Check trades (need to get account IDs differently since accounts are deleted)
-    # We use direct SQL for this
-    try:
-        result = db.session.execute(
-            text("SELECT COUNT(*) FROM trades WHERE user_id IN :user_ids"),
-            {"user_ids": tuple(user_ids) if len(user_ids) > 1 else (user_ids[0],)}
-        ).scalar()
-        if result > 0:
-            issues.append(f"❌ {result} trades still exist")
-        else:
-            print(f"  ✓ trades: 0 remaining")
-    except:
-        print("  ⚠ trades: could not verify")
+    # Check trades (accounts are gone, so look them up by user_id)
+    result = Trade.query.filter(Trade.user_id.in_(user_ids)).count()
+    if result > 0:
+        issues.append(f"❌ {result} trades still exist")
+    else:
+        print(f"  ✓ trades: 0 remaining")
     
     # Check leaderboard
     remaining_lb = Leaderboard.query.filter(Leaderboard.user_id.in_(user_ids)).count()
@@ -547,7 +343,7 @@ def verify_deletion(user_ids, emails, usernames):
 # MAIN FUNCTION
 # ============================================
 
-def main(dry_run=False, backup_only=False):
+def main(dry_run=False, backup_only=False, chunk_size=DEFAULT_CHUNK_SIZE, pause=0.0, resume=None):
     """Main execution function."""
     
     print("\n" + "="*70)
@@ -556,58 +352,62 @@ def main(dry_run=False, backup_only=False):
     print(f"Started at: {datetime.now().isoformat()}")
     
     with app.app_context():
-        # Step 1: Find user IDs from emails/usernames
-        print("\n" + "-"*40)
-        print("STEP 1: IDENTIFYING USERS TO DELETE")
-        print("-"*40)
-        
-        users_to_delete = User.query.filter(
-            db.or_(
-                User.email.in_(EMAILS_TO_DELETE),
-                User.username.in_(USERNAMES_TO_DELETE)
-            )
-        ).all()
-        
-        if not users_to_delete:
-            print("⚠️  No matching users found in database!")
-            print(f"   Searched emails: {EMAILS_TO_DELETE[:5]}...")
-            print(f"   Searched usernames: {USERNAMES_TO_DELETE[:5]}...")
-            return 1
-        
-        user_ids = [u.id for u in users_to_delete]
-        
-        print(f"\n📋 Found {len(users_to_delete)} users to delete:")
-        for u in users_to_delete[:10]:
-            role_warning = " ⚠️ ADMIN!" if u.role in [UserRole.ADMIN, UserRole.SUPERADMIN] else ""
-            print(f"   [{u.id}] {u.full_name} ({u.email}){role_warning}")
-        if len(users_to_delete) > 10:
-            print(f"   ... and {len(users_to_delete) - 10} more")
-        
-        # Check for admin users
-        admin_users = [u for u in users_to_delete if u.role in [UserRole.ADMIN, UserRole.SUPERADMIN]]
-        if admin_users:
-            print(f"\n⚠️  WARNING: {len(admin_users)} ADMIN/SUPERADMIN users will be deleted!")
-            print("   Consider removing them from the deletion list if unintended.")
-        
-        # Step 2: Backup
+        if resume:
+            state = _load_state(resume)
+            if state is None:
+                print(f"❌ No {STATE_FILE} in {resume}")
+                return 1
+            run_dir = resume
+            user_ids = state['user_ids']
+        else:
+            # Step 1: Find user IDs from emails/usernames
+            print("\n" + "-"*40)
+            print("STEP 1: IDENTIFYING USERS TO DELETE")
+            print("-"*40)
+            
+            users_to_delete = User.query.filter(
+                db.or_(
+                    User.email.in_(EMAILS_TO_DELETE),
+                    User.username.in_(USERNAMES_TO_DELETE)
+                )
+            ).all()
+            
+            if not users_to_delete:
+                print("⚠️  No matching users found in database!")
+                print(f"   Searched emails: {EMAILS_TO_DELETE[:5]}...")
+                print(f"   Searched usernames: {USERNAMES_TO_DELETE[:5]}...")
+                return 1
+            
+            user_ids = [u.id for u in users_to_delete]
+            
+            print(f"\n📋 Found {len(users_to_delete)} users to delete:")
+            for u in users_to_delete[:10]:
+                role_warning = " ⚠️ ADMIN!" if u.role in [UserRole.ADMIN, UserRole.SUPERADMIN] else ""
+                print(f"   [{u.id}] {u.full_name} ({u.email}){role_warning}")
+            if len(users_to_delete) > 10:
+                print(f"   ... and {len(users_to_delete) - 10} more")
+            
+            # Check for admin users
+            admin_users = [u for u in users_to_delete if u.role in [UserRole.ADMIN, UserRole.SUPERADMIN]]
+            if admin_users:
+                print(f"\n⚠️  WARNING: {len(admin_users)} ADMIN/SUPERADMIN users will be deleted!")
+                print("   Consider removing them from the deletion list if unintended.")
+            
+            run_dir = os.path.join("backups", f"purge_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        
+        # Step 2: Backup + delete, chunk by chunk
         print("\n" + "-"*40)
-        print("STEP 2: CREATING BACKUP")
+        print("STEP 2: BACKING UP AND DELETING DATA")
         print("-"*40)
         
-        backup_file, account_ids = backup_user_data(user_ids)
+        deletion_counts = delete_users_chunked(user_ids, run_dir, chunk_size=chunk_size, dry_run=dry_run,
+                                               backup_only=backup_only, pause=pause)
         
         if backup_only:
-            print("\n✅ Backup complete. Exiting (--backup-only mode)")
+            print(f"\n✅ Backup complete in {run_dir}. Exiting (--backup-only mode)")
             return 0
         
-        # Step 3: Delete
-        print("\n" + "-"*40)
-        print("STEP 3: DELETING DATA")
-        print("-"*40)
-        
-        deletion_counts = delete_users_cascade(user_ids, dry_run=dry_run)
-        
-        # Step 4: Verify
+        # Step 3: Verify
         if not dry_run:
             verify_deletion(user_ids, EMAILS_TO_DELETE, USERNAMES_TO_DELETE)
         
@@ -620,7 +420,8 @@ def main(dry_run=False, backup_only=False):
         
         total = sum(deletion_counts.values())
         print(f"\n   TOTAL: {total} rows deleted across {len(deletion_counts)} tables")
-        print(f"   Backup file: {backup_file}")
+        if not dry_run:
+            print(f"   Backup directory: {run_dir}")
         
         if dry_run:
             print("\n⚠️  THIS WAS A DRY RUN - No actual changes were made")
@@ -641,7 +442,14 @@ if __name__ == '__main__':
                        help='Show what would be deleted without making changes')
     parser.add_argument('--backup-only', action='store_true',
                        help='Only create backup, do not delete')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help='Users deleted per transaction')
+    parser.add_argument('--pause', type=float, default=0.0,
+                       help='Seconds to sleep between chunks')
+    parser.add_argument('--resume', metavar='RUN_DIR',
+                       help='Resume an interrupted purge from its backup directory')
     
     args = parser.parse_args()
     
-    exit(main(dry_run=args.dry_run, backup_only=args.backup_only))
+    exit(main(dry_run=args.dry_run, backup_only=args.backup_only, chunk_size=args.chunk_size,
+              pause=args.pause, resume=args.resume))
@@ -0,0 +1,263 @@
+"""
+TRADESENSE AI - EQUITY CURVES
+=============================
+Real equity curves for the leaderboard and trader profiles.
+
+1. Snapshot writer: records one PerformanceSnapshot per account at a
+   configurable cadence, using a single bulk INSERT per run.
+2. Downsampler: turns the snapshot series into a fixed-size sparkline with
+   Largest-Triangle-Three-Buckets (LTTB), cached per account per period.
+   get_sparklines() loads a whole leaderboard page in one query.
+
+Usage (cron or long-running worker):
+    python equity_curves.py               # one snapshot run
+    python equity_curves.py --loop        # run forever at the configured cadence
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, insert
+
+from models import db, Account, Trade, PerformanceSnapshot, ChallengeStatus, TradeStatus
+
+# Defaults (overridable through app.config, see config.py)
+DEFAULT_SNAPSHOT_INTERVAL_MINUTES = 60
+DEFAULT_SPARKLINE_POINTS = 30
+DEFAULT_SPARKLINE_CACHE_TTL = 300  # seconds
+
+# Accounts whose equity can still move
+TRACKED_STATUSES = [ChallengeStatus.ACTIVE, ChallengeStatus.PASSED, ChallengeStatus.FUNDED]
+
+# Leaderboard period -> look-back window (None = full history)
+PERIOD_WINDOWS = {
+    'ALL_TIME': None,
+    'THIS_MONTH': timedelta(days=30),
+    'MONTHLY': timedelta(days=30),
+    'WEEKLY': timedelta(days=7),
+}
+
+_sparkline_cache = {}
+_sparkline_lock = threading.Lock()
+
+
+def _setting(key, default):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+# --- SNAPSHOT WRITER ---
+
+def record_equity_snapshots(now=None, interval_minutes=None):
+    """
+    Bulk-insert one equity snapshot per tracked account.
+
+    Accounts snapshotted less than `interval_minutes` ago are skipped, so the
+    job can safely run more often than the cadence. Returns the number of rows
+    written.
+    """
+    now = now or datetime.utcnow()
+    if interval_minutes is None:
+        interval_minutes = _setting('EQUITY_SNAPSHOT_INTERVAL_MINUTES', DEFAULT_SNAPSHOT_INTERVAL_MINUTES)
+    cutoff = now - timedelta(minutes=interval_minutes)
+
+    accounts = db.session.query(
+        Account.id, Account.initial_balance, Account.equity
+    ).filter(Account.status.in_(TRACKED_STATUSES)).all()
+    if not accounts:
+        return 0
+
+    # Last snapshot per account (one grouped query)
+    last_taken = dict(db.session.query(
+        PerformanceSnapshot.account_id, func.max(PerformanceSnapshot.created_at)
+    ).group_by(PerformanceSnapshot.account_id).all())
+
+    # Closed-trade stats per account (one grouped query)
+    stats = {
+        row.account_id: row for row in db.session.query(
+            Trade.account_id,
+            func.count(Trade.id).label('trades_count'),
+            func.sum(db.case((Trade.pnl > 0, 1), else_=0)).label('wins'),
+        ).filter(Trade.status == TradeStatus.CLOSED)
+         .group_by(Trade.account_id).all()
+    }
+
+    rows = []
+    for acc in accounts:
+        taken = last_taken.get(acc.id)
+        if taken and taken > cutoff:
+            continue
+
+        initial = acc.initial_balance or 0
+        equity = acc.equity or 0
+        profit = equity - initial
+        s = stats.get(acc.id)
+        trades_count = s.trades_count if s else 0
+        wins = (s.wins or 0) if s else 0
+
+        rows.append({
+            'account_id': acc.id,
+            'period': 'ALL_TIME',
+            'date': now.date(),
+            'profit': round(profit, 2),
+            'roi': round(profit / initial * 100, 2) if initial > 0 else 0.0,
+            'win_rate': round(wins / trades_count * 100, 2) if trades_count else 0.0,
+            'trades_count': trades_count,
+            'equity': round(equity, 2),
+            'created_at': now,
+        })
+
+    if rows:
+        db.session.execute(insert(PerformanceSnapshot), rows)
+        db.session.commit()
+    return len(rows)
+
+
+# --- DOWNSAMPLING ---
+
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    `points` is a list of (x, y) tuples sorted by x. Returns at most
+    `threshold` points, always keeping the first and last one.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # index of the previously selected point
+
+    for i in range(threshold - 2):
+        # Average of the next bucket (the third triangle vertex)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(p[0] for p in points[next_start:next_end]) / span
+        avg_y = sum(p[1] for p in points[next_start:next_end]) / span
+
+        # Pick the point of the current bucket forming the largest triangle
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def _window_start(period):
+    window = PERIOD_WINDOWS.get(period)
+    return datetime.utcnow() - window if window else None
+
+
+def _load_series(account_ids, period):
+    """{account id: [(timestamp, equity), ...]} for all the accounts in one query."""
+    query = db.session.query(
+        PerformanceSnapshot.account_id, PerformanceSnapshot.created_at, PerformanceSnapshot.equity
+    ).filter(PerformanceSnapshot.account_id.in_(account_ids))
+
+    start = _window_start(period)
+    if start:
+        query = query.filter(PerformanceSnapshot.created_at >= start)
+
+    series = {account_id: [] for account_id in account_ids}
+    rows = query.order_by(PerformanceSnapshot.account_id, PerformanceSnapshot.created_at.asc()).all()
+    for account_id, created_at, equity in rows:
+        if created_at is not None and equity is not None:
+            series[account_id].append((created_at.timestamp(), equity))
+    return series
+
+
+def _evict_expired(now):
+    for key in [k for k, (expires, _) in _sparkline_cache.items() if expires <= now]:
+        del _sparkline_cache[key]
+
+
+def get_sparklines(account_ids, period='ALL_TIME', points=None):
+    """
+    Fixed-size equity sparklines for several accounts, built from real snapshots.
+    Cache misses are loaded together in one query. Results are cached per
+    (account, period) for SPARKLINE_CACHE_TTL seconds; unknown periods count
+    as ALL_TIME, so callers cannot grow the cache with arbitrary keys.
+    """
+    period = period if period in PERIOD_WINDOWS else 'ALL_TIME'
+    points = points or _setting('SPARKLINE_POINTS', DEFAULT_SPARKLINE_POINTS)
+    ttl = _setting('SPARKLINE_CACHE_TTL', DEFAULT_SPARKLINE_CACHE_TTL)
+    now = time.monotonic()
+
+    curves, missing = {}, []
+    with _sparkline_lock:
+        for account_id in dict.fromkeys(a for a in account_ids if a):
+            cached = _sparkline_cache.get((account_id, period, points))
+            if cached and cached[0] > now:
+                curves[account_id] = cached[1]
+            else:
+                missing.append(account_id)
+    if not missing:
+        return curves
+
+    for account_id, series in _load_series(missing, period).items():
+        curves[account_id] = [round(y, 2) for _, y in lttb(series, points)]
+
+    with _sparkline_lock:
+        _evict_expired(now)
+        for account_id in missing:
+            _sparkline_cache[(account_id, period, points)] = (now + ttl, curves[account_id])
+    return curves
+
+
+def get_sparkline(account_id, period='ALL_TIME', points=None):
+    """Sparkline of one account (see get_sparklines)."""
+    if not account_id:
+        return []
+    return get_sparklines([account_id], period, points)[account_id]
+
+
+def clear_sparkline_cache(account_id=None):
+    """Drop cached sparklines (all, or only for one account)."""
+    with _sparkline_lock:
+        if account_id is None:
+            _sparkline_cache.clear()
+        else:
+            for key in [k for k in _sparkline_cache if k[0] == account_id]:
+                del _sparkline_cache[key]
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description='Record equity snapshots for all tracked accounts')
+    parser.add_argument('--loop', action='store_true', help='Keep running at the configured cadence')
+    parser.add_argument('--interval', type=int, default=None, help='Cadence in minutes (overrides config)')
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        interval = args.interval or app.config.get('EQUITY_SNAPSHOT_INTERVAL_MINUTES', DEFAULT_SNAPSHOT_INTERVAL_MINUTES)
+        while True:
+            written = record_equity_snapshots(interval_minutes=interval)
+            print(f"📈 Recorded {written} equity snapshots at {datetime.utcnow().isoformat()}")
+            if not args.loop:
+                break
+            db.session.remove()
+            time.sleep(interval * 60)
@@ -1,54 +1,111 @@
-import sqlite3
+"""
+Streaming backup export.
+
+Each table is read through a server-side cursor (stream_results) and written
+as NDJSON part files of `chunk_size` rows, optionally gzip-compressed:
+
+    backups/export/
+      manifest.json
+      users.00000.ndjson.gz
+      accounts.00000.ndjson.gz
+      trades.00000.ndjson.gz
+      trades.00001.ndjson.gz
+      ...
+
+Only one chunk is held in memory at a time, whatever the table size.
+Restore with import_data.py.
+
+Usage:
+    python export_data.py                                  # instance/tradesense.db
+    python export_data.py --db-url mysql+pymysql://u:p@host/tradesense --gzip
+"""
+import argparse
+import gzip
 import json
 import os
+from datetime import date, datetime
 
-def export_raw_sqlite():
-    db_path = "instance/tradesense.db"
-    if not os.path.exists(db_path):
-        print(f"❌ DB not found at {db_path}")
-        return
+from sqlalchemy import create_engine, text
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+DEFAULT_TABLES = ['users', 'accounts', 'trades']
+DEFAULT_CHUNK_SIZE = 5000
 
-    data = {
-        'users': [],
-        'accounts': [],
-        'trades': []
-    }
 
-    print("🔄 Exporting raw data from SQLite via sqlite3...")
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _open_part(out_dir, table, index, compress):
+    name = f"{table}.{index:05d}.ndjson" + ('.gz' if compress else '')
+    path = os.path.join(out_dir, name)
+    handle = gzip.open(path, 'wt', encoding='utf-8') if compress else open(path, 'w', encoding='utf-8')
+    return name, handle
+
+
+def export_table(conn, table, out_dir, chunk_size, compress):
+    """Stream one table into part files. Returns (row count, part file names)."""
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+        text(f"SELECT * FROM {table} ORDER BY id")
+    )
+    columns = list(result.keys())
+    parts, total = [], 0
+
+    for index, chunk in enumerate(result.partitions(chunk_size)):
+        name, handle = _open_part(out_dir, table, index, compress)
+        with handle:
+            for row in chunk:
+                d = dict(zip(columns, row))
+                # Add missing fields that the new models expect
+                if table == 'users' and not d.get('username'):
+                    d['username'] = d['email'].split('@')[0]
+                handle.write(json.dumps(d, default=_json_default, ensure_ascii=False))
+                handle.write('\n')
+        parts.append({'file': name, 'rows': len(chunk)})
+        total += len(chunk)
 
+    return total, parts
+
+
+def export_backup(db_url, out_dir, tables=None, chunk_size=DEFAULT_CHUNK_SIZE, compress=False):
+    tables = tables or DEFAULT_TABLES
+    os.makedirs(out_dir, exist_ok=True)
+    engine = create_engine(db_url)
+
+    manifest = {
+        'created_at': datetime.utcnow().isoformat(),
+        'chunk_size': chunk_size,
+        'compressed': compress,
+        'tables': [],
+    }
+
+    print(f"🔄 Streaming export to {out_dir}/ ...")
     try:
-        # Users
-        cursor.execute("SELECT * FROM users")
-        for row in cursor.fetchall():
-            d = dict(row)
-            # Add missing fields that the new models expect
-            if 'username' not in d:
-                d['username'] = d['email'].split('@')[0]
-            data['users'].append(d)
-
-        # Accounts
-        cursor.execute("SELECT * FROM accounts")
-        for row in cursor.fetchall():
-            data['accounts'].append(dict(row))
-
-        # Trades
-        cursor.execute("SELECT * FROM trades")
-        for row in cursor.fetchall():
-            data['trades'].append(dict(row))
-
-        with open('backup_data.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        print(f"✅ Exported {len(data['users'])} users, {len(data['accounts'])} accounts, {len(data['trades'])} trades")
-        
-    except Exception as e:
-        print(f"❌ Export failed: {e}")
+        with engine.connect() as conn:
+            for table in tables:
+                total, parts = export_table(conn, table, out_dir, chunk_size, compress)
+                manifest['tables'].append({'name': table, 'rows': total, 'parts': parts})
+                print(f"   - {table}: {total} rows in {len(parts)} part(s)")
     finally:
-        conn.close()
+        engine.dispose()
+
+    # Written last: a backup without a manifest is incomplete
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print("✅ Export complete")
+    return manifest
+
 
 if __name__ == "__main__":
-    export_raw_sqlite()
+    basedir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Streaming NDJSON backup export')
+    parser.add_argument('--db-url', default='sqlite:///' + os.path.join(basedir, 'instance', 'tradesense.db'))
+    parser.add_argument('--out', default=os.path.join(basedir, 'backups', 'export'), help='Output directory')
+    parser.add_argument('--tables', nargs='+', default=DEFAULT_TABLES)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--gzip', action='store_true', help='Compress part files')
+    args = parser.parse_args()
+
+    export_backup(args.db_url, args.out, args.tables, args.chunk_size, args.gzip)
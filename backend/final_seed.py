@@ -16,6 +16,7 @@ from models import (
     Post, Comment, PostLike, FloorMessage, 
     UserBadge, UserXP, UserCourseProgress, UserLessonProgress, RiskAlert, UserRole
 )
+from post_counters import posts_touched_by, recount
 
 def safe_cleanup_and_seed():
     print("Starting SAFE Leaderboard RESET & SEED...")
@@ -45,9 +46,11 @@ def safe_cleanup_and_seed():
                 FloorMessage.query.filter_by(user_id=u.id).delete()
                 
                 # Community
+                touched = posts_touched_by([u.id])
                 PostLike.query.filter_by(user_id=u.id).delete()
                 Comment.query.filter_by(user_id=u.id).delete()
                 Post.query.filter_by(user_id=u.id).delete()
+                recount(touched)  # Counters of the other users' posts they liked/commented
                 
                 # Financials (The complex part)
                 # 1. Get Accounts
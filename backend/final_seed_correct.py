@@ -17,6 +17,7 @@ from models import (
     UserBadge, UserXP, UserCourseProgress, UserLessonProgress, RiskAlert, 
     UserRole, ChallengeStatus, TradeStatus, TradeType
 )
+from post_counters import posts_touched_by, recount
 
 def safe_cleanup_and_seed():
     print("Starting SAFE Leaderboard RESET & SEED (Corrected)...")
@@ -42,9 +43,11 @@ def safe_cleanup_and_seed():
                 UserXP.query.filter_by(user_id=u.id).delete()
                 UserBadge.query.filter_by(user_id=u.id).delete()
                 FloorMessage.query.filter_by(user_id=u.id).delete()
+                touched = posts_touched_by([u.id])
                 PostLike.query.filter_by(user_id=u.id).delete()
                 Comment.query.filter_by(user_id=u.id).delete()
                 Post.query.filter_by(user_id=u.id).delete()
+                recount(touched)  # Counters of the other users' posts they liked/commented
                 
                 # Financials
                 accounts = Account.query.filter_by(user_id=u.id).all()
@@ -0,0 +1,230 @@
+"""
+TRADESENSE AI - ACADEMY FIXTURE LOADER
+======================================
+Declarative seeding for the academy: a course -> module -> lesson -> quiz ->
+question -> option tree (see fixtures/*.json) is inserted in dependency
+order with one bulk INSERT per table and a single transaction per tree.
+
+Primary keys are allocated in memory from the current MAX(id) of each table,
+so children can reference their parents without a flush per row. Run it
+while nothing else is writing academy content.
+
+Fixture format:
+    {
+      "badges":  [{"name", "description", "icon_name", "category", "xp_bonus"}],
+      "courses": [{
+        "title", "description", "category", "level", ...Course columns,
+        "translations": {"en": {"title", "description"}},
+        "modules": [{
+          "title", "order_index", "translations": {...},
+          "quiz": {...},                      # module quiz
+          "lessons": [{"title", "order_index", "content", ..., "quiz": {...}}]
+        }],
+        "final_exam": {...}                   # course-level quiz
+      }]
+    }
+    quiz = {"title", "min_pass_score", "questions": [{"text", "explanation",
+            "options": [{"text", "is_correct"}]}]}
+
+Usage:
+    python fixture_loader.py fixtures/academy_core.json [more.json ...]
+"""
+
+import json
+import os
+import sys
+
+from sqlalchemy import func, insert
+
+from models import (
+    db, Badge, Course, Module, Lesson, Quiz, Question, Option,
+    CourseTranslation, ModuleTranslation, LessonTranslation, QuizTranslation,
+    QuestionTranslation, OptionTranslation,
+    CourseCategory, CourseLevel, LessonType
+)
+import course_catalog  # noqa: F401 - registers the listener that bumps the catalog version on bulk inserts
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Insert order: parents before children
+INSERT_ORDER = [
+    Course, Module, Lesson, Quiz, Question, Option,
+    CourseTranslation, ModuleTranslation, LessonTranslation,
+    QuizTranslation, QuestionTranslation, OptionTranslation,
+]
+
+COURSE_FIELDS = ['title', 'lang', 'description', 'thumbnail_url', 'cover', 'duration_minutes', 'xp_reward', 'is_premium']
+LESSON_FIELDS = ['title', 'slug', 'content_type', 'video_url', 'content', 'content_prompt']
+
+
+class _IdAllocator:
+    """Hands out primary keys above the current MAX(id) of each table."""
+
+    def __init__(self):
+        self._next = {}
+
+    def next(self, model):
+        if model not in self._next:
+            current = db.session.query(func.max(model.id)).scalar() or 0
+            self._next[model] = current + 1
+        value = self._next[model]
+        self._next[model] += 1
+        return value
+
+
+class _TreeBuilder:
+    """Flattens a fixture tree into per-table row lists with resolved ids."""
+
+    def __init__(self):
+        self.ids = _IdAllocator()
+        self.rows = {model: [] for model in INSERT_ORDER}
+
+    def _add(self, model, row):
+        row['id'] = self.ids.next(model)
+        self.rows[model].append(row)
+        return row['id']
+
+    def _translations(self, model, fk, owner_id, translations, fields):
+        for lang, values in (translations or {}).items():
+            row = {fk: owner_id, 'lang': lang}
+            row.update({f: values.get(f) for f in fields})
+            self._add(model, row)
+
+    def quiz(self, data, course_id=None, module_id=None, lesson_id=None):
+        quiz_id = self._add(Quiz, {
+            'course_id': course_id,
+            'module_id': module_id,
+            'lesson_id': lesson_id,
+            'title': data.get('title', 'Quiz'),
+            'min_pass_score': data.get('min_pass_score', 70),
+        })
+        self._translations(QuizTranslation, 'quiz_id', quiz_id, data.get('translations'), ['title'])
+
+        for q_index, q_data in enumerate(data.get('questions', []), 1):
+            question_id = self._add(Question, {
+                'quiz_id': quiz_id,
+                'text': q_data['text'],
+                'explanation': q_data.get('explanation'),
+                'order_index': q_data.get('order_index', q_index),
+            })
+            self._translations(QuestionTranslation, 'question_id', question_id,
+                               q_data.get('translations'), ['text', 'explanation'])
+
+            for o_data in q_data.get('options', []):
+                option_id = self._add(Option, {
+                    'question_id': question_id,
+                    'text': o_data['text'],
+                    'is_correct': bool(o_data.get('is_correct', False)),
+                })
+                self._translations(OptionTranslation, 'option_id', option_id,
+                                   o_data.get('translations'), ['text'])
+        return quiz_id
+
+    def course(self, data):
+        row = {f: data[f] for f in COURSE_FIELDS if f in data}
+        row['category'] = CourseCategory[data['category']]
+        row['level'] = CourseLevel[data['level']]
+        course_id = self._add(Course, row)
+        self._translations(CourseTranslation, 'course_id', course_id,
+                           data.get('translations'), ['title', 'description'])
+
+        for m_index, m_data in enumerate(data.get('modules', []), 1):
+            module_id = self._add(Module, {
+                'course_id': course_id,
+                'title': m_data['title'],
+                'order_index': m_data.get('order_index', m_index),
+            })
+            self._translations(ModuleTranslation, 'module_id', module_id,
+                               m_data.get('translations'), ['title'])
+
+            for l_index, l_data in enumerate(m_data.get('lessons', []), 1):
+                lesson = {f: l_data[f] for f in LESSON_FIELDS if f in l_data}
+                lesson.update({
+                    'module_id': module_id,
+                    'lesson_type': LessonType[l_data.get('lesson_type', 'TEXT')],
+                    'order_index': l_data.get('order_index', l_index),
+                })
+                lesson_id = self._add(Lesson, lesson)
+                self._translations(LessonTranslation, 'lesson_id', lesson_id,
+                                   l_data.get('translations'), ['title', 'content'])
+                if l_data.get('quiz'):
+                    self.quiz(l_data['quiz'], lesson_id=lesson_id)
+
+            if m_data.get('quiz'):
+                self.quiz(m_data['quiz'], course_id=course_id, module_id=module_id)
+
+        if data.get('final_exam'):
+            self.quiz(data['final_exam'], course_id=course_id)
+        return course_id
+
+
+def load_course_tree(tree, skip_existing=True):
+    """
+    Insert a fixture tree in one transaction.
+
+    Courses whose title already exists are skipped when `skip_existing` is
+    set, as are badges with an existing name. Returns {table name: rows}.
+    """
+    builder = _TreeBuilder()
+    counts = {}
+
+    try:
+        courses = tree.get('courses', [])
+        if skip_existing and courses:
+            titles = [c['title'] for c in courses]
+            existing = {t for (t,) in db.session.query(Course.title).filter(Course.title.in_(titles)).all()}
+            courses = [c for c in courses if c['title'] not in existing]
+
+        for course in courses:
+            builder.course(course)
+
+        badges = tree.get('badges', [])
+        if badges:
+            names = [b['name'] for b in badges]
+            existing = {n for (n,) in db.session.query(Badge.name).filter(Badge.name.in_(names)).all()}
+            badge_rows = [dict(b) for b in badges if b['name'] not in existing]
+            if badge_rows:
+                db.session.execute(insert(Badge), badge_rows)
+                counts[Badge.__tablename__] = len(badge_rows)
+
+        for model in INSERT_ORDER:
+            rows = builder.rows[model]
+            if rows:
+                db.session.execute(insert(model), rows)
+                counts[model.__tablename__] = len(rows)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return counts
+
+
+def load_fixture_file(path, skip_existing=True):
+    """Load a JSON fixture (absolute, or relative to fixtures/)."""
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(FIXTURES_DIR, path)
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = json.load(f)
+    return load_course_tree(tree, skip_existing=skip_existing)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description='Load academy fixture trees')
+    parser.add_argument('files', nargs='+', help='Fixture JSON files')
+    parser.add_argument('--force', action='store_true', help='Insert courses even if the title exists')
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        for path in args.files:
+            start = time.perf_counter()
+            counts = load_fixture_file(path, skip_existing=not args.force)
+            summary = ', '.join(f"{n} {table}" for table, n in counts.items()) or 'nothing new'
+            print(f"✅ {path}: {summary} ({(time.perf_counter() - start) * 1000:.0f} ms)")
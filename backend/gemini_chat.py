@@ -1,9 +1,4 @@
 from flask import Blueprint, request, jsonify
-try:
-    import google.generativeai as genai
-    HAS_GENAI = True
-except ImportError:
-    HAS_GENAI = False
 import os
 
 gemini_chat_bp = Blueprint('gemini_chat', __name__)
@@ -42,7 +37,10 @@ def gemini_chat():
     # --------------------------------------
 
     try:
-        if not HAS_GENAI:
+        # Imported on first use: the SDK is heavy and most workers never chat
+        try:
+            import google.generativeai as genai
+        except ImportError:
             raise ImportError("Google Generative AI library not installed.")
             
         genai.configure(api_key=api_key)
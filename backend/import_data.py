@@ -1,150 +1,238 @@
+"""
+Streaming backup import (counterpart of export_data.py).
+
+Reads the manifest and loads each NDJSON part with one bulk INSERT and one
+commit per part, so memory stays at one chunk whatever the table size.
+Progress is written to import_checkpoint.json in the backup directory after
+every part; re-running the script resumes after the last completed part.
+
+Primary keys from the backup are kept when they are free. Rows whose id
+already exists are skipped when the existing row is the same entity (same
+natural key, see NATURAL_KEYS), e.g. on a re-run; when the id belongs to
+another row (a freshly bootstrapped database has its own seeded users and
+accounts) the backup row gets a new id. Users whose email already exists
+are mapped onto that user. Children follow both through the old -> new id
+maps, which are saved in the checkpoint.
+
+Usage:
+    python import_data.py [backup_dir]
+    python import_data.py backups/export --restart     # ignore the checkpoint
+"""
+import argparse
+import gzip
 import json
 import os
 import sys
-from datetime import datetime
+from datetime import date, datetime
 from dotenv import load_dotenv
 
+from sqlalchemy import Boolean, Date, DateTime, Enum, insert
+
 # Add current dir to path
 sys.path.append(os.getcwd())
 
 load_dotenv()
 
-from __init__ import create_app
-from models import db, User, Account, Trade, UserRole, ChallengeStatus, TradeType, TradeStatus, Challenge
-
-def import_data():
-    print("🔄 Importing data into MySQL...")
-    
-    if not os.path.exists('backup_data.json'):
-        print("❌ Backup file backup_data.json not found!")
+from models import db, User, Account, Trade, TradeType, TradeStatus
+
+# Load order: parents before children
+MODELS = {'users': User, 'accounts': Account, 'trades': Trade}
+CHECKPOINT_FILE = 'import_checkpoint.json'
+
+# Columns that must match for an existing id to be the same entity as the backup row
+NATURAL_KEYS = {
+    'users': ('email',),
+    'accounts': ('user_id', 'plan_name', 'created_at'),
+    'trades': ('user_id', 'account_id', 'symbol', 'created_at'),
+}
+
+
+def _read_part(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _load_checkpoint(backup_dir):
+    path = os.path.join(backup_dir, CHECKPOINT_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_checkpoint(backup_dir, checkpoint):
+    path = os.path.join(backup_dir, CHECKPOINT_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)  # atomic: a crash never leaves a half-written checkpoint
+
+
+def _coerce(column, value):
+    """Convert a JSON value to what the column type expects."""
+    if value is None:
+        return None
+    col_type = column.type
+    if isinstance(col_type, Enum) and col_type.enum_class is not None:
+        members = col_type.enum_class.__members__
+        return members[value] if value in members else column.default.arg if column.default else None
+    if isinstance(col_type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(col_type, Date) and isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(col_type, Boolean):
+        return bool(value)
+    return value
+
+
+def _legacy_trade_fields(d):
+    """Map legacy trade fields to the current schema."""
+    d.setdefault('side', d.get('trade_type') or 'BUY')
+    if d.get('quantity') is None:
+        d['quantity'] = d.get('amount') or 0.0
+    if d.get('price') is None:
+        d['price'] = d.get('entry_price') or 0.0
+    if not d.get('timestamp'):
+        d['timestamp'] = d.get('created_at') or datetime.utcnow().isoformat()
+    return d
+
+
+def _foreign_tables(model):
+    """{column name: referenced table} for the model's foreign keys."""
+    return {c.name: fk.column.table.name for c in model.__table__.columns for fk in c.foreign_keys}
+
+
+def _same_entity(table, model, live_key, row):
+    """Compare an existing row's natural key with a backup row (datetimes to the second, MySQL rounds them)."""
+    columns = model.__table__.columns
+    for name, live in zip(NATURAL_KEYS[table], live_key):
+        value = _coerce(columns[name], row.get(name))
+        if isinstance(live, datetime) and isinstance(value, datetime):
+            if abs((live - value).total_seconds()) >= 1:
+                return False
+        elif live != value:
+            return False
+    return True
+
+
+def _prepare_rows(table, model, raw_rows, remap):
+    """
+    Coerce a chunk, drop rows that are already present and give colliding
+    rows new ids. `remap` ({table: {backup id: database id}}) is filled in
+    for the children of remapped rows and applied to their foreign keys.
+    """
+    columns = {c.name: c for c in model.__table__.columns}
+    foreign = _foreign_tables(model)
+    table_remap = remap.setdefault(table, {})
+
+    raw_rows = [_legacy_trade_fields(r) if table == 'trades' else r for r in raw_rows]
+    for r in raw_rows:
+        for name, parent in foreign.items():
+            if r.get(name) in remap.get(parent, {}):
+                r[name] = remap[parent][r[name]]
+
+    if table == 'users':
+        # Same email under another id: the same person, use the existing row
+        emails = [r['email'] for r in raw_rows]
+        by_email = dict(db.session.query(User.email, User.id).filter(User.email.in_(emails)).all()) if emails else {}
+        pending = []
+        for r in raw_rows:
+            if r['email'] in by_email:
+                if by_email[r['email']] != r['id']:
+                    table_remap[r['id']] = by_email[r['email']]
+            else:
+                pending.append(r)
+        raw_rows = pending
+
+    # Rows given a new id by an earlier run are checked under that id
+    targets = [(r.get('id'), table_remap.get(r.get('id'), r.get('id')), r) for r in raw_rows]
+    ids = [target for _, target, _ in targets if target is not None]
+    live = {}
+    if ids:
+        key_columns = [getattr(model, k) for k in NATURAL_KEYS.get(table, ())]
+        for row in db.session.query(model.id, *key_columns).filter(model.id.in_(ids)).all():
+            live[row[0]] = tuple(row[1:])
+
+    next_id = None
+    rows = []
+    for backup_id, target, r in targets:
+        if target in live:
+            if NATURAL_KEYS.get(table) and _same_entity(table, model, live[target], r):
+                continue  # Already imported (re-run)
+            # The id belongs to another row: insert under a new id, children follow through remap
+            if next_id is None:
+                current_max = db.session.query(db.func.max(model.id)).scalar() or 0
+                next_id = max([current_max] + ids) + 1
+            target, next_id = next_id, next_id + 1
+            table_remap[backup_id] = target
+        if target is not None:
+            r = dict(r, id=target)
+        rows.append({name: _coerce(col, r[name]) for name, col in columns.items() if name in r})
+    return rows
+
+
+def import_backup(backup_dir, restart=False):
+    print(f"🔄 Importing backup from {backup_dir} ...")
+
+    manifest_path = os.path.join(backup_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        print("❌ manifest.json not found! Run export_data.py first.")
         return
 
-    with open('backup_data.json', 'r') as f:
-        data = json.load(f)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
 
-    app = create_app()
-    
-    with app.app_context():
-        try:
-            # Create tables first
-            db.create_all()
-            print("✅ Database tables ensured.")
-
-            # Clear existing data if any (optional, be careful)
-            # db.drop_all()
-            # db.create_all()
-
-            # Map old IDs to new objects if necessary
-            user_map = {}
-            
-            # Import Users
-            print(f"👤 Importing {len(data['users'])} users...")
-            for u_data in data['users']:
-                # Check if user already exists
-                existing_user = User.query.filter_by(email=u_data['email']).first()
-                if existing_user:
-                    print(f"   - User {u_data['email']} already exists, skipping.")
-                    user_map[u_data['id']] = existing_user
-                    continue
+    checkpoint = {} if restart else _load_checkpoint(backup_dir)
+    saved = checkpoint.get('remap') or {'users': checkpoint.get('user_remap', {})}
+    remap = {table: {int(k): v for k, v in ids.items()} for table, ids in saved.items()}
 
-                user = User(
-                    full_name=u_data['full_name'],
-                    username=u_data['username'],
-                    email=u_data['email'],
-                    password_hash=u_data['password_hash'],
-                    role=UserRole[u_data['role']] if u_data['role'] in UserRole.__members__ else UserRole.USER,
-                    created_at=datetime.fromisoformat(u_data['created_at']) if u_data.get('created_at') else datetime.utcnow()
-                )
-                db.session.add(user)
-                db.session.commit()
-                user_map[u_data['id']] = user
-
-            # Import Accounts
-            print(f"💳 Importing {len(data['accounts'])} accounts...")
-            account_map = {}
-            for a_data in data['accounts']:
-                user = user_map.get(a_data['user_id'])
-                if not user:
-                    print(f"   - Skipping account {a_data['id']} (no user found).")
-                    continue
+    from __init__ import create_app
+    app = create_app()
 
-                account = Account(
-                    user_id=user.id,
-                    plan_name=a_data.get('plan_name', 'Starter'),
-                    initial_balance=a_data['initial_balance'],
-                    current_balance=a_data['current_balance'],
-                    equity=a_data['equity'],
-                    status=ChallengeStatus[a_data['status']] if a_data['status'] in ChallengeStatus.__members__ else ChallengeStatus.ACTIVE,
-                    created_at=datetime.fromisoformat(a_data['created_at']) if a_data.get('created_at') else datetime.utcnow()
-                )
-                db.session.add(account)
-                db.session.commit()
-                account_map[a_data['id']] = account
-
-            # Import Trades
-            print(f"📈 Importing {len(data['trades'])} trades...")
-            for t_data in data['trades']:
-                # Handle missing user_id in legacy data
-                user_id_val = t_data.get('user_id')
-                user = user_map.get(user_id_val) if user_id_val else None
-                
-                account = account_map.get(t_data['account_id'])
-                
-                if not user:
-                    # Try to get user from account if trade user_id is missing
-                    if account:
-                        user = account.user
-                
-                if not user:
-                    print(f"   - Skipping trade {t_data['id']} (no user found).")
+    with app.app_context():
+        # Create tables first
+        db.create_all()
+        print("✅ Database tables ensured.")
+
+        tables = sorted(manifest['tables'], key=lambda t: list(MODELS).index(t['name']) if t['name'] in MODELS else len(MODELS))
+        for table_info in tables:
+            table = table_info['name']
+            model = MODELS.get(table)
+            if model is None:
+                print(f"   - Skipping {table} (no model mapping).")
+                continue
+
+            done = checkpoint.get('tables', {}).get(table, -1)
+            print(f"📦 {table}: {table_info['rows']} rows in {len(table_info['parts'])} part(s)")
+
+            for index, part in enumerate(table_info['parts']):
+                if index <= done:
                     continue
+                try:
+                    rows = _prepare_rows(table, model, _read_part(os.path.join(backup_dir, part['file'])), remap)
+                    if rows:
+                        db.session.execute(insert(model), rows)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Import failed in {part['file']}: {e}")
+                    print("   Fix the problem and re-run to resume from this part.")
+                    raise
+
+                checkpoint.setdefault('tables', {})[table] = index
+                checkpoint.pop('user_remap', None)
+                checkpoint['remap'] = remap
+                _save_checkpoint(backup_dir, checkpoint)
+                print(f"   - {part['file']}: {len(rows)} inserted, {len(remap.get(table, {}))} {table} id(s) remapped so far")
+
+        print("✅ Data migration complete!")
 
-                # Map legacy fields to new schema
-                side_val = t_data.get('side', t_data.get('trade_type', 'BUY'))
-                qty_val = t_data.get('quantity', t_data.get('amount', 0.0))
-                price_val = t_data.get('price', t_data.get('entry_price', 0.0))
-                
-                # Check enum validity
-                side_enum = TradeType.BUY
-                if side_val in TradeType.__members__:
-                    side_enum = TradeType[side_val]
-                elif side_val == 'SELL':
-                    side_enum = TradeType.SELL
-                
-                status_val = t_data.get('status', 'OPEN')
-                status_enum = TradeStatus.OPEN
-                if status_val in TradeStatus.__members__:
-                    status_enum = TradeStatus[status_val]
-
-                timestamp_val = None
-                if t_data.get('timestamp'):
-                    timestamp_val = datetime.fromisoformat(t_data.get('timestamp'))
-                elif t_data.get('created_at'):
-                    timestamp_val = datetime.fromisoformat(t_data.get('created_at'))
-                else:
-                    timestamp_val = datetime.utcnow()
-
-                trade = Trade(
-                    account_id=account.id if account else None,
-                    user_id=user.id,
-                    symbol=t_data['symbol'],
-                    side=side_enum,
-                    quantity=qty_val,
-                    price=price_val,
-                    status=status_enum,
-                    pnl=t_data.get('pnl', 0.0),
-                    timestamp=timestamp_val
-                )
-                db.session.add(trade)
-            
-            db.session.commit()
-            print("✅ Data migration complete!")
-            
-        except Exception as e:
-            db.session.rollback()
-            print(f"❌ Import failed: {e}")
-            import traceback
-            traceback.print_exc()
 
 if __name__ == "__main__":
-    import_data()
+    parser = argparse.ArgumentParser(description='Bulk-load an NDJSON backup with resume support')
+    parser.add_argument('backup_dir', nargs='?', default=os.path.join('backups', 'export'))
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+    args = parser.parse_args()
+
+    import_backup(args.backup_dir, restart=args.restart)
@@ -0,0 +1,282 @@
+"""
+Server-side lesson rendering.
+
+Lessons are stored as markdown or HTML (Lesson.content_type) and were sent
+raw to the client, which injects them with dangerouslySetInnerHTML. Here
+each lesson is rendered once to sanitized HTML per language and stored in
+lesson_renders, keyed by a hash of its content. It is re-rendered only when
+the content (or RENDERER_VERSION) changes: the first worker to see the new
+hash renders and stores it, the others read the stored row. Workers also
+keep recent renders in memory.
+
+The markdown dialect is the subset the academy content uses: headings,
+paragraphs, emphasis, inline/fenced code, lists, blockquotes, rules, links,
+images and inline HTML. The sanitizer keeps an allowlist of tags and
+attributes (class and inline styles included, for the styled lessons) and
+drops scripts, event handlers and javascript: URLs.
+"""
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from html.parser import HTMLParser
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, LessonRender
+
+RENDERER_VERSION = 2  # Bump to re-render every lesson
+MEMORY_CACHE_SIZE = 500
+
+_cache_lock = threading.Lock()
+_memory_cache = OrderedDict()  # (lesson_id, lang, hash) -> html
+
+
+def content_hash(content_type, content):
+    raw = f"{RENDERER_VERSION}\0{content_type or 'markdown'}\0{content or ''}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+# --- Sanitizer ---
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'em', 'i', 'u', 's',
+    'ul', 'ol', 'li', 'blockquote', 'code', 'pre', 'a', 'img', 'span', 'div', 'section',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td', 'figure', 'figcaption', 'sup', 'sub', 'mark',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+DROP_WITH_CONTENT = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template', 'svg', 'math', 'form'}
+GLOBAL_ATTRS = {'class', 'style', 'title'}
+TAG_ATTRS = {
+    'a': {'href', 'target'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan', 'align'},
+    'th': {'colspan', 'rowspan', 'align'},
+    'ol': {'start'},
+}
+SAFE_SCHEMES = {'http', 'https', 'mailto'}
+# Backslashes are CSS escapes (u\72l( is url(), so no pattern list can be complete without rejecting them
+UNSAFE_STYLE = re.compile(r'\\|url\s*\(|expression|javascript:|@import|behavior', re.IGNORECASE)
+
+
+def _safe_url(url, allow_mailto=True):
+    url = (url or '').strip()
+    scheme = re.match(r'^([a-zA-Z][a-zA-Z0-9+.-]*):', re.sub(r'[\x00-\x20]', '', url))
+    if scheme is None:
+        return True  # Relative URL or #anchor
+    scheme = scheme.group(1).lower()
+    return scheme in SAFE_SCHEMES and (allow_mailto or scheme != 'mailto')
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.skip_depth = 0
+
+    def _attrs(self, tag, attrs):
+        allowed = GLOBAL_ATTRS | TAG_ATTRS.get(tag, set())
+        kept = []
+        for name, value in attrs:
+            name = name.lower()
+            value = value or ''
+            if name not in allowed:
+                continue
+            if name in ('href', 'src') and not _safe_url(value, allow_mailto=(name == 'href')):
+                continue
+            if name == 'style' and UNSAFE_STYLE.search(value):
+                continue
+            kept.append((name, value))
+        if tag == 'a' and any(name == 'target' for name, _ in kept):
+            kept.append(('rel', 'noopener noreferrer'))
+        return ''.join(f' {name}="{html.escape(value, quote=True)}"' for name, value in kept)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_WITH_CONTENT:
+            self.skip_depth += 1
+            return
+        if self.skip_depth or tag not in ALLOWED_TAGS:
+            return
+        self.out.append(f'<{tag}{self._attrs(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_WITH_CONTENT:
+            return  # <script/> has no content to skip (and no end tag to stop skipping)
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_WITH_CONTENT:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth or tag not in self.open_tags:
+            return
+        while self.open_tags:  # Close anything left open inside it
+            open_tag = self.open_tags.pop()
+            self.out.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.out.append(html.escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        return ''.join(self.out) + ''.join(f'</{t}>' for t in reversed(self.open_tags))
+
+
+def sanitize_html(fragment):
+    parser = _Sanitizer()
+    parser.feed(fragment or '')
+    return parser.result()
+
+
+# --- Markdown ---
+
+_INLINE_CODE = re.compile(r'`([^`]+)`')
+_URL = r'((?:[^()\s]|\([^()\s]*\))+)'  # One level of balanced parentheses, e.g. wiki links
+_IMAGE = re.compile(r'!\[([^\]]*)\]\(' + _URL + r'(?:\s+"([^"]*)")?\)')
+_LINK = re.compile(r'\[([^\]]+)\]\(' + _URL + r'(?:\s+"([^"]*)")?\)')
+_BOLD = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+_ITALIC = re.compile(r'(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])')
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_ULIST = re.compile(r'^\s*[-*+]\s+(.*)$')
+_OLIST = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+_RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+
+
+def _inline(text):
+    codes = []
+
+    def stash(m):
+        codes.append(f'<code>{html.escape(m.group(1), quote=False)}</code>')
+        return f'\x00{len(codes) - 1}\x00'
+
+    text = _INLINE_CODE.sub(stash, text)
+    text = _IMAGE.sub(lambda m: f'<img src="{html.escape(m.group(2))}" alt="{html.escape(m.group(1))}"'
+                                f'{" title=" + chr(34) + html.escape(m.group(3)) + chr(34) if m.group(3) else ""}>', text)
+    text = _LINK.sub(lambda m: f'<a href="{html.escape(m.group(2))}"'
+                               f'{" title=" + chr(34) + html.escape(m.group(3)) + chr(34) if m.group(3) else ""}>{m.group(1)}</a>', text)
+    text = _BOLD.sub(r'<strong>\2</strong>', text)
+    text = _ITALIC.sub(r'<em>\2</em>', text)
+    text = re.sub(r' {2,}\n', '<br>\n', text)
+    return re.sub(r'\x00(\d+)\x00', lambda m: codes[int(m.group(1))], text)
+
+
+def render_markdown(text):
+    lines = (text or '').replace('\r\n', '\n').split('\n')
+    out, paragraph, i = [], [], 0
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{_inline(chr(10).join(paragraph))}</p>")
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith('```'):
+            flush_paragraph()
+            lang = stripped[3:].strip()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                code.append(lines[i])
+                i += 1
+            cls = f' class="language-{html.escape(lang)}"' if lang else ''
+            out.append(f"<pre><code{cls}>{html.escape(chr(10).join(code), quote=False)}</code></pre>")
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+        elif stripped.startswith('<') and not paragraph:
+            out.append(line)  # Inline HTML block, sanitized afterwards
+        elif _HEADING.match(stripped):
+            flush_paragraph()
+            m = _HEADING.match(stripped)
+            out.append(f"<h{len(m.group(1))}>{_inline(m.group(2))}</h{len(m.group(1))}>")
+        elif _RULE.match(stripped):
+            flush_paragraph()
+            out.append('<hr>')
+        elif stripped.startswith('>'):
+            flush_paragraph()
+            quote = []
+            while i < len(lines) and lines[i].strip().startswith('>'):
+                quote.append(lines[i].strip()[1:].lstrip())
+                i += 1
+            out.append(f"<blockquote>{render_markdown(chr(10).join(quote))}</blockquote>")
+            continue
+        elif _ULIST.match(line) or _OLIST.match(line):
+            flush_paragraph()
+            pattern, tag = (_ULIST, 'ul') if _ULIST.match(line) else (_OLIST, 'ol')
+            items = []
+            while i < len(lines) and pattern.match(lines[i]):
+                items.append(f"<li>{_inline(pattern.match(lines[i]).group(1))}</li>")
+                i += 1
+            out.append(f"<{tag}>{''.join(items)}</{tag}>")
+            continue
+        else:
+            paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    return '\n'.join(out)
+
+
+def render_lesson_html(content_type, content):
+    """Sanitized HTML for a lesson body."""
+    if (content_type or 'markdown').lower() == 'html':
+        return sanitize_html(content)
+    return sanitize_html(render_markdown(content))
+
+
+# --- Stored renders ---
+
+def _remember(key, rendered):
+    with _cache_lock:
+        _memory_cache[key] = rendered
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def get_rendered_lesson(lesson_id, lang, content_type, content, digest=None):
+    """Rendered HTML for a lesson, from memory, lesson_renders, or a fresh render (stored)."""
+    digest = digest or content_hash(content_type, content)
+    lang = lang or ''
+    key = (lesson_id, lang, digest)
+    with _cache_lock:
+        cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+
+    row = LessonRender.query.filter_by(lesson_id=lesson_id, lang=lang).first()
+    if row is not None and row.content_hash == digest:
+        _remember(key, row.html)
+        return row.html
+
+    rendered = render_lesson_html(content_type, content)
+    try:
+        with db.session.begin_nested():
+            if row is None:
+                db.session.add(LessonRender(lesson_id=lesson_id, lang=lang, content_hash=digest, html=rendered))
+            else:
+                row.content_hash, row.html, row.rendered_at = digest, rendered, datetime.utcnow()
+    except IntegrityError:
+        pass  # Another worker stored the same render meanwhile
+    _remember(key, rendered)
+    return rendered
+
+
+def clear_render_cache():
+    with _cache_lock:
+        _memory_cache.clear()
@@ -1,15 +1,18 @@
 from flask import Blueprint, request, jsonify
-import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import numpy as np
+import math
 import random
 from datetime import datetime, timedelta
 import re
 
 market_bp = Blueprint('market', __name__)
 
+
+def _yf():
+    """yfinance pulls in pandas and numpy: import it on first use, not at worker boot."""
+    import yfinance
+    return yfinance
+
 # --- Helper: Generate Mock History for Moroccan Stocks ---
 # --- Helper: Generate Mock History for Moroccan Stocks ---
 def generate_mock_history(symbol, current_price, days=365):
@@ -84,7 +87,7 @@ def calculate_rsi(data, window=14):
 def get_signal(symbol):
     try:
         # Fetch history
-        ticker = yf.Ticker(symbol)
+        ticker = _yf().Ticker(symbol)
         hist = ticker.history(period="1mo")
         
         if len(hist) < 20: # Reduced threshold for more signals
@@ -156,7 +159,7 @@ def get_historical_data(symbol):
         
         else:
             # Use yfinance for international stocks
-            ticker_obj = yf.Ticker(symbol)
+            ticker_obj = _yf().Ticker(symbol)
             hist = ticker_obj.history(period="1mo")
             
             if hist.empty:
@@ -212,7 +215,7 @@ def get_us_data():
 
     try:
         print(f"🔄 [CACHE MISS] Fetching {symbol} from yfinance...")
-        ticker = yf.Ticker(symbol)
+        ticker = _yf().Ticker(symbol)
         data = ticker.history(period="1d", interval="1m")
         
         if data.empty:
@@ -293,7 +296,7 @@ def get_ma_data():
         # Add some "institutional" jitter and trend
         # Use minute-of-hour to create a semi-persistent trend during the hour
         now = datetime.utcnow()
-        trend = np.sin(now.minute / 10.0) * 0.5
+        trend = math.sin(now.minute / 10.0) * 0.5
         jitter = (random.random() - 0.5) * 0.1
         
         price = base + trend + jitter
@@ -1,7 +1,97 @@
 from functools import wraps
 from flask import request, jsonify, current_app
 import jwt
-from models import User
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, User
+
+# Per-process auth caches (one copy per gunicorn worker):
+# - token -> (user_id, exp): skips jwt.decode for a token seen before
+# - user_id -> (column values, expires): skips the User lookup; the record is
+#   re-attached to the session with no query, see _attach_cached_user()
+# Entries for a user are dropped whenever that user is updated or deleted
+# through the ORM; other workers pick the change up within AUTH_USER_CACHE_TTL.
+DEFAULT_USER_CACHE_TTL = 60  # seconds
+MAX_CACHE_ENTRIES = 10000
+
+_cache_lock = threading.Lock()
+_token_cache = {}
+_user_cache = {}
+
+# Slim record: plain columns only, never the password hash (loaded on demand)
+_CACHED_COLUMNS = [c.key for c in User.__table__.columns if c.key != 'password_hash']
+
+
+def invalidate_user(user_id):
+    """Forget the cached record of a user (call after bulk updates that bypass the ORM)."""
+    with _cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def clear_auth_caches():
+    with _cache_lock:
+        _token_cache.clear()
+        _user_cache.clear()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def _decode_token(token):
+    """user_id for a token, memoized until the token expires."""
+    now = time.time()
+    with _cache_lock:
+        cached = _token_cache.get(token)
+    if cached and (cached[1] is None or cached[1] > now):
+        return cached[0]
+
+    if token.startswith('mock_jwt_token_'):
+        # Special handling for mock tokens in demo mode
+        user_id_str = token.replace('mock_jwt_token_', '')
+        # Handle 'u1', 'u2' etc. by stripping 'u'
+        user_id = int(user_id_str[1:]) if user_id_str.startswith('u') else int(user_id_str)
+        exp = None
+    else:
+        data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        user_id, exp = data['user_id'], data.get('exp')
+
+    with _cache_lock:
+        if len(_token_cache) >= MAX_CACHE_ENTRIES:
+            _token_cache.clear()
+        _token_cache[token] = (user_id, exp)
+    return user_id
+
+
+def _attach_cached_user(values):
+    """Turn a cached record into a session-bound User without a SELECT."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def load_user(user_id):
+    """User for an authenticated request, from the per-process cache when fresh."""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _user_cache.get(user_id)
+    if cached and cached[1] > now:
+        return _attach_cached_user(cached[0])
+
+    user = User.query.get(user_id)
+    if user is not None:
+        ttl = current_app.config.get('AUTH_USER_CACHE_TTL', DEFAULT_USER_CACHE_TTL)
+        values = {key: getattr(user, key) for key in _CACHED_COLUMNS}
+        with _cache_lock:
+            if len(_user_cache) >= MAX_CACHE_ENTRIES:
+                _user_cache.clear()
+            _user_cache[user_id] = (values, now + ttl)
+    return user
+
 
 def token_required(f):
     @wraps(f)
@@ -12,20 +102,9 @@ def token_required(f):
         try:
             if token.startswith('Bearer '):
                 token = token.split(' ')[1]
-            
-            # Special handling for mock tokens in demo mode
-            if token.startswith('mock_jwt_token_'):
-                user_id_str = token.replace('mock_jwt_token_', '')
-                # Handle 'u1', 'u2' etc. by stripping 'u'
-                if user_id_str.startswith('u'):
-                    user_id = int(user_id_str[1:])
-                else:
-                    user_id = int(user_id_str)
-                current_user = User.query.get(user_id)
-            else:
-                data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-                current_user = User.query.get(data['user_id'])
-            
+
+            current_user = load_user(_decode_token(token))
+
             if not current_user:
                 raise Exception('User not found')
         except Exception as e:
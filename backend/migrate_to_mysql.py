@@ -1,151 +1,348 @@
+"""
+SQLite -> MySQL migration tool.
 
-import sqlite3
-import pymysql
+- Streams every table in keyed batches (WHERE pk > last ORDER BY pk LIMIT n)
+  and writes each batch with a single executemany() INSERT.
+- Copies tables in parallel worker processes. Foreign key and unique checks
+  are switched off in each loading session, so tables are independent of
+  each other during the load.
+- Drops secondary (non-unique) indexes before loading a table and rebuilds
+  them afterwards (also when the load fails), so InnoDB does not maintain
+  them row by row. Indexes that cannot be recreated exactly are kept.
+- Verifies row counts and an order-independent checksum per table at the end.
+
+Primary keys are preserved, so no id remapping is needed between tables.
+Credentials come from the environment (DB_USER, DB_PASSWORD, DB_HOST,
+DB_PORT, DB_NAME), the same variables config.py uses.
+
+Usage:
+    python migrate_to_mysql.py --truncate
+    python migrate_to_mysql.py --workers 6 --batch-size 10000 --tables users accounts trades
+"""
+import argparse
 import os
+import sqlite3
+import struct
 import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pymysql
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+load_dotenv()
 
 # SQLite Source
 sqlite_db_path = os.path.join(os.path.dirname(__file__), 'instance', 'tradesense.db')
 
-# MySQL Target Defaults
-MYSQL_HOST = 'localhost'
-MYSQL_USER = 'root'
-MYSQL_PASSWORD = '2002' # UPDATED WITH USER PASSWORD
-MYSQL_DB = 'tradesense'
+DEFAULT_BATCH_SIZE = 5000
 
-def migrate():
-    print(f"🔄 Starting Migration from SQLite -> MySQL...")
-    print(f"📂 Source: {sqlite_db_path}")
 
-    # 1. Connect to SQLite
-    if not os.path.exists(sqlite_db_path):
-        print("❌ SQLite DB not found!")
-        return
+def mysql_settings():
+    settings = {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'port': int(os.environ.get('DB_PORT', 3306)),
+        'user': os.environ.get('DB_USER'),
+        'password': os.environ.get('DB_PASSWORD'),
+        'database': os.environ.get('DB_NAME', 'tradesense'),
+    }
+    if not settings['user'] or settings['password'] is None:
+        raise SystemExit("❌ Set DB_USER and DB_PASSWORD (and optionally DB_HOST, DB_PORT, DB_NAME).")
+    return settings
+
+
+def mysql_connect(settings, bulk_load=False):
+    conn = pymysql.connect(charset='utf8mb4', cursorclass=pymysql.cursors.Cursor, **settings)
+    if bulk_load:
+        with conn.cursor() as cursor:
+            cursor.execute("SET SESSION foreign_key_checks = 0")
+            cursor.execute("SET SESSION unique_checks = 0")
+    return conn
+
+
+# --- SCHEMA HELPERS ---
+
+def sqlite_tables(sqlite_conn):
+    rows = sqlite_conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    return [r[0] for r in rows]
+
 
-    sqlite_conn = sqlite3.connect(sqlite_db_path)
-    sqlite_conn.row_factory = sqlite3.Row
-    sqlite_cur = sqlite_conn.cursor()
+def sqlite_columns(sqlite_conn, table):
+    """(column names, primary key column) of a SQLite table."""
+    info = sqlite_conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+    columns = [row[1] for row in info]
+    pk = next((row[1] for row in info if row[5] == 1), None)
+    return columns, pk
 
-    # 2. Connect to MySQL
+
+def mysql_columns(cursor, table):
+    cursor.execute(f"SHOW COLUMNS FROM `{table}`")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def secondary_indexes(cursor, table):
+    """{index name: [SHOW INDEX rows as dicts, in column order]} for non-unique, non-primary indexes."""
+    cursor.execute(f"SHOW INDEX FROM `{table}` WHERE Non_unique = 1")
+    names = [d[0] for d in cursor.description]
+    indexes = {}
+    for row in sorted((dict(zip(names, r)) for r in cursor.fetchall()), key=lambda r: (r['Key_name'], r['Seq_in_index'])):
+        indexes.setdefault(row['Key_name'], []).append(row)
+    return indexes
+
+
+def index_ddl(table, name, parts):
+    """
+    ADD INDEX statement recreating an index exactly (prefix lengths, order,
+    type), or None when it has parts this rebuild cannot reproduce
+    (functional key parts, comments, invisible indexes): those are not dropped.
+    """
+    first = parts[0]
+    if first.get('Index_comment') or first.get('Visible', 'YES') != 'YES':
+        return None
+    columns = []
+    for part in parts:
+        if part.get('Expression') or not part['Column_name']:
+            return None
+        column = f"`{part['Column_name']}`"
+        if part.get('Sub_part'):
+            column += f"({part['Sub_part']})"
+        if part.get('Collation') == 'D':
+            column += ' DESC'
+        columns.append(column)
+    index_type = first.get('Index_type') or 'BTREE'
+    if index_type in ('FULLTEXT', 'SPATIAL'):
+        return f"ALTER TABLE `{table}` ADD {index_type} INDEX `{name}` ({', '.join(columns)})"
+    if index_type not in ('BTREE', 'HASH'):
+        return None
+    return f"ALTER TABLE `{table}` ADD INDEX `{name}` ({', '.join(columns)}) USING {index_type}"
+
+
+def restore_indexes(cursor, table, dropped):
+    """Re-add dropped indexes; print the DDL of any that fail so it can be run by hand."""
+    for name, ddl in dropped.items():
+        try:
+            cursor.execute(ddl)
+        except pymysql.MySQLError as e:
+            print(f"❌ {table}: could not rebuild index {name} ({e}). Run by hand:\n   {ddl};")
+
+
+# --- CHECKSUMS ---
+
+def _round_seconds(value):
+    """Round to whole seconds the way MySQL DATETIME does on insert (half up)."""
+    if value.microsecond >= 500000:
+        value += timedelta(seconds=1)
+    return value.replace(microsecond=0).isoformat(' ')
+
+
+def _float32(value):
+    """Round to single precision, what a MySQL FLOAT column stores."""
     try:
-        mysql_conn = pymysql.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        print("✅ Connected to MySQL!")
-    except Exception as e:
-        print(f"❌ Failed to connect to MySQL: {e}")
-        print("💡 TIP: If you have a password, please tell me so I can update the script.")
-        return
+        return repr(struct.unpack('f', struct.pack('f', value))[0])
+    except OverflowError:
+        return repr(value)
+
+
+def _canonical(value):
+    """Normalize values so SQLite and MySQL representations compare equal."""
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    if isinstance(value, datetime):
+        return _round_seconds(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (float, Decimal)):
+        return _float32(float(value))
+    if isinstance(value, str) and len(value) >= 19 and value[4] == '-' and value[10] in ' T':
+        try:
+            return _round_seconds(datetime.fromisoformat(value))
+        except ValueError:
+            pass
+    return str(value)
+
+
+def row_checksum(row):
+    return zlib.crc32('\x1f'.join(_canonical(v) for v in row).encode('utf-8'))
+
+
+# --- WORKER ---
+
+def copy_table(table, settings, source_path, batch_size, truncate):
+    """Copy one table. Runs in a worker process with its own connections."""
+    start = time.perf_counter()
+    sqlite_conn = sqlite3.connect(source_path)
+    mysql_conn = mysql_connect(settings, bulk_load=True)
 
     try:
+        src_cols, pk = sqlite_columns(sqlite_conn, table)
         with mysql_conn.cursor() as cursor:
-            # Create Database if not exists
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {MYSQL_DB}")
-            cursor.execute(f"USE {MYSQL_DB}")
-            
-            # --- USERS ---
-            print("➡️ Migrating Users...")
-            sqlite_cur.execute("SELECT * FROM users")
-            users = sqlite_cur.fetchall()
-            for user in users:
-                # Check duplication
-                cursor.execute("SELECT id FROM users WHERE email = %s", (user['email'],))
-                if not cursor.fetchone():
-                    sql = """
-                        INSERT INTO users (full_name, username, email, password_hash, role, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """
-                    cursor.execute(sql, (
-                        user['full_name'], user['username'], user['email'], 
-                        user['password_hash'], user['role'], user['created_at']
-                    ))
-            
-            # Commit users first to get IDs if needed (assuming emails match)
-            mysql_conn.commit()
-
-            # --- ACCOUNTS ---
-            print("➡️ Migrating Accounts...")
-            sqlite_cur.execute("SELECT * FROM accounts")
-            accounts = sqlite_cur.fetchall()
-            
-            # Get MySQL Account Columns dynamically to avoid errors
-            cursor.execute("DESCRIBE accounts")
-            mysql_acc_cols = [row['Field'] for row in cursor.fetchall()]
-
-            for acc in accounts:
-                sqlite_cur.execute("SELECT email FROM users WHERE id = ?", (acc['user_id'],))
-                user_row = sqlite_cur.fetchone()
-                if user_row:
-                    email = user_row['email']
-                    cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-                    mysql_user = cursor.fetchone()
-                    
-                    if mysql_user:
-                        mysql_user_id = mysql_user['id']
-                        
-                        # Build Insert Dict dynamically
-                        insert_data = {}
-                        insert_data['user_id'] = mysql_user_id
-                        
-                        # Map common fields
-                        common_fields = ['plan_name', 'initial_balance', 'current_balance', 'equity', 'daily_starting_equity', 'status', 'created_at']
-                        for field in common_fields:
-                            if field in mysql_acc_cols:
-                                insert_data[field] = acc[field]
-                        
-                        # Map optional fields
-                        if 'reason' in mysql_acc_cols: insert_data['reason'] = acc.get('reason')
-                        if 'admin_note' in mysql_acc_cols: insert_data['admin_note'] = acc.get('admin_note')
-                        if 'last_daily_reset' in mysql_acc_cols: insert_data['last_daily_reset'] = acc.get('last_daily_reset')
-
-                        # Construct SQL
-                        cols = ', '.join(insert_data.keys())
-                        placeholders = ', '.join(['%s'] * len(insert_data))
-                        sql = f"INSERT INTO accounts ({cols}) VALUES ({placeholders})"
-                        
-                        cursor.execute(sql, list(insert_data.values()))
-                        
-                        # Capture the new Account ID for Trades
-                        new_account_id = cursor.lastrowid
-
-                        # --- TRADES (Nested to link to correct Account) ---
-                        if new_account_id:
-                            sqlite_cur.execute("SELECT * FROM trades WHERE account_id = ?", (acc['id'],))
-                            trades = sqlite_cur.fetchall()
-                            if trades:
-                                # Get MySQL Trade Columns
-                                cursor.execute("DESCRIBE trades")
-                                mysql_trade_cols = [row['Field'] for row in cursor.fetchall()]
-                                
-                                for trade in trades:
-                                    t_data = {}
-                                    t_data['account_id'] = new_account_id
-                                    t_data['user_id'] = mysql_user_id
-                                    
-                                    # Copy fields that exist in both
-                                    full_trade_fields = ['symbol', 'side', 'quantity', 'price', 'trade_type', 'amount', 'entry_price', 'exit_price', 'stop_loss', 'take_profit', 'commission', 'swap', 'notes', 'status', 'pnl', 'timestamp', 'created_at', 'closed_at']
-                                    
-                                    for f in full_trade_fields:
-                                        if f in mysql_trade_cols and f in trade.keys():
-                                            t_data[f] = trade[f]
-                                    
-                                    t_cols = ', '.join(t_data.keys())
-                                    t_holders = ', '.join(['%s'] * len(t_data))
-                                    t_sql = f"INSERT INTO trades ({t_cols}) VALUES ({t_holders})"
-                                    cursor.execute(t_sql, list(t_data.values()))
-
-            mysql_conn.commit()
-            print("✅ Migration Complete! Users, Accounts (matched columns), and Trades added to MySQL.")
-
-    except Exception as e:
-        print(f"❌ Migration Error: {e}")
+            dst_cols = mysql_columns(cursor, table)
+            columns = [c for c in src_cols if c in dst_cols]
+            if not pk or pk not in columns:
+                return {'table': table, 'error': 'no usable primary key'}
+
+            if truncate:
+                cursor.execute(f"TRUNCATE TABLE `{table}`")
+
+            # Relax index maintenance: drop secondary indexes, rebuild after the load
+            # (also when it fails: a later run could not see what was dropped)
+            dropped = {}
+            try:
+                for name, parts in secondary_indexes(cursor, table).items():
+                    ddl = index_ddl(table, name, parts)
+                    if ddl is None:
+                        continue  # cannot be recreated exactly: keep it
+                    try:
+                        cursor.execute(f"ALTER TABLE `{table}` DROP INDEX `{name}`")
+                        dropped[name] = ddl
+                    except pymysql.MySQLError:
+                        pass  # needed by a foreign key constraint: keep it
+
+                col_list = ', '.join(f"`{c}`" for c in columns)
+                placeholders = ', '.join(['%s'] * len(columns))
+                insert_sql = f"INSERT INTO `{table}` ({col_list}) VALUES ({placeholders})"
+                select_cols = ', '.join(f'"{c}"' for c in columns)
+                first_sql = f'SELECT {select_cols} FROM "{table}" ORDER BY "{pk}" LIMIT ?'
+                next_sql = f'SELECT {select_cols} FROM "{table}" WHERE "{pk}" > ? ORDER BY "{pk}" LIMIT ?'
+                pk_pos = columns.index(pk)
+
+                copied, checksum, last_key = 0, 0, None
+                while True:
+                    if last_key is None:
+                        batch = sqlite_conn.execute(first_sql, (batch_size,)).fetchall()
+                    else:
+                        batch = sqlite_conn.execute(next_sql, (last_key, batch_size)).fetchall()
+                    if not batch:
+                        break
+                    cursor.executemany(insert_sql, batch)
+                    mysql_conn.commit()
+                    copied += len(batch)
+                    checksum = (checksum + sum(row_checksum(r) for r in batch)) % (1 << 64)
+                    last_key = batch[-1][pk_pos]
+            finally:
+                restore_indexes(cursor, table, dropped)  # DDL commits by itself
+
+        return {
+            'table': table, 'rows': copied, 'checksum': checksum, 'columns': columns,
+            'pk': pk, 'seconds': time.perf_counter() - start,
+        }
     finally:
         mysql_conn.close()
         sqlite_conn.close()
 
+
+# --- VERIFICATION ---
+
+def verify_table(result, settings, batch_size):
+    """Re-read the target table and compare row count and checksum."""
+    table, columns, pk = result['table'], result['columns'], result['pk']
+    conn = mysql_connect(settings)
+    try:
+        count, checksum = 0, 0
+        with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM `{table}` ORDER BY `{pk}`")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                checksum = (checksum + sum(row_checksum(r) for r in rows)) % (1 << 64)
+        return count == result['rows'] and checksum == result['checksum'], count, checksum
+    finally:
+        conn.close()
+
+
+def create_schema(settings):
+    """Create missing tables from models.py on the target database."""
+    from sqlalchemy import create_engine
+    from models import db
+    url = (f"mysql+pymysql://{settings['user']}:{settings['password']}@{settings['host']}:"
+           f"{settings['port']}/{settings['database']}?charset=utf8mb4")
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+
+def migrate(tables=None, workers=4, batch_size=DEFAULT_BATCH_SIZE, truncate=False, source_path=sqlite_db_path):
+    print(f"🔄 Starting Migration from SQLite -> MySQL...")
+    print(f"📂 Source: {source_path}")
+
+    if not os.path.exists(source_path):
+        print("❌ SQLite DB not found!")
+        return False
+
+    settings = mysql_settings()
+
+    # Create Database and schema if needed
+    server = {k: v for k, v in settings.items() if k != 'database'}
+    conn = pymysql.connect(charset='utf8mb4', **server)
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{settings['database']}` "
+                       "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    conn.close()
+    create_schema(settings)
+
+    sqlite_conn = sqlite3.connect(source_path)
+    source_tables = sqlite_tables(sqlite_conn)
+    sqlite_conn.close()
+
+    mysql_conn = mysql_connect(settings)
+    with mysql_conn.cursor() as cursor:
+        cursor.execute("SHOW TABLES")
+        target_tables = {row[0] for row in cursor.fetchall()}
+    mysql_conn.close()
+
+    wanted = [t for t in (tables or source_tables) if t in source_tables]
+    skipped = [t for t in wanted if t not in target_tables]
+    wanted = [t for t in wanted if t in target_tables]
+    for t in skipped:
+        print(f"   - Skipping {t} (not in target schema)")
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(copy_table, t, settings, source_path, batch_size, truncate): t for t in wanted}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if 'error' in result:
+                print(f"⚠️  {result['table']}: {result['error']}")
+            else:
+                print(f"➡️  {result['table']}: {result['rows']} rows in {result['seconds']:.1f}s")
+
+    print(f"\n🔍 Verifying row counts and checksums...")
+    ok = True
+    for result in sorted(results, key=lambda r: r['table']):
+        if 'error' in result:
+            ok = False
+            continue
+        matched, count, checksum = verify_table(result, settings, batch_size)
+        status = '✅' if matched else '❌'
+        print(f"   {status} {result['table']}: source {result['rows']} rows / target {count} rows"
+              + ('' if matched else f" (checksum {result['checksum']} != {checksum})"))
+        ok = ok and matched
+
+    print(f"\n{'✅ Migration Complete' if ok else '❌ Migration finished with mismatches'}"
+          f" in {time.perf_counter() - start:.1f}s")
+    return ok
+
+
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description='Batched, parallel SQLite -> MySQL migration')
+    parser.add_argument('--source', default=sqlite_db_path, help='SQLite database file')
+    parser.add_argument('--tables', nargs='+', help='Only these tables (default: all)')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel worker processes')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--truncate', action='store_true', help='Empty target tables before loading')
+    args = parser.parse_args()
+
+    success = migrate(args.tables, args.workers, args.batch_size, args.truncate, args.source)
+    sys.exit(0 if success else 1)
@@ -2,9 +2,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import enum
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import hash_password, verify_password, needs_rehash
+from db_routing import RoutingSession
+from post_images import variant_urls
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class UserRole(enum.Enum):
     USER = 'USER'
@@ -66,10 +68,13 @@ class User(db.Model):
     challenges = db.relationship('Challenge', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -102,6 +107,10 @@ class Account(db.Model):
     trades = db.relationship('Trade', backref='account', lazy=True)
     transactions = db.relationship('Transaction', backref='account', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_accounts_user_status', 'user_id', 'status'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -146,6 +155,12 @@ class Trade(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     closed_at = db.Column(db.DateTime, nullable=True)
 
+    # Open positions are listed by created_at, history by closed_at
+    __table_args__ = (
+        db.Index('ix_trades_account_status_created', 'account_id', 'status', 'created_at'),
+        db.Index('ix_trades_account_status_closed', 'account_id', 'status', 'closed_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -167,6 +182,42 @@ class Trade(db.Model):
             'timestamp': (self.created_at or self.timestamp).isoformat() if (self.created_at or self.timestamp) else datetime.utcnow().isoformat()
         }
 
+class ArchivedTrade(db.Model):
+    """Closed trades of FAILED accounts (trade_archive.ARCHIVABLE_STATUSES), moved out of `trades` by trade_archive.py."""
+    __tablename__ = 'trades_archive'
+    id = db.Column(db.Integer, primary_key=True)  # Same id as in `trades`
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    symbol = db.Column(db.String(20), nullable=False)
+    side = db.Column(db.Enum(TradeType), nullable=False)
+    quantity = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+
+    trade_type = db.Column(db.Enum(TradeType), nullable=True)
+    amount = db.Column(db.Float, nullable=True)
+    entry_price = db.Column(db.Float, nullable=True)
+    exit_price = db.Column(db.Float, nullable=True)
+
+    stop_loss = db.Column(db.Float, nullable=True)
+    take_profit = db.Column(db.Float, nullable=True)
+    commission = db.Column(db.Float, default=0.0)
+    swap = db.Column(db.Float, default=0.0)
+    notes = db.Column(db.Text, nullable=True)
+
+    status = db.Column(db.Enum(TradeStatus), default=TradeStatus.CLOSED)
+    pnl = db.Column(db.Float, default=0.0)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    closed_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_trades_archive_account_closed', 'account_id', 'closed_at'),
+    )
+
+    to_dict = Trade.to_dict
+
 class Challenge(db.Model):
     __tablename__ = 'challenges'
     id = db.Column(db.Integer, primary_key=True)
@@ -304,6 +355,17 @@ class Lesson(db.Model):
             'order_index': self.order_index
         }
 
+class LessonRender(db.Model):
+    """Sanitized HTML of a lesson in one language ('' = base text), see lesson_render.py."""
+    __tablename__ = 'lesson_renders'
+    id = db.Column(db.Integer, primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), nullable=False)
+    lang = db.Column(db.String(2), nullable=False, default='')
+    content_hash = db.Column(db.String(64), nullable=False)
+    html = db.Column(db.Text, nullable=True)
+    rendered_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('lesson_id', 'lang', name='unique_lesson_render_lang'),)
+
 class Quiz(db.Model):
     __tablename__ = 'quizzes'
     id = db.Column(db.Integer, primary_key=True)
@@ -416,7 +478,11 @@ class FloorMessage(db.Model):
     sender = db.relationship('User', backref='messages')
     replies = db.relationship('FloorMessage', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
 
-    def to_dict(self):
+    __table_args__ = (
+        db.Index('ix_floor_messages_floor_created', 'floor_id', 'created_at'),
+    )
+
+    def to_dict(self, replies_count=None):
         author_profit = None
         main_acc = self.sender.accounts[0] if self.sender.accounts else None
         if main_acc:
@@ -438,7 +504,7 @@ class FloorMessage(db.Model):
             'image_url': self.image_url,
             'metadata': self.metadata_json,
             'likes': self.likes_count,
-            'comments_count': self.replies.count(),
+            'comments_count': self.replies.count() if replies_count is None else replies_count,
             'timestamp': self.created_at.isoformat()
         }
 
@@ -452,17 +518,25 @@ class Post(db.Model):
     image_url = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Counters maintained by post_counters.py on like/unlike/comment
+    likes_count = db.Column(db.Integer, default=0, nullable=False)
+    comments_count = db.Column(db.Integer, default=0, nullable=False)
     
     author = db.relationship('User', backref='posts')
     comments = db.relationship('Comment', backref='post', lazy=True, cascade="all, delete-orphan")
     likes = db.relationship('PostLike', backref='post', lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_posts_created', 'created_at'),  # Feed pages: (created_at, id) keyset
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
             'content': self.content,
             'tags': self.tags,
             'image_url': self.image_url,
+            'image_variants': variant_urls(self.image_url),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'author': {
@@ -471,8 +545,8 @@ class Post(db.Model):
                 'username': self.author.username,
                 'avatar': f"https://ui-avatars.com/api/?name={self.author.full_name}&background=random"
             },
-            'likes': len(self.likes),
-            'comments_count': len(self.comments)
+            'likes': self.likes_count or 0,
+            'comments_count': self.comments_count or 0
         }
 
 class Comment(db.Model):
@@ -485,6 +559,10 @@ class Comment(db.Model):
     
     author = db.relationship('User', backref='post_comments')
 
+    __table_args__ = (
+        db.Index('ix_comments_post_created', 'post_id', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -506,6 +584,10 @@ class PostLike(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_post_likes_post_user', 'post_id', 'user_id'),
+    )
+
 # --- USER PROGRESS ---
 class UserCourseProgress(db.Model):
     __tablename__ = 'user_course_progress'
@@ -514,8 +596,15 @@ class UserCourseProgress(db.Model):
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
     is_completed = db.Column(db.Boolean, default=False)
     progress_percent = db.Column(db.Integer, default=0)
+    # Rollups maintained by course_progress.py as lessons/quizzes are completed
+    completed_lessons = db.Column(db.Integer, default=0, nullable=False)
+    passed_quizzes = db.Column(db.Integer, default=0, nullable=False)
     last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('uq_user_course_progress_user_course', 'user_id', 'course_id', unique=True),  # One rollup per user/course
+    )
+
 class UserLessonProgress(db.Model):
     __tablename__ = 'user_lesson_progress'
     id = db.Column(db.Integer, primary_key=True)
@@ -527,6 +616,10 @@ class UserLessonProgress(db.Model):
     quiz_passed = db.Column(db.Boolean, default=False)
     last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_user_lesson_progress_user_lesson', 'user_id', 'lesson_id'),
+    )
+
 class UserQuizAttempt(db.Model): # New
     __tablename__ = 'user_quiz_attempts'
     id = db.Column(db.Integer, primary_key=True)
@@ -560,12 +653,29 @@ class UserXP(db.Model):
     total_xp = db.Column(db.Integer, default=0)
     level_title = db.Column(db.String(50), default="Bronze Trader")
 
+    __table_args__ = (
+        db.Index('ix_user_xp_total_xp', 'total_xp'),
+    )
+
     def to_dict(self):
         return {
             'xp': self.total_xp,
             'level': self.level_title
         }
 
+class XPLevel(db.Model):
+    """Level thresholds: a user's title is the one with the highest min_xp they reached."""
+    __tablename__ = 'xp_levels'
+    id = db.Column(db.Integer, primary_key=True)
+    min_xp = db.Column(db.Integer, unique=True, nullable=False)
+    title = db.Column(db.String(50), nullable=False)
+
+    def to_dict(self):
+        return {
+            'min_xp': self.min_xp,
+            'title': self.title
+        }
+
 # --- TRADESENSE AI AGENCY ---
 class MarketSignal(db.Model):
     __tablename__ = 'market_signals'
@@ -642,6 +752,10 @@ class Leaderboard(db.Model):
     is_visible = db.Column(db.Boolean, default=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_leaderboard_period_visible_ranking', 'period', 'is_visible', 'ranking'),
+    )
+
     def to_dict(self):
         import json
         badges_list = []
@@ -684,6 +798,11 @@ class PerformanceSnapshot(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Sparklines read one account's series in time order (equity_curves.py)
+    __table_args__ = (
+        db.Index('ix_performance_snapshots_account_created', 'account_id', 'created_at'),
+    )
+
 class AdminActionLog(db.Model):
     __tablename__ = 'admin_actions_log'
     id = db.Column(db.Integer, primary_key=True)
@@ -817,3 +936,10 @@ class OptionTranslation(db.Model):
     lang = db.Column(db.String(2), nullable=False)
     text = db.Column(db.String(200), nullable=False)
     __table_args__ = (db.UniqueConstraint('option_id', 'lang', name='unique_option_lang'),)
+
+class ContentVersion(db.Model):
+    """Version stamp of a cached content set (e.g. 'academy'), bumped on every write to it."""
+    __tablename__ = 'content_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination for the feeds.
+
+A page is "the next N rows after (created_at, id)" in the feed order, so it
+is one index range read however deep the client scrolls (OFFSET re-reads
+and throws away every row before the page). The cursor is the sort key of
+the last row sent, encoded as an opaque url-safe string.
+
+Responses stay plain JSON arrays; the cursor of the next page travels in
+the X-Next-Cursor header and is absent on the last page:
+
+    GET /api/community/posts?limit=20
+    GET /api/community/posts?limit=20&cursor=<X-Next-Cursor>
+"""
+import base64
+from datetime import datetime
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import and_, or_
+
+CURSOR_HEADER = 'X-Next-Cursor'
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _setting(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat() if created_at else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Cursor string -> (created_at or None, id). Raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, row_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(stamp) if stamp else None), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def page_args(default=None):
+    """(limit, cursor) from ?limit= and ?cursor=. Raises InvalidCursor on a bad cursor."""
+    default = default or _setting('PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        limit = default
+    limit = max(1, min(limit, _setting('MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)))
+    cursor = request.args.get('cursor')
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+
+def after_cursor(time_col, id_col, cursor, descending=True):
+    """
+    WHERE clause for the rows after `cursor` in (time_col, id_col) order.
+    NULL times sort lowest, as in MySQL and SQLite.
+    """
+    stamp, row_id = cursor
+    if descending:
+        if stamp is None:
+            return and_(time_col.is_(None), id_col < row_id)
+        return or_(time_col < stamp, and_(time_col == stamp, id_col < row_id), time_col.is_(None))
+    if stamp is None:
+        return or_(time_col.isnot(None), id_col > row_id)
+    return or_(time_col > stamp, and_(time_col == stamp, id_col > row_id))
+
+
+def keyset_page(query, time_col, id_col, limit, cursor=None, descending=True):
+    """
+    One page of `query` ordered by (time_col, id_col). Returns (rows, next_cursor);
+    next_cursor is None on the last page. Reads limit + 1 rows to know.
+    """
+    if cursor is not None:
+        query = query.filter(after_cursor(time_col, id_col, cursor, descending))
+    order = (time_col.desc(), id_col.desc()) if descending else (time_col.asc(), id_col.asc())
+    rows = query.order_by(*order).limit(limit + 1).all()
+    return rows[:limit], (next_cursor(rows[limit - 1], time_col.key, id_col.key) if len(rows) > limit else None)
+
+
+def next_cursor(row, time_attr='created_at', id_attr='id'):
+    return encode_cursor(getattr(row, time_attr), getattr(row, id_attr))
+
+
+def with_cursor(response, cursor):
+    """Attach the next-page cursor to a jsonify() response."""
+    if cursor:
+        response.headers[CURSOR_HEADER] = cursor
+    return response
@@ -0,0 +1,111 @@
+"""
+Password hashing off the request thread.
+
+Werkzeug's scrypt/pbkdf2 hashes cost tens of milliseconds of CPU each. Run
+on the request thread, a login storm holds every worker thread for the
+whole hash and trading requests queue up behind it. Here hashes run in a
+small per-process pool (PASSWORD_HASH_WORKERS threads; hashlib releases
+the GIL, so other requests keep being served meanwhile). At most
+PASSWORD_HASH_MAX_PENDING hashes may be queued; past that, or when a hash
+waits longer than PASSWORD_HASH_TIMEOUT, HashingBusy is raised and the
+login endpoint answers 503 instead of piling up.
+
+PASSWORD_HASH_METHOD is the Werkzeug method string and sets the work
+factor, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'. Stored hashes
+made with another method are upgraded on the next successful login
+(see needs_rehash()).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+from flask import current_app, has_app_context, jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'  # Werkzeug 3 default
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+DEFAULT_TIMEOUT = 10  # seconds
+
+_executor = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """Too many hashes queued in this worker (or one timed out); retry later."""
+
+
+def busy_response(message='Server busy, please retry in a moment.'):
+    """503 + Retry-After for a HashingBusy caught in a view."""
+    response = jsonify({'message': message})
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
+
+
+def _setting(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def hash_method():
+    return _setting('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def _pool():
+    global _executor, _slots
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                workers = _setting('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS)
+                _slots = threading.BoundedSemaphore(workers + _setting('PASSWORD_HASH_MAX_PENDING', DEFAULT_MAX_PENDING))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pwhash')
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=_setting('PASSWORD_HASH_TIMEOUT', DEFAULT_TIMEOUT))
+    except FutureTimeout:
+        future.cancel()  # Still queued: drop it (a running hash finishes and frees its slot)
+        raise HashingBusy()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    if not password_hash or password is None:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+@lru_cache(maxsize=8)
+def _hash_prefix(method):
+    """Full method string Werkzeug writes for a method ('scrypt' -> 'scrypt:32768:8:1')."""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with another method or cost than the configured one."""
+    return not password_hash or password_hash.split('$', 1)[0] != _hash_prefix(hash_method())
+
+
+def shutdown():
+    global _executor, _slots
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor, _slots = None, None
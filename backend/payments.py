@@ -2,7 +2,6 @@ from flask import Blueprint, request, jsonify, redirect
 from models import db, Transaction, User, Account, ChallengeStatus, PaymentMethod, PaymentStatus, SystemConfig, UserRole
 from functools import wraps
 import jwt
-import paypalrestsdk
 from datetime import datetime
 import traceback
 
@@ -15,6 +14,7 @@ def configure_paypal():
         secret_config = SystemConfig.query.get('PAYPAL_SECRET')
         
         if client_id_config and secret_config:
+            import paypalrestsdk
             paypalrestsdk.configure({
                 "mode": "sandbox", # sandbox or live
                 "client_id": client_id_config.value,
@@ -130,6 +130,7 @@ def create_paypal_payment(current_user):
         amount = data.get('amount')
         plan_id = data.get('planId')
         
+        import paypalrestsdk
         payment = paypalrestsdk.Payment({
             "intent": "sale",
             "payer": {
@@ -181,6 +182,7 @@ def execute_paypal_payment():
         user_id = request.args.get('user_id')
         plan_id = request.args.get('plan')
         
+        import paypalrestsdk
         payment = paypalrestsdk.Payment.find(payment_id)
 
         if payment.execute({"payer_id": payer_id}):
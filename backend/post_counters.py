@@ -0,0 +1,122 @@
+"""
+Like and comment counters on community posts (posts.likes_count,
+posts.comments_count).
+
+The feed used to count likes and comments with len(post.likes) and
+len(post.comments), loading every row of every post. The counters are now
+bumped with one atomic UPDATE ... SET n = n + 1 in the same transaction as
+the like, unlike or comment, so they cannot drift from the rows under
+concurrent requests.
+
+Scripts that insert or delete likes/comments directly must call recount()
+on the affected posts (see posts_touched_by()). Existing databases:
+    python post_counters.py --migrate     # add the counter columns
+    python post_counters.py --backfill    # recount every post
+"""
+import argparse
+
+from sqlalchemy import func, inspect, select, text
+
+from models import db, Comment, Post, PostLike
+
+COUNTER_COLUMNS = ('likes_count', 'comments_count')
+
+
+def _bump(post_id, **deltas):
+    table = Post.__table__
+    values = {name: table.c[name] + delta for name, delta in deltas.items() if delta}
+    if values:
+        db.session.execute(table.update().where(table.c.id == post_id).values(**values))
+
+
+def get_counts(post_id):
+    """(likes, comments) of a post, as seen by the current transaction."""
+    row = db.session.execute(select(Post.likes_count, Post.comments_count).where(Post.id == post_id)).one()
+    return row.likes_count, row.comments_count
+
+
+def toggle_like(user_id, post_id):
+    """Like or unlike a post in the current transaction. Returns (liked, likes_count); the caller commits."""
+    removed = PostLike.query.filter_by(user_id=user_id, post_id=post_id).delete(synchronize_session=False)
+    if removed:
+        _bump(post_id, likes_count=-removed)
+        liked = False
+    else:
+        db.session.add(PostLike(user_id=user_id, post_id=post_id))
+        db.session.flush()
+        _bump(post_id, likes_count=1)
+        liked = True
+    return liked, get_counts(post_id)[0]
+
+
+def add_comment(user_id, post_id, content):
+    """Insert a comment and bump the post's counter; the caller commits."""
+    comment = Comment(post_id=post_id, user_id=user_id, content=content)
+    db.session.add(comment)
+    db.session.flush()
+    _bump(post_id, comments_count=1)
+    return comment
+
+
+def posts_touched_by(user_ids):
+    """Ids of the posts these users liked or commented on (to recount after deleting their rows)."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    liked = select(PostLike.post_id).where(PostLike.user_id.in_(user_ids))
+    commented = select(Comment.post_id).where(Comment.user_id.in_(user_ids))
+    return list(db.session.execute(liked.union(commented)).scalars())
+
+
+def recount(post_ids=None):
+    """Set the counters from the like and comment rows (every post, or the given ones); the caller commits."""
+    table = Post.__table__
+    likes = select(func.count()).select_from(PostLike).where(PostLike.post_id == table.c.id).scalar_subquery()
+    comments = select(func.count()).select_from(Comment).where(Comment.post_id == table.c.id).scalar_subquery()
+    stmt = table.update().values(likes_count=likes, comments_count=comments)
+    if post_ids is not None:
+        stmt = stmt.where(table.c.id.in_(list(post_ids)))
+    return db.session.execute(stmt).rowcount
+
+
+def migrate():
+    """Add the counter columns to an existing posts table."""
+    table = Post.__table__
+    existing = {c['name'] for c in inspect(db.engine).get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for column in COUNTER_COLUMNS:
+            if column in existing:
+                print(f"[OK] {table.name}.{column} already exists")
+            else:
+                print(f"[+] Adding {table.name}.{column}...")
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+
+
+def backfill(batch_size=1000):
+    """Recount every post in id batches (short transactions)."""
+    updated, last_id = 0, 0
+    while True:
+        ids = db.session.execute(select(Post.id).where(Post.id > last_id).order_by(Post.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        updated += recount(ids)
+        db.session.commit()
+        last_id = ids[-1]
+        print(f"   {updated} posts recounted...")
+    print(f"✅ Backfill complete: {updated} posts")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Community post counters maintenance')
+    parser.add_argument('--migrate', action='store_true', help='Add the counter columns to an existing database')
+    parser.add_argument('--backfill', action='store_true', help='Recount all posts from the like and comment rows')
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        if args.migrate:
+            migrate()
+        if args.backfill:
+            backfill()
+        if not (args.migrate or args.backfill):
+            parser.print_help()
@@ -0,0 +1,312 @@
+"""
+Community post images.
+
+Uploads are streamed to disk in chunks while being hashed, and stored once
+per content hash (the same image posted twice is one file):
+
+    <POST_IMAGE_DIR>/<hash>/original.<ext>
+    <POST_IMAGE_DIR>/<hash>/thumb.webp   320px   (avatars, previews)
+    <POST_IMAGE_DIR>/<hash>/feed.webp    960px   (feed cards; what image_url points to)
+    <POST_IMAGE_DIR>/<hash>/full.webp   2048px   (lightbox)
+
+The web sizes are made by a small per-process thread pool
+(POST_IMAGE_WORKERS, Pillow releases the GIL while resizing/encoding), so
+the upload request only pays for the disk write. Variants are EXIF-rotated
+and stripped of metadata (GPS tags). Animated GIFs are kept as they are.
+Until a variant exists its URL serves the original, uncached; once it exists
+it is served with sendfile and `Cache-Control: immutable` for a year: the
+URL contains the content hash, so it never changes meaning.
+
+Pillow is optional: without it every variant is a link to the original.
+On serverless deploys (Vercel) the pool dies with the response, so variants
+are only made when a view finds them missing.
+
+    python post_images.py --reprocess        # rebuild every variant (after changing VARIANTS)
+    python post_images.py --import-legacy    # move pre-pipeline uploads (<uuid>.<ext>) into it
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+
+VARIANTS = {'thumb': 320, 'feed': 960, 'full': 2048}  # Longest edge, pixels
+DEFAULT_VARIANT = 'feed'
+WEBP_QUALITY = 80
+CHUNK_SIZE = 64 * 1024
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 64
+CACHE_SECONDS = 365 * 24 * 3600
+FILE_MODE = 0o644  # mkstemp files are 0600; nginx/apache (USE_X_SENDFILE) may run as another user
+
+# Sniffed from the first bytes, never from the client's filename
+SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+EXTENSIONS = ('webp', 'png', 'jpg', 'gif')
+URL_PREFIX = '/uploads/posts'
+_URL = re.compile(r'^/uploads/posts/([0-9a-f]{32})/(\w+)$')
+DIGEST = re.compile(r'^[0-9a-f]{32}$')
+
+_executor = None
+_slots = None
+_pending = set()
+_pool_lock = threading.Lock()
+_warned = False
+
+
+def _setting(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def image_dir():
+    return _setting('POST_IMAGE_DIR', None) or os.path.join(current_app.root_path, 'uploads', 'posts')
+
+
+def sniff(head):
+    """Image extension for the first bytes of a file, or None."""
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def variant_url(digest, variant=DEFAULT_VARIANT):
+    return f"{URL_PREFIX}/{digest}/{variant}"
+
+
+def variant_urls(image_url):
+    """{thumb, feed, full} URLs for a pipeline image_url; None for legacy uploads."""
+    m = _URL.match(image_url or '')
+    if not m:
+        return None
+    return {name: variant_url(m.group(1), name) for name in VARIANTS}
+
+
+def find_file(digest, stem):
+    """Path of <digest>/<stem>.<ext> if it exists."""
+    folder = os.path.join(image_dir(), digest)
+    for ext in EXTENSIONS:
+        path = os.path.join(folder, f"{stem}.{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# --- Upload ---
+
+def store_upload(stream, queue=True):
+    """
+    Stream an uploaded image to disk and queue its variants. Returns the
+    content hash, or None when the bytes are not a supported image.
+    """
+    root = image_dir()
+    os.makedirs(root, exist_ok=True)
+    sha = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            head = stream.read(CHUNK_SIZE)
+            ext = sniff(head)
+            if ext is None:
+                return None
+            while head:
+                sha.update(head)
+                tmp.write(head)
+                head = stream.read(CHUNK_SIZE)
+        digest = sha.hexdigest()[:32]
+        folder = os.path.join(root, digest)
+        os.makedirs(folder, exist_ok=True)
+        original = os.path.join(folder, f"original.{ext}")
+        if not os.path.exists(original):  # Same image already stored: reuse it
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, original)
+        if queue and not all(find_file(digest, name) for name in VARIANTS):
+            schedule(digest)
+        return digest
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# --- Variants ---
+
+def _pool():
+    global _executor, _slots
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                workers = _setting('POST_IMAGE_WORKERS', DEFAULT_WORKERS)
+                _slots = threading.BoundedSemaphore(workers + _setting('POST_IMAGE_MAX_PENDING', DEFAULT_MAX_PENDING))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='postimg')
+    return _executor, _slots
+
+
+def schedule(digest):
+    """Queue variant generation. Skipped when already queued or the queue is full (retried on next view)."""
+    executor, slots = _pool()
+    with _pool_lock:
+        if digest in _pending:
+            return False
+        if not slots.acquire(blocking=False):
+            return False
+        _pending.add(digest)
+    root = image_dir()
+
+    def done(_):
+        with _pool_lock:
+            _pending.discard(digest)
+        slots.release()
+
+    try:
+        future = executor.submit(_process_logged, root, digest)
+    except Exception:
+        done(None)
+        raise
+    future.add_done_callback(done)
+    return True
+
+
+def _process_logged(root, digest):
+    try:
+        make_variants(root, digest)
+    except Exception as e:
+        print(f"⚠️ Post image {digest} failed, serving the original: {e}")
+        folder = os.path.join(root, digest)
+        if _original(folder):
+            _link_original(_original(folder), folder)
+
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.variant-')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _original(folder):
+    for ext in EXTENSIONS:
+        path = os.path.join(folder, f"original.{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _link_original(original, folder):
+    ext = original.rsplit('.', 1)[1]
+    for name in VARIANTS:
+        target = os.path.join(folder, f"{name}.{ext}")
+        try:
+            os.link(original, target)
+        except FileExistsError:
+            pass
+        except OSError:  # No hard links on this filesystem
+            _write_atomic(target, lambda tmp: shutil.copyfile(original, tmp))
+
+
+def make_variants(root, digest, force=False):
+    """Write the web sizes of one stored image (runs in the pool, or from the CLI)."""
+    global _warned
+    folder = os.path.join(root, digest)
+    original = _original(folder)
+    if original is None:
+        return
+    try:
+        from PIL import Image, ImageOps  # Optional: without Pillow the original is served for every size
+    except ImportError:
+        if not _warned:
+            print("⚠️ Pillow not installed: post images are served at their original size")
+            _warned = True
+        _link_original(original, folder)
+        return
+
+    with Image.open(original) as img:
+        if getattr(img, 'is_animated', False):
+            _link_original(original, folder)  # Keep the animation
+            return
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if 'A' in img.getbands() or img.mode == 'P' else 'RGB')
+        for name, edge in VARIANTS.items():
+            target = os.path.join(folder, f"{name}.webp")
+            if os.path.exists(target) and not force:
+                continue
+            resized = img.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            _write_atomic(target, lambda tmp: resized.save(tmp, 'WEBP', quality=WEBP_QUALITY, method=4))
+
+
+def shutdown(wait=True):
+    global _executor
+    with _pool_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+# --- Maintenance ---
+
+def reprocess():
+    root = image_dir()
+    digests = [d for d in os.listdir(root) if DIGEST.match(d)] if os.path.isdir(root) else []
+    for i, digest in enumerate(digests, 1):
+        make_variants(root, digest, force=True)
+        if i % 100 == 0:
+            print(f"   {i}/{len(digests)} images...")
+    print(f"✅ Reprocessed {len(digests)} images")
+
+
+def import_legacy():
+    """Run pre-pipeline uploads (<uuid>.<ext> files) through the pipeline and repoint their posts."""
+    from models import db, Post
+
+    root = image_dir()
+    moved = 0
+    for post in Post.query.filter(Post.image_url.like(f"{URL_PREFIX}/%.%")).all():
+        path = os.path.join(root, os.path.basename(post.image_url))
+        if not os.path.isfile(path):
+            print(f"[SKIP] Post {post.id}: {post.image_url} not found")
+            continue
+        with open(path, 'rb') as f:
+            digest = store_upload(f, queue=False)
+        if digest is None:
+            print(f"[SKIP] Post {post.id}: not a supported image")
+            continue
+        make_variants(root, digest)
+        post.image_url = variant_url(digest)
+        moved += 1
+    db.session.commit()
+    print(f"✅ {moved} legacy images imported (old files left in place)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Community post image pipeline')
+    parser.add_argument('--reprocess', action='store_true', help='Rebuild every variant')
+    parser.add_argument('--import-legacy', action='store_true', help='Move pre-pipeline uploads into the pipeline')
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        if args.import_legacy:
+            import_legacy()
+        if args.reprocess:
+            reprocess()
+        if not (args.import_legacy or args.reprocess):
+            parser.print_help()
+        shutdown()
@@ -0,0 +1,223 @@
+"""
+Token-bucket rate limiting for expensive endpoints.
+
+Rules are keyed by endpoint ('auth.login') or by blueprint ('ai_agency'),
+endpoint rules winning. Each rule can limit:
+
+- 'user':        requests per authenticated user (bucket per token user id)
+- 'ip':          requests per client IP
+- 'concurrency': requests of this rule running at once in one worker, so
+                 slow upstreams (Gemini, Yahoo Finance) cannot tie up every
+                 thread of the worker pool
+
+Limits are written 'N/second', 'N/minute' or 'N/hour': a bucket of N
+tokens refilled at N per period. Over the limit, the client gets a 429
+with a Retry-After header.
+
+Buckets live in a SQLite file (RATE_LIMIT_STORAGE, default
+instance/rate_limits.db) shared by all gunicorn workers on the host, or in
+process memory when RATE_LIMIT_STORAGE='memory'. The file is created on the
+first limited request, not at import; where it cannot be written (read-only
+serverless filesystems) the worker falls back to memory. Buckets idle for
+longer than the longest period are full again and get pruned. Override or extend the
+rules with app.config['RATE_LIMITS']. RATE_LIMIT_PROXY_HOPS is the number
+of reverse proxies in front of the app that append to X-Forwarded-For.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import g, jsonify, request
+
+DEFAULT_RULES = {
+    'ai_agency': {'user': '20/minute', 'ip': '60/minute', 'concurrency': 4},
+    'gemini_chat.gemini_chat': {'ip': '10/minute', 'concurrency': 4},
+    'market.get_historical_data': {'user': '60/minute', 'ip': '120/minute', 'concurrency': 8},
+    'market.analyze_market_endpoint': {'ip': '10/minute', 'concurrency': 4},
+    'admin.sync_leaderboard_endpoint': {'ip': '2/minute', 'concurrency': 1},
+    'auth.login': {'ip': '10/minute'},
+    'auth.register': {'ip': '5/minute'},
+}
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+IDLE_SECONDS = max(PERIODS.values())  # An idle bucket is full again after one period: same as no row
+PRUNE_INTERVAL = 300
+
+
+def parse_limit(spec):
+    """'20/minute' -> (capacity 20, refill 20/60 tokens per second)."""
+    count, period = spec.split('/')
+    capacity = float(count)
+    return capacity, capacity / PERIODS[period.strip()]
+
+
+class MemoryBackend:
+    """Buckets in this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._pruned = time.time()
+
+    def take(self, key, capacity, rate, now=None):
+        now = now or time.time()
+        with self._lock:
+            if now - self._pruned > PRUNE_INTERVAL:
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < IDLE_SECONDS}
+                self._pruned = now
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / rate
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ready = False
+        self._fallback = None
+        self._pruned = time.time()
+
+    def _setup(self):
+        """Create the file on first use; fall back to memory if it cannot be written."""
+        with self._lock:
+            if self._ready:
+                return
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._connect().execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Rate limit storage {self.path} not writable ({e}), using process memory")
+                self._fallback = MemoryBackend()
+            self._ready = True
+
+    def _prune(self, conn, now):
+        with self._lock:
+            if now - self._pruned <= PRUNE_INTERVAL:
+                return
+            self._pruned = now
+        conn.execute("DELETE FROM buckets WHERE updated < ?", (now - IDLE_SECONDS,))
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # Losing a few refills on a crash is fine
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, now=None):
+        now = now or time.time()
+        if not self._ready:
+            self._setup()
+        if self._fallback is not None:
+            return self._fallback.take(key, capacity, rate, now)
+        conn = self._connect()
+        self._prune(conn, now)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+def _client_ip(proxy_hops):
+    """Client address as seen by the outermost trusted proxy (clients can prepend fake hops)."""
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded and proxy_hops:
+        hops = [h.strip() for h in forwarded.split(',')]
+        return hops[-min(proxy_hops, len(hops))]
+    return request.remote_addr or 'unknown'
+
+
+def _user_id():
+    token = request.headers.get('Authorization')
+    if not token:
+        return None
+    from middleware import _decode_token  # memoized, so this is usually a dict lookup
+    try:
+        return _decode_token(token.split(' ')[1] if token.startswith('Bearer ') else token)
+    except Exception:
+        return None
+
+
+def _too_many(retry_after, message='Too many requests, please slow down.'):
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({'message': message, 'retry_after': seconds})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+
+def init_rate_limits(app):
+    """Register the limiter on the app. Call after the blueprints are registered."""
+    rules = dict(DEFAULT_RULES)
+    rules.update(app.config.get('RATE_LIMITS', {}))
+    if not app.config.get('RATE_LIMIT_ENABLED', True) or not rules:
+        return
+
+    storage = app.config.get('RATE_LIMIT_STORAGE') or os.path.join(app.instance_path, 'rate_limits.db')
+    if storage == 'memory':
+        backend = MemoryBackend()
+    else:
+        backend = SQLiteBackend(storage)  # Opened on the first limited request
+
+    parsed = {name: {kind: parse_limit(spec) for kind, spec in rule.items() if kind in ('user', 'ip')}
+              for name, rule in rules.items()}
+    proxy_hops = app.config.get('RATE_LIMIT_PROXY_HOPS', 1)
+    slots = {name: threading.BoundedSemaphore(rule['concurrency'])
+             for name, rule in rules.items() if rule.get('concurrency')}
+
+    @app.before_request
+    def _check_rate_limit():
+        name = request.endpoint if request.endpoint in rules else request.blueprint
+        if name not in rules or request.method == 'OPTIONS':
+            return None
+
+        keys = []
+        if 'user' in parsed[name]:
+            user_id = _user_id()
+            if user_id is not None:
+                keys.append((f"{name}:user:{user_id}", parsed[name]['user']))
+        if 'ip' in parsed[name]:
+            keys.append((f"{name}:ip:{_client_ip(proxy_hops)}", parsed[name]['ip']))
+
+        for key, (capacity, rate) in keys:
+            try:
+                allowed, retry_after = backend.take(key, capacity, rate)
+            except sqlite3.OperationalError:
+                continue  # Storage busy: fail open rather than block the request
+            if not allowed:
+                return _too_many(retry_after)
+
+        slot = slots.get(name)
+        if slot is not None:
+            if not slot.acquire(blocking=False):
+                return _too_many(1, 'Server busy, please retry shortly.')
+            g.rate_limit_slot = slot
+        return None
+
+    @app.teardown_request
+    def _release_slot(exc):
+        slot = g.pop('rate_limit_slot', None)
+        if slot is not None:
+            slot.release()
@@ -1,5 +1,6 @@
 from app import app
 from models import db, User, Post, Comment, PostLike
+from post_counters import recount
 from datetime import datetime, timedelta
 import random
 
@@ -78,9 +79,7 @@ def seed_community_data():
             db.session.flush() # get ID
 
             # Create Likes (Scatter them among users)
-            # Ensure post has 'likes' count representation if we want, 
-            # though model computes len(post.likes). 
-            # So we create PostLike entries.
+            # PostLike rows; the post counters are recounted below.
             potential_likers = [u for u in users if u.id != p.user_id]
             # Pick random subset
             likers = random.sample(potential_likers, k=min(len(potential_likers), post_data["likes"]))
@@ -100,6 +99,8 @@ def seed_community_data():
                 )
                 db.session.add(c)
 
+        db.session.flush()
+        recount()
         db.session.commit()
         print("Community data seeded successfully!")
 
@@ -8,6 +8,7 @@ sys.path.append(os.path.join(os.getcwd(), 'backend'))
 
 from __init__ import create_app
 from models import db, Post, Comment, PostLike, User
+from post_counters import recount
 
 def seed_news_hub():
     print("Seeding News Hub with Trading News & Community Posts...")
@@ -154,6 +155,8 @@ def seed_news_hub():
                 )
                 db.session.add(comment)
         
+        db.session.flush()
+        recount([p.id for p in created_posts])
         db.session.commit()
         
         print("\n✅ News Hub Successfully Seeded!")
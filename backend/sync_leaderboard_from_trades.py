@@ -13,6 +13,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app
 from models import db, User, Account, Trade, Leaderboard, ChallengeStatus, TradeStatus
+from equity_curves import get_sparklines
+from trade_archive import closed_trades
 from datetime import datetime
 import json
 import random
@@ -24,10 +26,7 @@ COUNTRIES = ["MA", "FR", "US", "UK", "DE", "ES", "AE", "SA", "EG", "TN"]
 
 def calculate_account_stats(account_id):
     """Calculate win rate, profit, and other stats from trades."""
-    trades = Trade.query.filter_by(
-        account_id=account_id, 
-        status=TradeStatus.CLOSED
-    ).all()
+    trades = closed_trades([account_id], limit=None, include_archive=True)
     
     if not trades:
         return {
@@ -51,22 +50,6 @@ def calculate_account_stats(account_id):
     }
 
 
-def generate_equity_curve(initial_balance, final_equity, num_points=20):
-    """Generate a realistic equity curve for sparkline visualization."""
-    curve = [initial_balance]
-    total_change = final_equity - initial_balance
-    
-    for i in range(1, num_points):
-        progress = i / num_points
-        expected = initial_balance + (total_change * progress)
-        noise = random.uniform(-abs(total_change) * 0.1, abs(total_change) * 0.1)
-        value = max(initial_balance * 0.85, expected + noise)
-        curve.append(round(value, 2))
-    
-    curve.append(round(final_equity, 2))
-    return curve
-
-
 def sync_leaderboard(period='ALL_TIME'):
     """Sync leaderboard from real trade data."""
     
@@ -92,6 +75,7 @@ def sync_leaderboard(period='ALL_TIME'):
         print(f"📋 Found {len(accounts)} eligible accounts")
         
         candidates = []
+        sparklines = get_sparklines([a.id for a in accounts], period)  # One snapshot query for all accounts
         
         for account in accounts:
             stats = calculate_account_stats(account.id)
@@ -108,8 +92,8 @@ def sync_leaderboard(period='ALL_TIME'):
             
             roi = (profit / account.initial_balance * 100) if account.initial_balance > 0 else 0
             
-            # Generate equity curve
-            equity_curve = generate_equity_curve(account.initial_balance, account.equity)
+            # Real equity curve from performance snapshots
+            equity_curve = sparklines.get(account.id, [])
             
             # Generate badges based on performance
             badges = []
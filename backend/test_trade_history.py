@@ -0,0 +1,73 @@
+"""
+Trade history paging across the hot table and trades_archive.
+
+A FUNDED account keeps its old closed trades in `trades`, while a FAILED
+account's trades move to `trades_archive`: the two interleave in time, and
+every page of /api/trading/history must still return all of them in order.
+
+    python test_trade_history.py      (or: python -m pytest test_trade_history.py)
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_db_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'history.db')}"
+os.environ['RATE_LIMIT_STORAGE'] = 'memory'
+
+from app import app
+from models import db, User, Account, Trade, ChallengeStatus, TradeStatus, TradeType
+from trade_archive import archive_closed_trades
+
+
+def _seed():
+    db.create_all()
+    user = User(username='history', full_name='History Test', email='history@test.local', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    funded = Account(user_id=user.id, plan_name='Pro', status=ChallengeStatus.FUNDED)
+    failed = Account(user_id=user.id, plan_name='Starter', status=ChallengeStatus.FAILED)
+    db.session.add_all([funded, failed])
+    db.session.flush()
+
+    now = datetime.utcnow()
+    # Funded: recent and very old trades (stay hot). Failed: in between (archived).
+    for account, days in ((funded, [1, 2, 3, 200, 201, 202, 203, 204, 205]), (failed, [120, 121, 122, 123])):
+        for d in days:
+            db.session.add(Trade(
+                account_id=account.id, user_id=user.id, symbol='BTC-USD',
+                trade_type=TradeType.BUY, side=TradeType.BUY, quantity=1, price=100,
+                amount=100, entry_price=100, exit_price=101, pnl=1,
+                status=TradeStatus.CLOSED, created_at=now - timedelta(days=d),
+                closed_at=now - timedelta(days=d),
+            ))
+    db.session.commit()
+    return user.id
+
+
+def test_history_pages_include_interleaved_archive():
+    with app.app_context():
+        user_id = _seed()
+        expected = [t.id for t in Trade.query.order_by(Trade.closed_at.desc(), Trade.id.desc())]
+        assert archive_closed_trades() == 4
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer mock_jwt_token_{user_id}'}
+    seen, cursor = [], None
+    while True:
+        url = '/api/trading/history?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        seen += [t['id'] for t in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert seen == expected, f"{seen} != {expected}"
+    print(f"✅ {len(seen)} trades over {len(seen) // 3 + 1} pages, hot and archived in order")
+
+
+if __name__ == '__main__':
+    test_history_pages_include_interleaved_archive()
@@ -0,0 +1,165 @@
+"""
+TRADESENSE AI - TRADE ARCHIVE
+=============================
+Keeps the hot `trades` table small.
+
+1. Archiver: moves CLOSED trades of FAILED accounts that were closed more
+   than TRADE_ARCHIVE_AFTER_DAYS ago into `trades_archive`, in batches of
+   TRADE_ARCHIVE_BATCH_SIZE rows (INSERT ... SELECT + DELETE, one short
+   transaction per batch). Ids are kept, so a trade has the same id in
+   both tables.
+2. Readers: closed_trades() and account_trades() read the hot table first
+   and only also read the archive when the page reaches back past the
+   archive cutoff (live accounts keep their old trades in the hot table, so
+   hot and archived trades interleave there).
+
+Usage (cron or long-running worker):
+    python trade_archive.py               # archive everything eligible, then exit
+    python trade_archive.py --loop        # keep running, one pass per hour
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from models import db, Account, Trade, ArchivedTrade, ChallengeStatus, TradeStatus
+from pagination import after_cursor
+
+# Defaults (overridable through app.config, see config.py)
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+DEFAULT_ARCHIVE_BATCH_SIZE = 1000
+
+# Accounts whose trades can no longer change
+ARCHIVABLE_STATUSES = [ChallengeStatus.FAILED]
+
+TRADE_COLUMNS = [c.name for c in Trade.__table__.columns]
+
+
+def _setting(key, default):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+# --- ARCHIVER ---
+
+def _eligible_ids(cutoff, batch_size):
+    return [i for (i,) in db.session.query(Trade.id)
+            .join(Account, Trade.account_id == Account.id)
+            .filter(Account.status.in_(ARCHIVABLE_STATUSES),
+                    Trade.status == TradeStatus.CLOSED,
+                    Trade.closed_at < cutoff)
+            .order_by(Trade.id)
+            .limit(batch_size)]
+
+
+def archive_closed_trades(older_than_days=None, batch_size=None, max_batches=None, pause=0.0):
+    """
+    Move eligible closed trades to trades_archive. Returns the number moved.
+
+    Each batch copies and deletes the same id list in one transaction, so a
+    crash never leaves a trade in both tables or in neither.
+    """
+    older_than_days = older_than_days or _setting('TRADE_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or _setting('TRADE_ARCHIVE_BATCH_SIZE', DEFAULT_ARCHIVE_BATCH_SIZE)
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    archive_cols = [ArchivedTrade.__table__.c[name] for name in TRADE_COLUMNS]
+    moved, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        ids = _eligible_ids(cutoff, batch_size)
+        if not ids:
+            break
+        try:
+            source = select(*[Trade.__table__.c[name] for name in TRADE_COLUMNS]).where(Trade.id.in_(ids))
+            db.session.execute(insert(ArchivedTrade.__table__).from_select(archive_cols, source))
+            db.session.execute(delete(Trade.__table__).where(Trade.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += len(ids)
+        batches += 1
+        if pause:
+            time.sleep(pause)  # let production queries through between batches
+    return moved
+
+
+# --- READERS ---
+
+def _merge_newest_first(hot, cold, limit):
+    # Same (closed_at, id) order as the queries, so pages chain with pagination cursors
+    merged = sorted(hot + cold, key=lambda t: (t.closed_at or datetime.min, t.id), reverse=True)
+    return merged[:limit] if limit else merged
+
+
+def closed_trades(account_ids, limit=50, before=None, include_archive=None, cursor=None):
+    """
+    Closed trades for `account_ids`, newest first (closed_at, then id).
+
+    `cursor` (a decoded pagination cursor of the last trade sent) pages back
+    through the history with a keyset read; `before` (closed_at < before)
+    still works. The archive is read when `include_archive` is True, or by
+    default when the page is short or its oldest trade is older than the
+    archive cutoff: archived trades are all older than that, so a newer page
+    cannot be missing any.
+    """
+    if not account_ids:
+        return []
+
+    def page(model, query):
+        if before is not None:
+            query = query.filter(model.closed_at < before)
+        if cursor is not None:
+            query = query.filter(after_cursor(model.closed_at, model.id, cursor))
+        query = query.order_by(model.closed_at.desc(), model.id.desc())
+        return query.limit(limit).all() if limit else query.all()
+
+    hot = page(Trade, Trade.query.filter(Trade.account_id.in_(account_ids), Trade.status == TradeStatus.CLOSED))
+
+    if include_archive is None:
+        cutoff = datetime.utcnow() - timedelta(days=_setting('TRADE_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))
+        oldest = hot[-1].closed_at if hot else None
+        include_archive = limit is None or len(hot) < limit or oldest is None or oldest < cutoff
+    if not include_archive:
+        return hot
+
+    cold = page(ArchivedTrade, ArchivedTrade.query.filter(ArchivedTrade.account_id.in_(account_ids)))
+    return _merge_newest_first(hot, cold, limit)
+
+
+def account_trades(account_id):
+    """Every trade of one account, hot and archived."""
+    hot = Trade.query.filter_by(account_id=account_id).all()
+    cold = ArchivedTrade.query.filter_by(account_id=account_id).all()
+    return hot + cold
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description='Move old closed trades of failed accounts to trades_archive')
+    parser.add_argument('--days', type=int, default=None, help='Archive trades closed more than N days ago')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches')
+    parser.add_argument('--loop', action='store_true', help='Keep running, one pass per hour')
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        ArchivedTrade.__table__.create(bind=db.engine, checkfirst=True)
+        while True:
+            start = time.perf_counter()
+            moved = archive_closed_trades(args.days, args.batch_size, pause=args.pause)
+            print(f"🗄️  Archived {moved} trades in {time.perf_counter() - start:.1f}s at {datetime.utcnow().isoformat()}")
+            if not args.loop:
+                break
+            db.session.remove()
+            time.sleep(3600)
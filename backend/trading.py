@@ -3,6 +3,8 @@ from models import db, Account, Trade, TradeStatus, TradeType, ChallengeStatus
 from engine import evaluate_challenge_rules
 from datetime import datetime
 from middleware import token_required
+from trade_archive import closed_trades
+from pagination import InvalidCursor, next_cursor, page_args, with_cursor
 
 trading_bp = Blueprint('trading', __name__)
 
@@ -154,6 +156,21 @@ def get_trade_history(current_user):
     # Get all accounts or just active? Usually all.
     accounts = Account.query.filter_by(user_id=current_user.id).all()
     account_ids = [a.id for a in accounts]
-    
-    trades = Trade.query.filter(Trade.account_id.in_(account_ids), Trade.status == TradeStatus.CLOSED).order_by(Trade.closed_at.desc()).limit(50).all()
-    return jsonify([t.to_dict() for t in trades])
+
+    # ?cursor=<X-Next-Cursor> pages back in time; older pages come from trades_archive
+    try:
+        limit, cursor = page_args(default=50)
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
+    before = request.args.get('before')
+    try:
+        before = datetime.fromisoformat(before) if before else None
+    except ValueError:
+        return jsonify({'message': 'Invalid before date'}), 400
+    include_archive = request.args.get('include_archive')
+    if include_archive is not None:
+        include_archive = include_archive.lower() == 'true'
+
+    trades = closed_trades(account_ids, limit=limit + 1, before=before, include_archive=include_archive, cursor=cursor)
+    next_page = next_cursor(trades[limit - 1], 'closed_at') if len(trades) > limit else None
+    return with_cursor(jsonify([t.to_dict() for t in trades[:limit]]), next_page)
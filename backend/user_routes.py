@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, User, UserRole, SystemConfig
-from middleware import token_required
+from middleware import token_required, invalidate_user
+from password_hashing import HashingBusy, busy_response
 import datetime
 
 user_bp = Blueprint('user', __name__)
@@ -50,9 +51,14 @@ def update_profile(current_user):
     if 'password' in data and data['password']:
         if len(data['password']) < 6:
              return jsonify({'message': 'Password too short'}), 400
-        current_user.set_password(data['password'])
+        try:
+            current_user.set_password(data['password'])
+        except HashingBusy:
+            db.session.rollback()
+            return busy_response()
         
     db.session.commit()
+    invalidate_user(current_user.id)  # Refresh the token_required cache
     return jsonify({'message': 'Profile updated', 'user': current_user.to_dict()})
 
 @user_bp.route('/preferences', methods=['POST'])
@@ -80,3 +86,21 @@ def update_preferences(current_user):
         
     except ImportError:
         return jsonify({'message': 'Preferences system not active yet'}), 501
+
+@user_bp.route('/accounts/<int:account_id>/equity-curve', methods=['GET'])
+@token_required
+def get_equity_curve(current_user, account_id):
+    """Fixed-size equity sparkline for a trader profile page."""
+    from models import Account
+    from equity_curves import get_sparkline
+
+    account = Account.query.get(account_id)
+    if not account:
+        return jsonify({'message': 'Account not found'}), 404
+
+    period = request.args.get('period', 'ALL_TIME')
+    return jsonify({
+        'account_id': account.id,
+        'period': period,
+        'sparkline': get_sparkline(account.id, period)
+    })
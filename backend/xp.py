@@ -0,0 +1,133 @@
+"""
+XP accounting for the academy.
+
+award_xp() is a single atomic UPDATE ... SET total_xp = total_xp + n inside
+the caller's transaction (no read-modify-write, so concurrent lesson
+completions no longer lose XP, and no extra commit). The level title is
+computed in the same statement with a CASE over the level thresholds.
+
+Thresholds live in the xp_levels table (DEFAULT_LEVELS when it is empty)
+and are cached per process for XP_LEVELS_CACHE_TTL seconds. The XP
+leaderboard reads the top rows through ix_user_xp_total_xp and is cached
+for XP_LEADERBOARD_CACHE_TTL seconds.
+"""
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User, UserXP, XPLevel
+
+# (min_xp, title), the titles award_xp used to hard-code
+DEFAULT_LEVELS = [(0, 'Novice'), (500, 'Silver Student'), (2000, 'Gold Pro'), (5000, 'Elite Trader')]
+DEFAULT_LEVELS_TTL = 300  # seconds
+DEFAULT_LEADERBOARD_TTL = 30  # seconds
+
+_lock = threading.Lock()
+_levels_cache = {'levels': None, 'expires': 0.0}
+_leaderboard_cache = {}
+
+
+def _setting(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def get_levels():
+    """Thresholds as [(min_xp, title)] sorted by min_xp, cached per process."""
+    now = time.monotonic()
+    levels = _levels_cache['levels']
+    if levels is None or _levels_cache['expires'] <= now:
+        rows = db.session.execute(select(XPLevel.min_xp, XPLevel.title).order_by(XPLevel.min_xp)).all()
+        levels = [(row.min_xp, row.title) for row in rows] or list(DEFAULT_LEVELS)
+        with _lock:
+            _levels_cache.update(levels=levels, expires=now + _setting('XP_LEVELS_CACHE_TTL', DEFAULT_LEVELS_TTL))
+    return levels
+
+
+def clear_level_cache():
+    with _lock:
+        _levels_cache.update(levels=None, expires=0.0)
+
+
+def level_for(total_xp):
+    title = None
+    for min_xp, level_title in get_levels():
+        if total_xp >= min_xp:
+            title = level_title
+    return title or get_levels()[0][1]
+
+
+def _level_expr(total_expr):
+    """SQL CASE picking the title for a total: highest threshold first."""
+    levels = get_levels()
+    return case(
+        *[(total_expr >= min_xp, title) for min_xp, title in reversed(levels)],
+        else_=levels[0][1]
+    )
+
+
+def _increment(user_id, amount):
+    table = UserXP.__table__
+    new_total = table.c.total_xp + amount
+    # level_title first: MySQL evaluates SET left to right and would otherwise see the new total
+    stmt = (table.update().where(table.c.user_id == user_id)
+            .ordered_values((table.c.level_title, _level_expr(new_total)), (table.c.total_xp, new_total)))
+    return db.session.execute(stmt).rowcount
+
+
+def award_xp(user_id, amount):
+    """Add XP atomically in the current transaction; the caller commits."""
+    if _increment(user_id, amount):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(UserXP.__table__.insert().values(
+                user_id=user_id, total_xp=amount, level_title=level_for(amount)))
+    except IntegrityError:
+        _increment(user_id, amount)  # Row created by a concurrent request meanwhile
+
+
+def get_xp_leaderboard(limit=20):
+    """Top users by XP, served from the total_xp index and cached briefly."""
+    now = time.monotonic()
+    cached = _leaderboard_cache.get(limit)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    rows = db.session.execute(
+        select(UserXP.user_id, UserXP.total_xp, User.username, User.full_name)
+        .join(User, User.id == UserXP.user_id)
+        .order_by(UserXP.total_xp.desc(), UserXP.user_id)
+        .limit(limit)
+    ).all()
+    board = [{
+        'rank': i + 1,
+        'user_id': row.user_id,
+        'username': row.username,
+        'full_name': row.full_name,
+        'xp': row.total_xp,
+        'level': level_for(row.total_xp)
+    } for i, row in enumerate(rows)]
+    with _lock:
+        _leaderboard_cache[limit] = (board, now + _setting('XP_LEADERBOARD_CACHE_TTL', DEFAULT_LEADERBOARD_TTL))
+    return board
+
+
+def get_user_rank(user_id):
+    """(xp, rank) of one user; the rank is an index range count."""
+    total = db.session.execute(select(UserXP.total_xp).where(UserXP.user_id == user_id)).scalar() or 0
+    ahead = db.session.execute(select(func.count()).select_from(UserXP).where(UserXP.total_xp > total)).scalar()
+    return total, ahead + 1
+
+
+def seed_levels():
+    """Insert DEFAULT_LEVELS when xp_levels is empty."""
+    if XPLevel.query.count() == 0:
+        for min_xp, title in DEFAULT_LEVELS:
+            db.session.add(XPLevel(min_xp=min_xp, title=title))
+        db.session.commit()
+        clear_level_cache()
@@ -155,9 +155,18 @@ const Community: React.FC = () => {
     if (token) headers['Authorization'] = `Bearer ${token}`;
 
     try {
-      const res = await fetch(`${API_BASE}/community/posts/${postId}/comments`, { headers });
+      // Comments come in pages: follow X-Next-Cursor until the last one
+      const comments: any[] = [];
+      let cursor: string | null = null;
+      let res: Response;
+      do {
+        const query = `limit=100${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+        res = await fetch(`${API_BASE}/community/posts/${postId}/comments?${query}`, { headers });
+        if (!res.ok) break;
+        comments.push(...await res.json());
+        cursor = res.headers.get('X-Next-Cursor');
+      } while (cursor);
       if (res.ok) {
-        const comments = await res.json();
         // Map backend comment to frontend structure
         const mappedComments = comments.map((c: any) => ({
           user_name: c.author.name,